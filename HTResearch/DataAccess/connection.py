@@ -4,7 +4,9 @@
 #
 
 # stdlib imports
-from mongoengine.connection import connect, disconnect, get_connection
+from mongoengine.connection import ConnectionError, connect, disconnect, get_connection
+import os
+from threading import RLock
 
 # project imports
 from HTResearch.Utilities.config import get_config_value
@@ -15,17 +17,112 @@ logger = get_logger(LoggingSection.DATA, __name__)
 #endregion
 
 
+class ConnectionPool(object):
+    """
+    The MongoDB client of a process, shared by every DBConnection.
+
+    The client is created the first time a connection is needed and kept open, and it pools its sockets across
+    threads. A process forked from one that had connected, such as the frontier's cache process, gets a client
+    of its own instead of sharing its parent's sockets.
+
+    Attributes:
+        connects (int): The number of clients created.
+        checkouts (int): The number of times the connection has been used.
+        active (int): The number of uses still in progress.
+        failures (int): The number of failed attempts to connect.
+    """
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.active = 0
+        self.failures = 0
+        self._settings = None
+        self._pid = None
+        self._lock = RLock()
+
+    def acquire(self):
+        """
+        Connects to MongoDB if this process has not yet, and marks the connection as in use.
+
+        Returns:
+            The pymongo client.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._connect()
+            try:
+                conn = get_connection()
+            except ConnectionError:
+                # Someone disconnected the client, e.g. with mongoengine's disconnect(), so make a new one
+                self._connect()
+                conn = get_connection()
+            self.checkouts += 1
+            self.active += 1
+        return conn
+
+    def release(self):
+        """Marks a use of the connection as done. The connection stays open."""
+        with self._lock:
+            self.active -= 1
+
+    def reset(self):
+        """Closes the connection. The next use reconnects."""
+        with self._lock:
+            disconnect()
+            self._pid = None
+
+    def stats(self):
+        """
+        Reports the usage of the pool.
+
+        Returns:
+            A dictionary of the pool's pid, connects, checkouts, active, failures and max_pool_size.
+        """
+        return {
+            'pid': self._pid,
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'active': self.active,
+            'failures': self.failures,
+            'max_pool_size': self._settings['max_pool_size'] if self._settings else None,
+        }
+
+    def _connect(self):
+        forked = self._pid is not None and self._pid != os.getpid()
+        if self._settings is None:
+            self._settings = {
+                'host': get_config_value("MONGO", "host"),
+                'port': int(get_config_value("MONGO", "port")),
+                'db': get_config_value("MONGO", "name"),
+                'max_pool_size': int(get_config_value("MONGO", "pool_size") or 100),
+            }
+        try:
+            # Drop a client inherited from the parent process or registered by someone else
+            disconnect()
+            connect(**self._settings)
+        except:
+            self.failures += 1
+            raise
+        self._pid = os.getpid()
+        self.connects += 1
+        if forked:
+            # The uses in progress belong to the parent process
+            self.active = 0
+        logger.info('Connected to MongoDB in process %d' % self._pid)
+
+
+# The pool shared by every DBConnection in this process
+connection_pool = ConnectionPool()
+
+
 class DBConnection(object):
     """A class that encapsulates the MongoDB connection."""
 
     def __init__(self):
+        self.conn = None
         try:
-            host = get_config_value("MONGO", "host")
-            port = int(get_config_value("MONGO", "port"))
-            name = get_config_value("MONGO", "name")
-            disconnect()
-            connect(db=name, host=host, port=port)
-            self.conn = get_connection()
+            self.conn = connection_pool.acquire()
         except:
             logger.error('Connection to MongoDB could not be established.')
 
@@ -33,4 +130,5 @@ class DBConnection(object):
         return self
 
     def __exit__(self, ext, exv, trb):
-        disconnect()
\ No newline at end of file
+        if self.conn is not None:
+            connection_pool.release()
@@ -5,13 +5,16 @@
 
 # stdlib imports
 from datetime import datetime
-from mongoengine import Q
+from mongoengine import Q, ValidationError
 from mongoengine.fields import StringField
+from pymongo.errors import BulkWriteError
 import re
 
 # project imports
+from HTResearch.DataAccess import search_index
 from HTResearch.DataAccess.dto import *
 from HTResearch.DataAccess.connection import DBConnection
+from HTResearch.DataAccess.pagination import *
 from HTResearch.DataModel.enums import OrgTypesEnum
 from HTResearch.Utilities.geocoder import geocode
 from HTResearch.Utilities.url_tools import UrlUtility
@@ -23,6 +26,34 @@ logger = get_logger(LoggingSection.CLIENT, __name__)
 #endregion
 
 
+def reference_id(ref):
+    """
+    Finds the id a reference points to.
+
+    Arguments:
+        ref (object): A DBRef, an id, or a document.
+
+    Returns:
+        The id.
+    """
+    return getattr(ref, 'id', ref)
+
+
+def reference_ids(dto, field_name):
+    """
+    Finds the ids a document's list of references points to, without dereferencing them.
+
+    Arguments:
+        dto (DTO): The document.
+        field_name (string): The name of the list of references.
+
+    Returns:
+        A list of the ids, in the order of the references.
+    """
+    # Reading the field itself would load every referenced document
+    return [reference_id(ref) for ref in dto._data.get(field_name) or []]
+
+
 class DAO(object):
     """
     A generic DAO class that may be subclassed by DAOs for operations on
@@ -35,6 +66,12 @@ class DAO(object):
     def __init__(self):
         self.conn = DBConnection
 
+        # Searches rank documents by how well they match, blended with this field's weight, if any
+        self._search_weight_field = None
+        self._search_weight_blend = 0.5
+        # The most matching documents ranked by a search, taking the heaviest first
+        self._max_search_candidates = 1000
+
     @decorators.safe_mongocall
     def all(self, *only):
         """
@@ -47,7 +84,8 @@ class DAO(object):
             The documents or specified fields in the collection.
         """
         with self.conn():
-            return self.dto.objects(self._valid_query()).only(*only)
+            ret = self.dto.objects(self._valid_query())
+            return self._project(ret, only)
 
     @decorators.safe_mongocall
     def merge_documents(self, dto, merge_dto):
@@ -102,18 +140,42 @@ class DAO(object):
     # NOTE: This method will not return an object when
     # passed constraints that are reference types!
     @decorators.safe_mongocall
-    def find(self, **constraints):
+    def find(self, only=None, exclude=None, **constraints):
         """
         Finds and returns a single (valid) document.
 
         Arguments:
+            only (string[]): The only fields to load, if any.
+            exclude (string[]): Fields to leave out of the document, if any.
             constraints (param[]): The constraints to apply to the find operation.
 
         Returns:
             A DTO matching the constraints provided.
         """
         with self.conn():
-            return self.dto.objects(Q(**constraints) & self._valid_query()).first()
+            return self._project(self.dto.objects(Q(**constraints) & self._valid_query()), only, exclude).first()
+
+    @decorators.safe_mongocall
+    def find_references(self, refs, only=None, exclude=None, **constraints):
+        """
+        Loads the (valid) documents that a set of references point to, in a single query, rather than
+        dereferencing them one at a time.
+
+        Arguments:
+            refs (object[]): The references, as DBRefs, ids or documents. None references are skipped.
+            only (string[]): The only fields to load, if any.
+            exclude (string[]): Fields to leave out of the documents, if any.
+            constraints (param[]): The constraints to apply to the find operation.
+
+        Returns:
+            A dictionary of the documents found, by id.
+        """
+        ids = list(set(reference_id(ref) for ref in refs if ref is not None))
+        if not ids:
+            return {}
+        with self.conn():
+            found = self.dto.objects(Q(id__in=ids) & Q(**constraints) & self._valid_query())
+            return dict((dto.id, dto) for dto in self._project(found, only, exclude))
 
     @decorators.safe_mongocall
     def count(self, search=None, **constraints):
@@ -121,7 +183,8 @@ class DAO(object):
         Returns the number of documents that satisfy a query.
 
         Arguments:
-            search (string): A text search to apply to documents' fields.
+            search (string): A text search to apply to documents' fields. Searches rank at most
+                _max_search_candidates documents, so they count at most that many, too.
             constraints (param[]): The constraints to apply to the count operation.
 
         Returns:
@@ -129,7 +192,12 @@ class DAO(object):
         """
         with self.conn():
             # Do text search or grab by constraints
-            if search is not None:
+            if search is not None and self._has_search_index():
+                if not search_index.words([search]):
+                    return 0
+                matches = self.dto.objects(self._search_query(search) & self._valid_query() & Q(**constraints))
+                return min(matches.count(), self._max_search_candidates)
+            elif search is not None:
                 return len(self._text_search(search, None))
             else:
                 return self.dto.objects(Q(**constraints) & self._valid_query()).count()
@@ -138,7 +206,7 @@ class DAO(object):
     # passed constraints that are reference types!
     @decorators.safe_mongocall
     def findmany(self, num_elements=None, page_size=None, page=None, start=None, end=None, sort_fields=None,
-                 search=None, search_fields=None, **constraints):
+                 search=None, search_fields=None, cursor=None, only=None, exclude=None, **constraints):
         """
         Finds and returns a list of (valid) documents.
 
@@ -149,13 +217,34 @@ class DAO(object):
             start (int): The index to start on, inclusive (used without paging).
             end (int): The index to end on, inclusive (used without paging, with start).
             sort_fields (param[]): The document fields to sort results by.
-            search (string): A text search for documents' fields.
+            search (string): A text search for documents' fields. Unless search_fields are given, the results
+                are ranked by the search instead of sorted by sort_fields.
             search_fields (param[]): The document fields to text search by.
+            cursor (string): A cursor to page by instead of by page number (used with page_size). Pass '' for the
+                first page, then the cursor returned with each page for the next. Ranked searches page by offset,
+                and everything else by the sort fields.
+            only (string[]): The only fields to load, if any.
+            exclude (string[]): Fields to leave out of the documents, if any.
             constraints (param[]): The constraints to apply to the find operation.
 
         Returns:
-            A list of all documents satisfying the constraints provided.
+            A list of all documents satisfying the constraints provided. With a cursor, a (documents, next cursor)
+            tuple instead, where the next cursor is None after the last page.
         """
+        if cursor is not None:
+            return self._find_page(page_size or 50, cursor, sort_fields, search, search_fields, only, exclude,
+                                   **constraints)
+
+        if search is not None and search_fields is None and self._has_search_index():
+            if num_elements is not None:
+                return self.search(search, limit=num_elements, only=only, exclude=exclude, **constraints)
+            elif page_size is not None and page is not None:
+                return self.search(search, limit=page_size, offset=page_size * page, only=only, exclude=exclude,
+                                   **constraints)
+            elif start is not None:
+                return self.search(search, limit=None if end is None else end + 1 - start, offset=start,
+                                   only=only, exclude=exclude, **constraints)
+            return self.search(search, only=only, exclude=exclude, **constraints)
 
         with self.conn():
             # Do text search or grab by constraints
@@ -163,6 +252,7 @@ class DAO(object):
                 ret = self._text_search(search, fields=search_fields, **constraints)
             else:
                 ret = self.dto.objects(Q(**constraints) & self._valid_query())
+            ret = self._project(ret, only, exclude)
 
             # Sort if there are sort fields
             if sort_fields is not None and len(sort_fields) > 0:
@@ -184,10 +274,118 @@ class DAO(object):
 
             return ret
 
+    @decorators.safe_mongocall
+    def search(self, text, limit=None, offset=0, only=None, exclude=None, **constraints):
+        """
+        Finds the (valid) documents whose text contains every word of a search, using the search index.
+
+        Up to _max_search_candidates matches are ranked, taking the heaviest first. Each is scored by how well it
+        matches the search, blended with its weight, and the best are returned. The rest can't be paged to,
+        and count leaves them out too.
+
+        Arguments:
+            text (string): The text to search for.
+            limit (int): The most documents to return, or None for all of them.
+            offset (int): The number of best-ranked documents to skip.
+            only (string[]): The only fields to load, if any.
+            exclude (string[]): Fields to leave out of the documents, if any.
+            constraints (param[]): The constraints to apply to the search.
+
+        Returns:
+            A list of the matching documents, best first.
+        """
+        query_words = search_index.words([text])
+        if not query_words:
+            return []
+
+        weight_field = self._search_weight_field
+        with self.conn():
+            candidates = self.dto.objects(self._search_query(text) & self._valid_query() & Q(**constraints))
+            if weight_field is not None:
+                candidates = candidates.order_by('-' + weight_field).only('id', 'search_words', weight_field)
+            else:
+                candidates = candidates.only('id', 'search_words')
+
+            ranked = []
+            for dto in candidates[:self._max_search_candidates]:
+                score = search_index.relevance(query_words, dto.search_words)
+                if weight_field is not None:
+                    score += self._search_weight_blend * ((getattr(dto, weight_field) or 0.0) - score)
+                ranked.append((score, dto.id))
+            # The sort is stable, so equal scores stay heaviest first
+            ranked.sort(key=lambda r: r[0], reverse=True)
+
+            end = None if limit is None else offset + limit
+            ids = [dto_id for score, dto_id in ranked[offset:end]]
+            if not ids:
+                return []
+            found = dict((dto.id, dto) for dto in self._project(self.dto.objects(id__in=ids), only, exclude))
+            return [found[dto_id] for dto_id in ids if dto_id in found]
+
+    # Find a page of documents starting at a cursor. Pages are read straight off an index on the sort fields
+    # and the id, where skipping to a page number would read every document before it.
+    def _find_page(self, page_size, cursor, sort_fields, search, search_fields, only, exclude, **constraints):
+        if search is not None and search_fields is None and self._has_search_index():
+            # Searches are ranked in memory, so their cursors hold how far into the ranking the page starts, and
+            # each page ranks the candidates again
+            values = decode_cursor(cursor) if cursor else [0]
+            if len(values) != 1 or not isinstance(values[0], (int, long)) or values[0] < 0:
+                raise InvalidCursorError('Invalid cursor: %s' % cursor)
+            offset = values[0]
+            results = self.search(search, limit=page_size + 1, offset=offset, only=only, exclude=exclude,
+                                  **constraints)
+            next_cursor = encode_cursor([offset + page_size]) if len(results) > page_size else None
+            return results[:page_size], next_cursor
+
+        keys = sort_keys(sort_fields)
+        if only:
+            # The next cursor is made from the sort fields of the last document
+            only = list(only) + [name for name, descending in keys if name not in only]
+        with self.conn():
+            if search is not None:
+                ret = self._text_search(search, fields=search_fields, **constraints)
+            else:
+                ret = self.dto.objects(Q(**constraints) & self._valid_query())
+            if cursor:
+                ret = ret.filter(after_query(keys, decode_cursor(cursor)))
+            ret = ret.order_by(*[('-' if descending else '') + name for name, descending in keys])
+            results = list(self._project(ret, only, exclude)[:page_size + 1])
+
+        next_cursor = cursor_after(results[page_size - 1], keys) if len(results) > page_size else None
+        return results[:page_size], next_cursor
+
+    # Run an aggregation pipeline over the valid documents and return its result documents
+    def _aggregate(self, *pipeline):
+        with self.conn():
+            valid = self.dto.objects(self._valid_query())._query
+            result = self.dto._get_collection().aggregate([{'$match': valid}] + list(pipeline))
+            # pymongo before 2.7 returns the whole response rather than a cursor
+            return result['result'] if isinstance(result, dict) else list(result)
+
     # Query to get all valid objects
     def _valid_query(self):
         return Q()
 
+    # Whether the documents keep a search index, see DataAccess.search_index
+    def _has_search_index(self):
+        return 'search_terms' in self.dto._fields
+
+    # Load only some fields of documents, or leave some out. The search index is left out unless asked for.
+    def _project(self, queryset, only=None, exclude=None):
+        if only:
+            return queryset.only(*only)
+        exclude = list(exclude or [])
+        if self._has_search_index():
+            exclude += ['search_words', 'search_terms']
+        return queryset.exclude(*exclude) if exclude else queryset
+
+    # Get a query for the documents whose indexed words contain every word of the search string
+    def _search_query(self, query_string):
+        query = Q()
+        for word in search_index.words([query_string]):
+            query &= Q(search_terms__startswith=word)
+        return query
+
     # Search string fields for text and return list of results
     def _text_search(self, text, fields, **constraints):
         # Search default fields if none given
@@ -248,7 +446,10 @@ class ContactDAO(DAO):
             'last_updated': 0.0,
             'updated_by': 0.0,
             'content_weight': 0.0,
+            'search_words': 0.0,
+            'search_terms': 0.0,
         }
+        self._search_weight_field = 'content_weight'
 
     def _add_contact_ref_to_children(self, contact_dto):
         if contact_dto.organization is not None and contact_dto not in contact_dto.organization.contacts:
@@ -328,6 +529,7 @@ class OrganizationDAO(DAO):
         self._field_weights = {
             'name': 0.1,
             'address': 0.05,
+            'region': 0.0,
             'latlng': 0.05,
             'types': 0.1,
             'phone_numbers': 0.1,
@@ -348,7 +550,10 @@ class OrganizationDAO(DAO):
             'page_rank_weight': 0.0,
             'content_weight': 0.0,
             'combined_weight': 0.0,
+            'search_words': 0.0,
+            'search_terms': 0.0,
         }
+        self._search_weight_field = 'combined_weight'
 
     @decorators.safe_mongocall
     def merge_documents(self, existing_org_dto, new_org_dto):
@@ -497,6 +702,47 @@ class OrganizationDAO(DAO):
         org_dto.content_weight = weight
         org_dto.combined_weight = (org_dto.page_rank_weight + org_dto.content_weight) / 2.0
 
+    @decorators.safe_mongocall
+    def count_by_type(self):
+        """
+        Counts the (valid) organizations of each type, in one aggregation.
+
+        Returns:
+            A dictionary of organization counts by OrgTypesEnum value. Organizations with several types are
+            counted under each.
+        """
+        types = '$' + self.dto._fields['types'].db_field
+        rows = self._aggregate({'$project': {'t': types}}, {'$unwind': '$t'},
+                               {'$group': {'_id': '$t', 'count': {'$sum': 1}}})
+        return dict((row['_id'], row['count']) for row in rows)
+
+    @decorators.safe_mongocall
+    def count_by_contacts(self):
+        """
+        Counts the (valid) organizations by how many contacts they have, in one aggregation.
+
+        Returns:
+            A dictionary of organization counts by number of contacts.
+        """
+        contacts = '$' + self.dto._fields['contacts'].db_field
+        rows = self._aggregate({'$project': {'n': {'$size': {'$ifNull': [contacts, []]}}}},
+                               {'$group': {'_id': '$n', 'count': {'$sum': 1}}})
+        return dict((row['_id'], row['count']) for row in rows)
+
+    @decorators.safe_mongocall
+    def count_by_region(self):
+        """
+        Counts the (valid) organizations in each region, in one aggregation over the region index.
+
+        Returns:
+            A dictionary of organization counts by region code (see Utilities.regions), leaving out regions without
+            organizations.
+        """
+        region = self.dto._fields['region'].db_field
+        rows = self._aggregate({'$match': {region: {'$ne': None}}},
+                               {'$group': {'_id': '$' + region, 'count': {'$sum': 1}}})
+        return dict((row['_id'], row['count']) for row in rows)
+
     # Query getting valid organizations: must be valid and have a valid name
     def _valid_query(self):
         return Q(name__ne=None) & Q(name__ne='')
@@ -656,6 +902,91 @@ class URLMetadataDAO(DAO):
             url_dto.save()
         return url_dto
 
+    @decorators.safe_mongocall
+    def upsert_many(self, url_dtos):
+        """
+        Creates or updates many URL documents in one round trip, keyed on their URLs.
+
+        Each document is merged the same way create_update merges it: the latest last_visited wins and every
+        other field that is set overwrites the stored one. The writes are unordered, so one failing write does
+        not stop the rest. DTOs that fail validation are logged and left out.
+
+        This needs the bulk write API of pymongo 2.7 and the $max operator of MongoDB 2.6.
+
+        Arguments:
+            url_dtos (URLMetadataDTO[]): The DTOs to be created or updated, with at most one DTO per URL.
+
+        Returns:
+            The number of documents written.
+        """
+        updates = []
+        for url_dto in url_dtos:
+            try:
+                url_dto.validate()
+            except ValidationError as e:
+                logger.error('Skipping invalid URL %s: %s' % (url_dto.url, e))
+                continue
+            updates.append(self._upsert_spec(url_dto))
+        if not updates:
+            return 0
+
+        with self.conn():
+            bulk = self.dto._get_collection().initialize_unordered_bulk_op()
+            for query, update in updates:
+                bulk.find(query).upsert().update_one(update)
+            try:
+                bulk.execute()
+            except BulkWriteError as e:
+                failed = len(e.details['writeErrors'])
+                logger.error('Failed to write %d of %d URLs' % (failed, len(updates)))
+                return len(updates) - failed
+        return len(updates)
+
+    @decorators.safe_mongocall
+    def stored_urls(self, urls):
+        """
+        Finds which of some URLs are stored, in one query.
+
+        Arguments:
+            urls (string[]): The URLs to look for.
+
+        Returns:
+            A set of the URLs that are stored.
+        """
+        if not urls:
+            return set()
+
+        with self.conn():
+            return set(url_dto.url for url_dto in self.dto.objects(url__in=list(urls)).only('url'))
+
+    def all_urls(self):
+        """
+        Iterates over every stored URL, reading only the URL of each document.
+
+        Returns:
+            A generator of URL strings.
+        """
+        with self.conn():
+            field = self.dto._fields['url'].db_field
+            for doc in self.dto._get_collection().find({}, {field: True, '_id': False}):
+                if doc.get(field) is not None:
+                    yield doc[field]
+
+    def _upsert_spec(self, url_dto):
+        fields = self.dto._fields
+        url_dto.last_updated = datetime.utcnow()
+        query = {fields['url'].db_field: url_dto.url}
+        to_set = {}
+        update = {'$set': to_set}
+        for key, value in url_dto._data.iteritems():
+            if key in ('id', 'url') or value is None:
+                continue
+            if key == 'last_visited':
+                update['$max'] = {fields[key].db_field: value}
+            else:
+                to_set[fields[key].db_field] = fields[key].to_mongo(value)
+        return query, update
+
     @decorators.safe_mongocall
     def findmany_by_domains(self, num_elements, required_domains, blocked_domains, *sort_fields):
         if len(required_domains) > 0:
@@ -694,7 +1025,10 @@ class UserDAO(DAO):
             'organization': 0.2,
             'last_updated': 0.0,
             'content_weight': 0.0,
+            'search_words': 0.0,
+            'search_terms': 0.0,
         }
+        self._search_weight_field = 'content_weight'
 
     @decorators.safe_mongocall
     def create_update(self, user_dto, cascade_add=True):
@@ -7,9 +7,26 @@
 import mongoengine as mongo
 
 # project imports
+from HTResearch.DataAccess import search_index
 from HTResearch.DataAccess.embedded_dto import *
-from HTResearch.DataModel.enums import AccountType
+from HTResearch.DataModel.enums import AccountType, OrgTypesEnum
 from HTResearch.DataModel.globals import ORG_TYPE_CHOICES
+from HTResearch.Utilities.regions import region_code
+
+
+def _index_meta(*indexes):
+    # Indexes are built by DataAccess.indexes.ensure_indexes, in the background, rather than on first use
+    return {
+        'indexes': list(indexes),
+        'index_background': True,
+        'auto_create_index': False,
+    }
+
+
+def _index_search_text(dto, *values):
+    # Keep the words a document is searched by in step with its text; see DataAccess.search_index
+    dto.search_words = search_index.words(values)
+    dto.search_terms = search_index.index_terms(dto.search_words)
 
 
 class ContactDTO(mongo.Document):
@@ -26,6 +43,13 @@ class ContactDTO(mongo.Document):
     last_updated = mongo.DateTimeField(db_field='lu')
     updated_by = mongo.ObjectIdField(db_field='ub')
     content_weight = mongo.FloatField(min_value=0.0, db_field='c')
+    search_words = mongo.ListField(mongo.StringField(), db_field='sw')
+    search_terms = mongo.ListField(mongo.StringField(), db_field='st')
+
+    meta = _index_meta('email', 'search_terms')
+
+    def clean(self):
+        _index_search_text(self, self.first_name, self.last_name, self.position)
 
 
 class OrganizationDTO(mongo.Document):
@@ -33,6 +57,7 @@ class OrganizationDTO(mongo.Document):
 
     name = mongo.StringField(db_field='n')
     address = mongo.StringField(db_field='a')
+    region = mongo.StringField(db_field='rg')
     latlng = mongo.ListField(db_field='l')
     types = mongo.ListField(mongo.IntField(), db_field='ts')
     phone_numbers = mongo.ListField(db_field='ns')
@@ -53,6 +78,21 @@ class OrganizationDTO(mongo.Document):
     page_rank_weight = mongo.FloatField(min_value=0.0, max_value=1.0, db_field='w')
     content_weight = mongo.FloatField(min_value=0.0, db_field='c')
     combined_weight = mongo.FloatField(min_value=0.0, db_field='cw')
+    search_words = mongo.ListField(mongo.StringField(), db_field='sw')
+    search_terms = mongo.ListField(mongo.StringField(), db_field='st')
+
+    # Every field create_update looks up an existing organization by, the search index, and regions
+    meta = _index_meta('organization_url', 'name', 'phone_numbers', 'emails',
+                       {'fields': ['facebook'], 'sparse': True},
+                       {'fields': ['twitter'], 'sparse': True},
+                       'search_terms', 'region')
+
+    def clean(self):
+        # The region is kept in step with the address, see Utilities.regions
+        self.region = region_code(self.address)
+        type_names = [OrgTypesEnum.reverse_mapping[t] for t in self.types or []
+                      if t in OrgTypesEnum.reverse_mapping]
+        _index_search_text(self, self.name, self.keywords, self.address, *type_names)
 
 
 class PublicationDTO(mongo.Document):
@@ -67,6 +107,13 @@ class PublicationDTO(mongo.Document):
     valid = mongo.BooleanField(db_field='v', default=True)
     last_updated = mongo.DateTimeField(db_field='lu')
     updated_by = mongo.ObjectIdField(db_field='ub')
+    search_words = mongo.ListField(mongo.StringField(), db_field='sw')
+    search_terms = mongo.ListField(mongo.StringField(), db_field='st')
+
+    meta = _index_meta('title', 'search_terms')
+
+    def clean(self):
+        _index_search_text(self, self.title, self.authors)
 
 
 class URLMetadataDTO(mongo.Document):
@@ -80,6 +127,9 @@ class URLMetadataDTO(mongo.Document):
     checksum = mongo.BinaryField(db_field='c')
     last_updated = mongo.DateTimeField(db_field='lu')
 
+    # Lookups by URL, and the frontier's fills, which filter on domain and sort on last_visited
+    meta = _index_meta('url', 'last_visited', ('domain', 'last_visited'))
+
 
 class UserDTO(mongo.Document):
     """A DTO wrapper for User documents"""
@@ -95,3 +145,10 @@ class UserDTO(mongo.Document):
     organization = mongo.ReferenceField(OrganizationDTO, db_field='o')
     last_updated = mongo.DateTimeField(db_field='lu')
     content_weight = mongo.FloatField(min_value=0.0, db_field='c')
+    search_words = mongo.ListField(mongo.StringField(), db_field='sw')
+    search_terms = mongo.ListField(mongo.StringField(), db_field='st')
+
+    meta = _index_meta('email', 'search_terms')
+
+    def clean(self):
+        _index_search_text(self, self.first_name, self.last_name, self.email, self.background)
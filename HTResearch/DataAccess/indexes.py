@@ -0,0 +1,94 @@
+#
+# indexes.py
+# A module for building the indexes declared on the DTOs and comparing them with the ones in the database.
+#
+
+# project imports
+from HTResearch.DataAccess.dto import *
+from HTResearch.DataAccess.connection import DBConnection
+from HTResearch.Utilities.logutil import LoggingSection, get_logger
+
+#region Globals
+logger = get_logger(LoggingSection.DATA, __name__)
+# Every DTO with a collection of its own
+INDEXED_DTOS = [ContactDTO, OrganizationDTO, PublicationDTO, URLMetadataDTO, UserDTO]
+#endregion
+
+
+def declared_indexes(dto):
+    """
+    Finds the indexes declared in a DTO's meta.
+
+    Arguments:
+        dto (type): The DTO class.
+
+    Returns:
+        A list of index keys, each a tuple of (db field, direction) pairs.
+    """
+    return [_index_key(spec['fields']) for spec in dto._meta.get('index_specs', [])]
+
+
+def existing_indexes(dto):
+    """
+    Finds the indexes on a DTO's collection, leaving out the one on _id.
+
+    Arguments:
+        dto (type): The DTO class.
+
+    Returns:
+        A list of index keys, each a tuple of (db field, direction) pairs.
+    """
+    with DBConnection():
+        info = dto._get_collection().index_information()
+    return [_index_key(index['key']) for name, index in info.iteritems() if name != '_id_']
+
+
+def index_report(dtos=INDEXED_DTOS):
+    """
+    Compares the indexes declared on DTOs with the ones on their collections.
+
+    Arguments:
+        dtos (type[]): The DTO classes to compare.
+
+    Returns:
+        A list with a dictionary for each DTO of its collection, and its declared, missing and undeclared
+        index keys. Missing indexes are declared but not built, and undeclared ones are built but not declared.
+    """
+    report = []
+    for dto in dtos:
+        declared = declared_indexes(dto)
+        existing = existing_indexes(dto)
+        report.append({
+            'collection': dto._get_collection_name(),
+            'declared': declared,
+            'missing': [key for key in declared if key not in existing],
+            'undeclared': [key for key in existing if key not in declared],
+        })
+    return report
+
+
+def ensure_indexes(dtos=INDEXED_DTOS):
+    """
+    Builds any declared index that is missing from its collection. Indexes are built in the background, so
+    this returns before a large collection is done being indexed.
+
+    Arguments:
+        dtos (type[]): The DTO classes to build indexes for.
+
+    Returns:
+        The index report from before the indexes were built.
+    """
+    report = index_report(dtos)
+    for dto, entry in zip(dtos, report):
+        if not entry['missing']:
+            continue
+        logger.info('Building %d indexes on %s' % (len(entry['missing']), entry['collection']))
+        with DBConnection():
+            dto.ensure_indexes()
+    return report
+
+
+def _index_key(fields):
+    # Older servers report directions as floats
+    return tuple((field, int(direction) if isinstance(direction, float) else direction)
+                 for field, direction in fields)
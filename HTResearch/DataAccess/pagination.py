@@ -0,0 +1,132 @@
+#
+# pagination.py
+# A module for paging through query results with cursors rather than skips.
+#
+
+# stdlib imports
+import base64
+from datetime import datetime
+import json
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from mongoengine import Q
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token was not made by encode_cursor."""
+    pass
+
+
+def encode_cursor(values):
+    """
+    Makes an opaque cursor token.
+
+    Arguments:
+        values (object[]): The values the cursor holds. Strings, numbers, datetimes, ObjectIds and None are kept.
+
+    Returns:
+        A URL-safe string.
+    """
+    return base64.urlsafe_b64encode(json.dumps([_encode_value(v) for v in values], separators=(',', ':')))
+
+
+def decode_cursor(token):
+    """
+    Reads the values out of a cursor token made by encode_cursor.
+
+    Arguments:
+        token (string): The cursor token.
+
+    Returns:
+        The list of values the cursor holds.
+    """
+    try:
+        return [_decode_value(v) for v in json.loads(base64.urlsafe_b64decode(str(token)))]
+    except (TypeError, ValueError, KeyError, InvalidId) as e:
+        raise InvalidCursorError('Invalid cursor: %s' % e)
+
+
+def sort_keys(sort_fields):
+    """
+    Finds the keys a keyset page is sorted by: the sort fields followed by the id, which breaks ties.
+
+    Arguments:
+        sort_fields (string[]): The mongoengine sort fields, such as '-combined_weight' or 'name'.
+
+    Returns:
+        A list of (field name, descending) pairs.
+    """
+    keys = []
+    for sort_field in sort_fields or []:
+        descending = sort_field.startswith('-')
+        keys.append((sort_field.lstrip('+-'), descending))
+    if 'id' not in [name for name, descending in keys]:
+        keys.append(('id', False))
+    return keys
+
+
+def cursor_after(dto, keys):
+    """
+    Makes the cursor for the page that follows a document.
+
+    Arguments:
+        dto (DTO): The last document of a page.
+        keys (list): The sort keys from sort_keys.
+
+    Returns:
+        A cursor token.
+    """
+    return encode_cursor([getattr(dto, name) for name, descending in keys])
+
+
+def after_query(keys, values):
+    """
+    Builds a query for the documents that sort after the ones a cursor was made from, so a page starts where the
+    last one ended without skipping over the documents before it.
+
+    Arguments:
+        keys (list): The sort keys from sort_keys.
+        values (object[]): The values decoded from the cursor.
+
+    Returns:
+        A Q object.
+    """
+    if len(keys) != len(values):
+        raise InvalidCursorError('The cursor does not match the sort fields')
+
+    # (k1 after v1) or (k1 = v1 and k2 after v2) or ...
+    query = None
+    equal = Q()
+    for (name, descending), value in zip(keys, values):
+        after = _after(name, descending, value)
+        if after is not None:
+            clause = equal & after
+            query = clause if query is None else query | clause
+        equal &= Q(**{name: value})
+    return query if query is not None else Q(id__in=[])
+
+
+def _after(name, descending, value):
+    # Mongo only compares values of the same type, and sorts nulls first
+    if value is None:
+        return None if descending else Q(**{'%s__ne' % name: None})
+    if descending:
+        return Q(**{'%s__lt' % name: value}) | Q(**{name: None})
+    return Q(**{'%s__gt' % name: value})
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'d': value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {'o': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'd' in value:
+            fmt = '%Y-%m-%dT%H:%M:%S.%f' if '.' in value['d'] else '%Y-%m-%dT%H:%M:%S'
+            return datetime.strptime(value['d'], fmt)
+        return ObjectId(value['o'])
+    return value
@@ -0,0 +1,82 @@
+#
+# search_index.py
+# A module for indexing the text of documents so they can be searched without scanning their collections.
+#
+
+# stdlib imports
+import re
+
+#region Globals
+_WORD = re.compile(r'\w+', re.UNICODE)
+# Longer "words" are mostly URLs and run-together text, and every extra letter is another indexed suffix
+MAX_WORD_LENGTH = 40
+#endregion
+
+
+def words(values):
+    """
+    Splits text into words.
+
+    Arguments:
+        values (object[]): The text to split. Values that are not strings are converted to strings, and empty
+            values are skipped.
+
+    Returns:
+        A sorted list of the distinct lowercase words in the text.
+    """
+    found = set()
+    for value in values:
+        if not value:
+            continue
+        if not isinstance(value, basestring):
+            value = unicode(value)
+        found.update(word[:MAX_WORD_LENGTH] for word in _WORD.findall(value.lower()))
+    return sorted(found)
+
+
+def index_terms(doc_words):
+    """
+    Finds the terms to index a document by: every suffix of every one of its words. A search term is somewhere
+    in a word exactly when it is a prefix of one of the word's suffixes, so an index over these terms can answer
+    substring searches with prefix scans.
+
+    Arguments:
+        doc_words (string[]): The document's words.
+
+    Returns:
+        A sorted list of the distinct index terms.
+    """
+    terms = set()
+    for word in doc_words:
+        for i in xrange(len(word)):
+            terms.add(word[i:])
+    return sorted(terms)
+
+
+def relevance(query_words, doc_words):
+    """
+    Scores how well a document matches a search.
+
+    Each search word scores 1 if it is one of the document's words, 0.75 if it starts one, 0.5 if it is inside
+    one, and 0 otherwise.
+
+    Arguments:
+        query_words (string[]): The words searched for.
+        doc_words (string[]): The document's words.
+
+    Returns:
+        The average score of the search words, from 0 to 1.
+    """
+    if not query_words:
+        return 0.0
+    doc_words = doc_words or []
+    word_set = set(doc_words)
+    total = 0.0
+    for query_word in query_words:
+        if query_word in word_set:
+            total += 1.0
+        elif any(word.startswith(query_word) for word in doc_words):
+            total += 0.75
+        elif any(query_word in word for word in doc_words):
+            total += 0.5
+    return total / len(query_words)
@@ -11,4 +11,4 @@ ORG_TYPE_CHOICES = ((OrgTypesEnum.GOVERNMENT, 'Government'),
                     (OrgTypesEnum.EDUCATION, 'Education'),
                     (OrgTypesEnum.ADVOCACY, 'Advocacy'),
                     (OrgTypesEnum.RESEARCH, 'Research'),
-                    (OrgTypesEnum.NGO, "NGO"))
\ No newline at end of file
+                    (OrgTypesEnum.NGO, "NGO"))
@@ -0,0 +1,58 @@
+# stdlib imports
+import unittest
+
+# project imports
+from HTResearch.DataAccess import connection
+from HTResearch.DataAccess.connection import ConnectionPool
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        # Count the calls to mongoengine rather than talk to a database
+        self.calls = []
+        self._originals = connection.connect, connection.disconnect, connection.get_connection
+        connection.connect = lambda **settings: self.calls.append(('connect', settings))
+        connection.disconnect = lambda: self.calls.append(('disconnect',))
+        connection.get_connection = lambda: 'client'
+        self.pool = ConnectionPool()
+        self.pool._settings = {'host': 'localhost', 'port': 27017, 'db': 'ht_test', 'max_pool_size': 10}
+
+    def tearDown(self):
+        connection.connect, connection.disconnect, connection.get_connection = self._originals
+
+    def test_connect_once(self):
+        for i in range(3):
+            self.assertEqual('client', self.pool.acquire())
+        self.pool.release()
+        self.assertEqual(['disconnect', 'connect'], [call[0] for call in self.calls])
+
+        stats = self.pool.stats()
+        self.assertEqual(1, stats['connects'])
+        self.assertEqual(3, stats['checkouts'])
+        self.assertEqual(2, stats['active'])
+        self.assertEqual(10, stats['max_pool_size'])
+
+    def test_reconnect_after_fork(self):
+        self.pool.acquire()
+        # Pretend the pool was inherited from a parent process
+        self.pool._pid = -1
+        self.pool.acquire()
+        self.assertEqual(2, self.pool.stats()['connects'])
+        self.assertEqual(1, self.pool.stats()['active'])
+
+    def test_reconnect_after_disconnect(self):
+        self.pool.acquire()
+
+        # Pretend someone else called mongoengine's disconnect()
+        def get_connection():
+            connection.get_connection = lambda: 'client'
+            raise connection.ConnectionError('You have not defined a default connection')
+        connection.get_connection = get_connection
+
+        self.assertEqual('client', self.pool.acquire())
+        self.assertEqual(2, self.pool.stats()['connects'])
+        self.assertEqual(2, self.pool.stats()['active'])
+
+
+if __name__ == '__main__':
+    unittest.main()
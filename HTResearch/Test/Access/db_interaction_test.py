@@ -4,6 +4,8 @@ from springpython.context import ApplicationContext
 from springpython.config import Object
 
 # project imports
+from HTResearch.DataAccess.dao import reference_ids
+from HTResearch.DataAccess.pagination import InvalidCursorError, encode_cursor
 from HTResearch.DataModel.model import *
 from HTResearch.Utilities.converter import DTOConverter
 from HTResearch.Utilities.context import DAOContext
@@ -130,6 +132,13 @@ class DatabaseInteractionTest(unittest.TestCase):
         self.assertEqual(assert_contact.last_name, contact_dto.last_name)
         self.assertEqual(assert_contact.email, contact_dto.email)
 
+        print 'Testing contact reference lookup ...'
+        assert_contacts = contact_dao.find_references([contact_dto.to_dbref(), contact_dto.id, None],
+                                                      only=['first_name'])
+        self.assertEqual(assert_contacts.keys(), [contact_dto.id])
+        self.assertEqual(assert_contacts[contact_dto.id].first_name, contact_dto.first_name)
+        self.assertIsNone(assert_contacts[contact_dto.id].email)
+
         print 'Testing contact text search ...'
 
         assert_contacts = contact_dao.findmany(search='jordan degner',
@@ -204,6 +213,22 @@ class DatabaseInteractionTest(unittest.TestCase):
         self.assertEqual(assert_org.twitter, org_dto.twitter)
         self._compare_page_rank_info(assert_org, org_dto)
 
+        print 'Testing organization breakdowns ...'
+        self.assertEqual({OrgTypesEnum.RELIGIOUS: 1, OrgTypesEnum.GOVERNMENT: 1, OrgTypesEnum.PROSECUTION: 1},
+                         org_dao.count_by_type())
+        self.assertEqual(1, sum(org_dao.count_by_contacts().values()))
+
+        print 'Testing organization projection ...'
+        assert_org = org_dao.find(id=org_dto.id, only=['name', 'types'])
+        self.assertEqual(assert_org.name, org_dto.name)
+        self.assertEqual(assert_org.types, org_dto.types)
+        self.assertIsNone(assert_org.page_rank_info)
+        self.assertIsNone(assert_org.address)
+
+        assert_orgs = org_dao.findmany(search='yee', num_elements=10, exclude=['page_rank_info'])
+        self.assertEqual(assert_orgs[0].address, org_dto.address)
+        self.assertIsNone(assert_orgs[0].page_rank_info)
+
         print 'Testing organization text search ...'
 
         assert_orgs = org_dao.findmany(search='YeE university ers Religious govern secUTION ISFP Yeesy',
@@ -244,6 +269,32 @@ class DatabaseInteractionTest(unittest.TestCase):
 
         print 'OrganizationDAO tests passed'
 
+    def test_organization_regions(self):
+        org_dao = self.ctx.get_object("OrganizationDAO")
+        org_dao.create_update(DTOConverter.to_dto(OrganizationDTO, self.organization))
+        with MockDBConnection():
+            OrganizationDTO(name='Yee Mumbai', address='12 Hill Road, Bandra West, Mumbai, Maharashtra 400050').save()
+            OrganizationDTO(address='Colaba, Mumbai, Maharashtra 400005').save()
+
+        # The Omaha address has no region, and organizations without names are not counted
+        self.assertEqual({'MH': 1}, org_dao.count_by_region())
+
+    def test_organization_references(self):
+        org_dao = self.ctx.get_object("OrganizationDAO")
+        with MockDBConnection():
+            partner_dto = OrganizationDTO(name='Yee Partners').save()
+            nameless_dto = OrganizationDTO(organization_url='http://nameless.org/').save()
+            org_dto = OrganizationDTO(name='Yee University', partners=[nameless_dto, partner_dto]).save()
+
+        assert_org = org_dao.find(id=org_dto.id)
+        partner_ids = reference_ids(assert_org, 'partners')
+        self.assertEqual([nameless_dto.id, partner_dto.id], partner_ids)
+
+        # Partners without names are not valid organizations
+        partners = org_dao.find_references(partner_ids, only=['name'])
+        self.assertEqual([partner_dto.id], partners.keys())
+        self.assertEqual('Yee Partners', partners[partner_dto.id].name)
+
     def test_organization_dao_field_weights(self):
         print "Checking OrganizationDAO._field_weights for consistency with OrganizationDTO"
         org_dto = DTOConverter.to_dto(OrganizationDTO, self.organization)
@@ -302,6 +353,30 @@ class DatabaseInteractionTest(unittest.TestCase):
 
         print 'PublicationDAO tests passed'
 
+    def test_search_paging_past_cap(self):
+        pub_dao = self.ctx.get_object("PublicationDAO")
+        for i in range(5):
+            pub_dao.create_update(DTOConverter.to_dto(PublicationDTO, Publication(title='Yee Report %d' % i)))
+
+        print 'Testing that search counts and pages agree past the candidate cap ...'
+        pub_dao._max_search_candidates = 3
+        self.assertEqual(3, pub_dao.count(search='yee report'))
+        self.assertEqual(2, len(pub_dao.findmany(search='yee report', page_size=2, page=0)))
+        self.assertEqual(1, len(pub_dao.findmany(search='yee report', page_size=2, page=1)))
+        self.assertEqual(0, len(pub_dao.findmany(search='yee report', page_size=2, page=2)))
+
+        # Searching by fields isn't ranked, so it isn't capped
+        self.assertEqual(5, len(pub_dao.findmany(search='yee', search_fields=['title', ])))
+
+        print 'Testing search cursors ...'
+        first, next_cursor = pub_dao.findmany(search='yee report', page_size=2, cursor='')
+        second, next_cursor = pub_dao.findmany(search='yee report', page_size=2, cursor=next_cursor)
+        self.assertEqual(2, len(first))
+        self.assertEqual(1, len(second))
+        self.assertIsNone(next_cursor)
+        self.assertRaises(InvalidCursorError, pub_dao.findmany, search='yee report', page_size=2,
+                          cursor=encode_cursor([]))
+
     def test_urlmetadata_dao(self):
         url_dto = DTOConverter.to_dto(URLMetadataDTO, self.urlmetadata)
         url_dao = self.ctx.get_object("URLMetadataDAO")
@@ -0,0 +1,49 @@
+# stdlib imports
+import unittest
+
+# project imports
+from HTResearch.DataAccess import indexes
+from HTResearch.DataAccess.dto import URLMetadataDTO
+
+
+class FakeConnection(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ext, exv, trb):
+        pass
+
+
+class FakeCollection(object):
+    def index_information(self):
+        return {
+            '_id_': {'key': [('_id', 1)]},
+            'u_1': {'key': [('u', 1.0)]},
+            's_1': {'key': [('s', 1)]},
+        }
+
+
+class IndexReportTest(unittest.TestCase):
+    def setUp(self):
+        # Report on a made up collection rather than a database
+        self._connection = indexes.DBConnection
+        self._get_collection = URLMetadataDTO._get_collection
+        indexes.DBConnection = FakeConnection
+        URLMetadataDTO._get_collection = classmethod(lambda cls: FakeCollection())
+
+    def tearDown(self):
+        indexes.DBConnection = self._connection
+        URLMetadataDTO._get_collection = self._get_collection
+
+    def test_declared_indexes(self):
+        self.assertEqual([(('u', 1),), (('v', 1),), (('d', 1), ('v', 1))],
+                         indexes.declared_indexes(URLMetadataDTO))
+
+    def test_index_report(self):
+        entry = indexes.index_report([URLMetadataDTO])[0]
+        self.assertEqual([(('v', 1),), (('d', 1), ('v', 1))], entry['missing'])
+        self.assertEqual([(('s', 1),)], entry['undeclared'])
+
+
+if __name__ == '__main__':
+    unittest.main()
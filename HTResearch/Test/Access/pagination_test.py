@@ -0,0 +1,90 @@
+# stdlib imports
+from bson.objectid import ObjectId
+from datetime import datetime
+from mongoengine import Q
+import unittest
+
+# project imports
+from HTResearch.DataAccess.dto import OrganizationDTO
+from HTResearch.DataAccess.pagination import *
+from HTResearch.Test.Mocks.connection import MockDBConnection
+
+
+class PaginationTest(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        values = [0.25, u'Yee University', datetime(2013, 11, 5, 8, 30, 15, 250), None, ObjectId()]
+        cursor = encode_cursor(values)
+
+        self.assertEqual(values, decode_cursor(cursor))
+        self.assertNotIn('=', cursor.rstrip('='))
+
+    def test_invalid_cursor(self):
+        self.assertRaises(InvalidCursorError, decode_cursor, 'not a cursor')
+        self.assertRaises(InvalidCursorError, decode_cursor, encode_cursor([{'o': 'bad id'}]))
+        self.assertRaises(InvalidCursorError, after_query, sort_keys(['name']), [u'Yee University'])
+
+    def test_sort_keys(self):
+        self.assertEqual([('combined_weight', True), ('name', False), ('id', False)],
+                         sort_keys(['-combined_weight', '+name']))
+        self.assertEqual([('id', False)], sort_keys(None))
+        self.assertEqual([('id', True)], sort_keys(['-id']))
+
+
+class KeysetPageTest(unittest.TestCase):
+    def setUp(self):
+        # Ties, and documents with no weight, which mongo sorts first
+        weights = [0.5, None, 0.5, 0.9, 0.5, None, 0.1]
+        with MockDBConnection() as db:
+            db.dropall()
+            for i, weight in enumerate(weights):
+                OrganizationDTO(name='org%d' % i, combined_weight=weight).save()
+
+    def tearDown(self):
+        with MockDBConnection() as db:
+            db.dropall()
+
+    def _walk(self, sort_fields, page_size):
+        # Page through every organization with after_query, the way the DAOs do
+        keys = sort_keys(sort_fields)
+        order = [('-' if descending else '') + name for name, descending in keys]
+        names = []
+        cursor = None
+        with MockDBConnection():
+            while True:
+                query = after_query(keys, decode_cursor(cursor)) if cursor else Q()
+                page = list(OrganizationDTO.objects(query).order_by(*order)[:page_size])
+                names += [org.name for org in page]
+                if len(page) < page_size:
+                    return names
+                cursor = cursor_after(page[-1], keys)
+
+    def _sorted(self, sort_fields):
+        order = [('-' if descending else '') + name for name, descending in sort_keys(sort_fields)]
+        with MockDBConnection():
+            return [org.name for org in OrganizationDTO.objects.order_by(*order)]
+
+    def test_ascending(self):
+        expected = self._sorted(['combined_weight'])
+        self.assertEqual(['org1', 'org5'], sorted(expected[:2]))
+        for page_size in (1, 2, 3):
+            self.assertEqual(expected, self._walk(['combined_weight'], page_size))
+
+    def test_descending(self):
+        expected = self._sorted(['-combined_weight'])
+        self.assertEqual(['org3'], expected[:1])
+        self.assertEqual(['org1', 'org5'], sorted(expected[-2:]))
+        for page_size in (1, 2, 3):
+            self.assertEqual(expected, self._walk(['-combined_weight'], page_size))
+
+    def test_several_keys(self):
+        expected = self._sorted(['-combined_weight', 'name'])
+        self.assertEqual(['org3', 'org0', 'org2', 'org4', 'org6', 'org1', 'org5'], expected)
+        self.assertEqual(expected, self._walk(['-combined_weight', 'name'], 2))
+        self.assertEqual(expected[::-1], self._walk(['combined_weight', '-name'], 2))
+
+    def test_descending_id(self):
+        self.assertEqual(self._sorted(['-id']), self._walk(['-id'], 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
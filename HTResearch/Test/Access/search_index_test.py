@@ -0,0 +1,33 @@
+# stdlib imports
+import unittest
+
+# project imports
+from HTResearch.DataAccess import search_index
+
+
+class SearchIndexTest(unittest.TestCase):
+    def test_words(self):
+        self.assertEqual(['5124', 'ne', 'omaha', 'street', 'yeesy'],
+                         search_index.words(['5124 Yeesy Street', None, 'Omaha, NE', '']))
+        self.assertEqual(['7', 'gmail', 'jdegner'], search_index.words(['jdegner@gmail', 7]))
+
+    def test_index_terms(self):
+        terms = search_index.index_terms(['yee', 'university'])
+        self.assertIn('university', terms)
+        self.assertIn('ersity', terms)
+        self.assertIn('ee', terms)
+        self.assertNotIn('univ', terms)
+        # Every word containing a search word has a term the search word starts
+        self.assertTrue(any(term.startswith('ers') for term in terms))
+
+    def test_relevance(self):
+        doc_words = ['book', 'of', 'the', 'yee']
+        self.assertEqual(1.0, search_index.relevance(['book', 'yee'], doc_words))
+        self.assertEqual(0.75, search_index.relevance(['boo'], doc_words))
+        self.assertEqual(0.5, search_index.relevance(['ook'], doc_words))
+        self.assertEqual(0.5, search_index.relevance(['book', 'mee'], doc_words))
+        self.assertEqual(0.0, search_index.relevance([], doc_words))
+
+
+if __name__ == '__main__':
+    unittest.main()
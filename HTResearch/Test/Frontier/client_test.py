@@ -0,0 +1,59 @@
+# stdlib imports
+import unittest
+from twisted.internet.defer import succeed
+
+# project imports
+from HTResearch.DataModel.model import URLMetadata
+from HTResearch.URLFrontier import client
+from HTResearch.URLFrontier.client import URLFrontierClient
+
+
+class StubFrontier(object):
+    def __init__(self, count):
+        self.urls = [URLMetadata(url='http://test%d.com' % i) for i in range(count)]
+        self.requests = 0
+
+    def next_urls(self, count, rules, timeout):
+        self.requests += 1
+        urls, self.urls = self.urls[:count], self.urls[count:]
+        return urls
+
+
+class URLFrontierClientTest(unittest.TestCase):
+    def setUp(self):
+        # Run the frontier's calls right away instead of on the reactor's thread pool
+        self._defer_to_thread = client.threads.deferToThread
+        client.threads.deferToThread = lambda f, *args: succeed(f(*args))
+
+    def tearDown(self):
+        client.threads.deferToThread = self._defer_to_thread
+
+    def test_next_urls(self):
+        frontier = StubFrontier(25)
+        url_client = URLFrontierClient(frontier, batch_size=10, low_watermark=5)
+
+        results = []
+        url_client.next_urls(3).addCallback(results.append)
+        self.assertEqual(['http://test0.com', 'http://test1.com', 'http://test2.com'],
+                         [u.url for u in results[0]])
+        self.assertEqual(7, len(url_client))
+        self.assertEqual(1, frontier.requests)
+
+        # Dropping to the low watermark prefetches the next batch
+        url_client.next_urls(2).addCallback(results.append)
+        self.assertEqual(2, frontier.requests)
+        self.assertEqual(15, len(url_client))
+
+        self.assertEqual('http://test5.com', url_client.next_url_nowait().url)
+
+    def test_empty_frontier(self):
+        url_client = URLFrontierClient(StubFrontier(0))
+
+        results = []
+        url_client.next_url().addCallback(results.append)
+        self.assertEqual([None], results)
+        self.assertIsNone(url_client.next_url_nowait())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# stdlib imports
+import unittest
+
+# project imports
+from HTResearch.URLFrontier.politeness import DomainScheduler
+
+
+class DomainSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = DomainScheduler(delay=2.0)
+        for url, domain in [('a.com/1', 'a.com'), ('a.com/2', 'a.com'), ('a.com/3', 'a.com'),
+                            ('b.com/1', 'b.com'), ('c.com/1', 'c.com')]:
+            self.scheduler.add(url, domain)
+
+    def test_round_robin(self):
+        # Only one URL per domain is handed out at a time
+        self.assertEqual(['a.com/1', 'b.com/1', 'c.com/1'], self.scheduler.next_ready(10, now=0))
+        self.assertEqual(2, len(self.scheduler))
+        self.assertEqual(1, self.scheduler.domain_count)
+
+        # Domains that were already waiting come before one that was just handed out
+        self.scheduler.add('d.com/1', 'd.com')
+        self.assertEqual(['d.com/1'], self.scheduler.next_ready(10, now=1))
+
+    def test_delay(self):
+        self.scheduler.next_ready(10, now=0)
+        self.assertEqual([], self.scheduler.next_ready(10, now=1.5))
+        self.assertEqual(0.5, self.scheduler.wait_time(now=1.5))
+        self.assertEqual(['a.com/2'], self.scheduler.next_ready(10, now=2))
+        self.assertEqual(['a.com/3'], self.scheduler.next_ready(10, now=4))
+        self.assertIsNone(self.scheduler.wait_time(now=4))
+
+        # A domain that comes back still waits out its delay
+        self.scheduler.add('a.com/4', 'a.com')
+        self.assertEqual([], self.scheduler.next_ready(10, now=5))
+        self.assertEqual(['a.com/4'], self.scheduler.next_ready(10, now=6))
+
+    def test_queued(self):
+        self.assertEqual(3, self.scheduler.queued('a.com'))
+        self.scheduler.next_ready(10, now=0)
+        self.assertEqual(2, self.scheduler.queued('a.com'))
+        self.assertEqual(0, self.scheduler.queued('b.com'))
+
+    def test_count(self):
+        self.assertEqual(['a.com/1', 'b.com/1'], self.scheduler.next_ready(2, now=0))
+        self.assertEqual(['c.com/1'], self.scheduler.next_ready(2, now=0))
+
+    def test_clear(self):
+        self.scheduler.next_ready(1, now=0)
+        self.scheduler.clear()
+        self.assertEqual(0, len(self.scheduler))
+        self.scheduler.add('a.com/5', 'a.com')
+        self.assertEqual([], self.scheduler.next_ready(10, now=1))
+        self.assertEqual(['a.com/5'], self.scheduler.next_ready(10, now=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# stdlib imports
+import unittest
+from datetime import datetime
+
+# project imports
+from HTResearch.DataModel.model import URLMetadata
+from HTResearch.WebCrawler.WebCrawler.item_pipeline.url_buffer import URLMetadataBuffer
+
+
+class StubFrontier(object):
+    def __init__(self):
+        self.batches = []
+
+    def put_urls(self, urls):
+        self.batches.append(urls)
+
+
+class URLMetadataBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.frontier = StubFrontier()
+        self.buffer = URLMetadataBuffer(self.frontier, max_size=3, max_age=5, clock=lambda: self.now)
+
+    def test_coalesce(self):
+        self.buffer.add(URLMetadata(url='http://a.com', domain='a.com', last_visited=datetime(1, 1, 1)))
+        self.buffer.add(URLMetadata(url='http://a.com', last_visited=datetime(2014, 3, 1), update_freq=2))
+        self.buffer.add(URLMetadata(url='http://a.com', last_visited=datetime(1, 1, 1)))
+        self.assertEqual(1, len(self.buffer))
+
+        self.buffer.flush()
+        url = self.frontier.batches[0][0]
+        self.assertEqual('a.com', url.domain)
+        self.assertEqual(datetime(2014, 3, 1), url.last_visited)
+        self.assertEqual(2, url.update_freq)
+        self.assertEqual(0, len(self.buffer))
+
+    def test_flush_when_full(self):
+        for i in range(4):
+            self.buffer.add(URLMetadata(url='http://test%d.com' % i))
+        self.assertEqual(1, len(self.frontier.batches))
+        self.assertEqual(['http://test0.com', 'http://test1.com', 'http://test2.com'],
+                         [u.url for u in self.frontier.batches[0]])
+        self.assertEqual(1, len(self.buffer))
+
+    def test_flush_when_old(self):
+        self.buffer.add(URLMetadata(url='http://test0.com'))
+        self.now = 4
+        self.assertFalse(self.buffer.due)
+        self.now = 5
+        self.assertTrue(self.buffer.due)
+        self.buffer.add(URLMetadata(url='http://test1.com'))
+        self.assertEqual(1, len(self.frontier.batches))
+        self.assertFalse(self.buffer.due)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+from mongoengine import ValidationError
+
 from HTResearch.DataAccess.dto import *
 from connection import MockDBConnection
 
@@ -157,6 +159,30 @@ class MockURLMetadataDAO(MockDAO):
             url_dto.save()
         return url_dto
 
+    def upsert_many(self, url_dtos):
+        written = 0
+        with self.conn():
+            for url_dto in url_dtos:
+                try:
+                    url_dto.validate()
+                except ValidationError:
+                    continue
+                existing_dto = self.dto.objects(url=url_dto.url).first()
+                if existing_dto is not None:
+                    url_dto.id = existing_dto.id
+                url_dto.save()
+                written += 1
+        return written
+
+    def stored_urls(self, urls):
+        with self.conn():
+            return set(url_dto.url for url_dto in self.dto.objects(url__in=list(urls)))
+
+    def all_urls(self):
+        with self.conn():
+            for url_dto in self.dto.objects():
+                yield url_dto.url
+
 
 class MockUserDAO(MockDAO):
     def __init__(self):
@@ -1,14 +1,19 @@
 import unittest
 import pickle
+import string
 
 from springpython.context import ApplicationContext
 from springpython.config import Object
+from scrapy.http import HtmlResponse
 
 from HTResearch.Test.Mocks.utility_scrapers import *
 from HTResearch.Utilities.context import DocumentScraperContext, UtilityScraperContext, UrlMetadataScraperContext,\
     DAOContext
 from HTResearch.WebCrawler.WebCrawler.scrapers.document_scrapers import *
 from HTResearch.WebCrawler.WebCrawler.scrapers.link_scraper import PageRankScraper
+from HTResearch.WebCrawler.WebCrawler.scrapers.contact_info import *
+from HTResearch.WebCrawler.WebCrawler.scrapers.parsed_page import ParsedPage
+from HTResearch.WebCrawler.WebCrawler.scrapers.tokenizer import tokenize
 from HTResearch.DataAccess.dto import URLMetadataDTO
 from HTResearch.DataModel.model import URLMetadata
 from HTResearch.Utilities.converter import DTOConverter
@@ -484,6 +489,23 @@ class ScraperTests(unittest.TestCase):
         for test in assert_list:
             self.assertIn(test, types, 'Type \'' + OrgTypesEnum.reverse_mapping[test] + '\' not found')
 
+    def test_org_type_classify(self):
+        org_type_scraper = OrgTypeScraper()
+
+        # Stored keyword strings can be classified without fetching their pages
+        types = org_type_scraper.classify_many([
+            ('research school rescue', 'example.org/'),
+            ('church teach', 'http://example.org/'),
+            ('data', 'www.nsa.gov/'),
+        ])
+        self.assertEqual([[OrgTypesEnum.RESEARCH, OrgTypesEnum.EDUCATION, OrgTypesEnum.PROTECTION],
+                          [OrgTypesEnum.RELIGIOUS, OrgTypesEnum.EDUCATION, OrgTypesEnum.PREVENTION],
+                          [OrgTypesEnum.GOVERNMENT, OrgTypesEnum.RESEARCH, OrgTypesEnum.PREVENTION]], types)
+
+        # With three types and none of them P's, the last is replaced by prevention
+        self.assertEqual([OrgTypesEnum.EDUCATION, OrgTypesEnum.ADVOCACY, OrgTypesEnum.PREVENTION],
+                         org_type_scraper.classify(['school', 'policy', 'research']))
+
     def test_org_partners_scraper(self):
         test_files = [
             "httpwwwhalftheskymovementorgpartners",
@@ -716,12 +738,14 @@ class ScraperTests(unittest.TestCase):
                     },
                 ]
             },
-            None
         ]
 
         for test in assert_list:
             self.assertIn(test, infos, "URL " + str(test) + " was not found")
 
+        # Poorly formatted pages still produce page rank info
+        self.assertNotIn(None, infos)
+
     def test_contact_scraper(self):
         ctx = ApplicationContext(TestableDocumentScraperContext())
 
@@ -753,6 +777,46 @@ class ScraperTests(unittest.TestCase):
         for test in assert_list:
             self.assertIn(test, contacts, 'Contact \'' + str(test) + '\' not found')
 
+    def test_contact_info_scanner(self):
+        scanner = ContactInfoScanner()
+        text = u'mailto:john@example.org\nbob(at)example(dot)in\n022-23456789\nTel (402) 555-1234\n9876543210'
+
+        infos = [(info.kind, info.value) for info in scanner.scan(text)]
+        self.assertEqual([(EMAIL, 'john@example.org'),
+                          (OBFUSCATED_EMAIL, 'bob@example.in'),
+                          (INDIA_PHONE, '02223456789'),
+                          (US_PHONE, '4025551234'),
+                          (INDIA_PHONE, '9876543210'),
+                          (US_PHONE, '9876543210')], infos)
+
+        # Numbers should not be run together across lines
+        lines = [u'Founded', u'2013', u'45000', u'members', u'Call 022-23456789']
+        infos = scanner.scan_lines(lines)
+        self.assertEqual([(INDIA_PHONE, '02223456789')], [(info.kind, info.value) for info in infos])
+        self.assertEqual(u'022-23456789', u'\n'.join(lines)[infos[0].start:infos[0].end])
+
+        # Long runs that almost match should be scanned in linear time, and only up to the limits
+        self.assertEqual([], scanner.scan('a' * 100000 + '@'))
+        self.assertEqual([], scanner.scan('1' * 100000))
+        self.assertEqual(ContactInfoScanner.MAX_RESULTS, len(scanner.scan('a@b.org ' * 2000)))
+
+    def test_org_contacts_scraper(self):
+        response = HtmlResponse(url='http://example.org/team', body=
+                                '<html><head><title>Our Team</title></head><body>'
+                                '<p>John Smith</p><p>Executive Director</p>'
+                                '<p><a href="mailto:john.smith@example.org">Email</a></p><p>022-23456789</p>'
+                                '<p>Mary Jones</p><p>Program Manager</p><p>mary@example.org</p>'
+                                '</body></html>')
+
+        contacts = OrgContactsScraper().parse(response)
+
+        # Info should go to the contact it follows
+        self.assertEqual('Executive Director', contacts['John Smith']['position'])
+        self.assertEqual('john.smith@example.org', contacts['John Smith']['email'])
+        self.assertEqual(['02223456789'], contacts['John Smith']['number'])
+        self.assertEqual('mary@example.org', contacts['Mary Jones']['email'])
+        self.assertEqual([], contacts['Mary Jones']['number'])
+
     def test_organization_scraper(self):
         ctx = ApplicationContext(TestableDocumentScraperContext())
 
@@ -847,6 +911,63 @@ class ScraperTests(unittest.TestCase):
         for test in assert_list:
             self.assertIn(test, scraped_urls, 'Invalid URL Metadata Didn\'t Find: %s' % str(test))
 
+    def test_parsed_page(self):
+        response = file_to_response("httpbombayteenchallengeorg")
+
+        page = ParsedPage.of(response)
+
+        # Wrapping a page again should reuse the same parse context
+        self.assertIs(page, ParsedPage.of(page))
+
+        # Attributes not defined on the page fall through to the response
+        self.assertEqual(response.url, page.url)
+        self.assertEqual(response.body, page.body)
+
+        # Selections should only be computed once
+        self.assertIs(page.hxs, page.hxs)
+        self.assertIs(page.body_text, page.body_text)
+        self.assertIs(page.body_tokens, page.body_tokens)
+        self.assertTrue(all(text.strip() for text in page.body_text))
+
+        # Scrapers should return the same results for a page as for its response
+        self.assertEqual(OrgAddressScraper().parse(response), OrgAddressScraper().parse(page))
+        self.assertEqual(sorted(EmailScraper().parse(response)), sorted(EmailScraper().parse(page)))
+
+    def test_page_links(self):
+        response = file_to_response("httpnewsunledunewsroomsunltoday")
+        page = ParsedPage.of(response)
+
+        links = page.links
+        self.assertIs(links, page.links)
+        self.assertTrue(len(links) > 0)
+
+        # Links should be absolute, distinct and located in the DOM
+        self.assertEqual(len(links), len(set((link.url, link.path) for link in links)))
+        for link in links:
+            self.assertTrue(link.url.startswith('http'), 'Link %s is not absolute' % link.url)
+            self.assertTrue(link.path.startswith('/html/'), 'Link %s has no DOM path' % link.url)
+            self.assertIn(link.tag, ['a', 'area'])
+            self.assertEqual(link.netloc, urlparse(link.canonical_url).netloc)
+
+        domains = [link.domain for link in links]
+        self.assertIn('unl.edu', domains)
+        self.assertIn('nebraska.edu', domains)
+
+    def test_keyword_tokens(self):
+        response = file_to_response("httpenwikipediaorgwikiNicolasCage")
+        page = ParsedPage.of(response)
+
+        tokens = page.keyword_tokens
+        self.assertIs(tokens, page.keyword_tokens)
+        self.assertTrue(len(tokens) > 0)
+
+        # Tokens should be lowercase lemmas with no punctuation or bare numbers
+        for token in tokens:
+            self.assertEqual(token, token.lower())
+            self.assertEqual(token, token.translate(None, string.punctuation))
+            self.assertFalse(token.isdigit())
+        self.assertEqual(['film', 'child'], list(tokenize(['Films, children!', '1964'])))
+
     def test_publication_citation_source_scraper(self):
         test_files = [
             "httpscholargooglecomscholarhlenqpaulbtnGassdt12C28",
@@ -0,0 +1,50 @@
+# stdlib imports
+import os
+import tempfile
+import unittest
+
+# project imports
+from HTResearch.Utilities.data_structures import BloomFilter
+
+
+class BloomFilterTest(unittest.TestCase):
+    def setUp(self):
+        self.urls = ['http://test%d.org/page' % i for i in range(1000)]
+        self.bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        for url in self.urls:
+            self.bloom_filter.add(url)
+
+    def test_membership(self):
+        for url in self.urls:
+            self.assertIn(url, self.bloom_filter)
+        self.assertFalse(self.bloom_filter.add(self.urls[0]))
+        self.assertTrue(self.bloom_filter.add(u'http://new.org/\u0939'))
+
+        false_positives = sum(1 for i in range(10000) if 'http://other%d.org/' % i in self.bloom_filter)
+        self.assertLess(false_positives, 300)
+
+    def test_stats(self):
+        stats = self.bloom_filter.stats()
+        self.assertGreaterEqual(stats['count'], 990)
+        self.assertEqual(1000, stats['capacity'])
+        # About 9.6 bits per string for a 1% false positive rate
+        self.assertEqual(1199, stats['memory_bytes'])
+        self.assertEqual(7, stats['hashes'])
+        self.assertLess(stats['current_error_rate'], 0.02)
+
+    def test_save_load(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.bloom_filter.save(path)
+            loaded = BloomFilter.load(path)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(self.bloom_filter.stats(), loaded.stats())
+        for url in self.urls:
+            self.assertIn(url, loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+# stdlib imports
+import unittest
+
+# project imports
+from HTResearch.Utilities.regions import REGION_NAMES, region_code
+
+
+class RegionsTest(unittest.TestCase):
+    def test_region_names(self):
+        self.assertEqual('MH', region_code('12 Hill Road, Bandra West, Mumbai, Maharashtra 400050'))
+        self.assertEqual('OR', region_code('Plot 5, Bhubaneswar, orissa'))
+        self.assertEqual('DL', region_code('New Delhi 110001'))
+        self.assertEqual('DD', region_code('Nani Daman'))
+        self.assertEqual('AN', region_code('Port Blair, Andaman'))
+        self.assertEqual('MH', region_code('3 Goa Street, Pune, Maharashtra'))
+        self.assertEqual('UP', region_code('Delhi Road, Meerut, Uttar Pradesh 250002'))
+        self.assertEqual('Andaman and Nicobar Islands', REGION_NAMES['AN'])
+
+    def test_pin_codes(self):
+        self.assertEqual('MH', region_code('Satara 415001'))
+        self.assertEqual('GA', region_code('Panaji 403 001'))
+        self.assertEqual('JH', region_code('Ranchi 834001'))
+        self.assertEqual('WB', region_code('Kolkata 700 016'))
+
+    def test_unknown(self):
+        self.assertIsNone(region_code(None))
+        self.assertIsNone(region_code(''))
+        self.assertIsNone(region_code('5124 Yeesy Street Omaha, NE 68024'))
+        self.assertIsNone(region_code('Phone 9876543210'))
+
+
+if __name__ == '__main__':
+    unittest.main()
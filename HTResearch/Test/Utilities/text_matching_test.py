@@ -0,0 +1,39 @@
+# stdlib imports
+import unittest
+
+# project imports
+from HTResearch.Utilities.text_matching import DictionaryMatcher
+
+
+class DictionaryMatcherTest(unittest.TestCase):
+    def test_find_all(self):
+        matcher = DictionaryMatcher(['he', 'she', 'his', 'hers'])
+
+        matches = list(matcher.find_all('ushers'))
+
+        self.assertEqual([(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')], matches)
+        self.assertEqual(set(['she', 'he', 'hers']), matcher.matches('ushers'))
+        self.assertIsNone(matcher.search('nothing to see'))
+
+    def test_whole_words(self):
+        matcher = DictionaryMatcher(['Delhi', 'New Delhi', 'sex trafficking'], whole_words=True, ignore_case=True)
+
+        matches = list(matcher.find_all('in new delhi, not Delhiwala; SEX TRAFFICKING.'))
+
+        self.assertEqual([(3, 12, 'New Delhi'), (7, 12, 'Delhi'), (29, 44, 'sex trafficking')], matches)
+
+    def test_dictionary(self):
+        matcher = DictionaryMatcher(['Director', 'Executive Director', 'Director', ''])
+
+        self.assertEqual(2, len(matcher))
+        self.assertIn('Director', matcher)
+        self.assertNotIn('Executive', matcher)
+        self.assertEqual(1, matcher.index('Executive Director'))
+        self.assertEqual(-1, matcher.index('Treasurer'))
+
+        # Earlier patterns in the dictionary win, regardless of where they are in the text
+        self.assertEqual('Director', matcher.first_listed('Our Executive Director'))
+
+
+if __name__ == '__main__':
+    unittest.main()
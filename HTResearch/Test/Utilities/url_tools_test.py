@@ -0,0 +1,48 @@
+# stdlib imports
+import unittest
+
+# project imports
+from HTResearch.Utilities.url_tools import UrlUtility, DomainSet
+
+
+class UrlUtilityTest(unittest.TestCase):
+    def test_get_domain(self):
+        domains = {
+            'http://www.bbc.co.uk/news': 'bbc.co.uk',
+            'news.unl.edu': 'unl.edu',
+            'http://foo.educ.ar/': 'educ.ar',
+            'https://www.facebook.com/apneaap': 'facebook.com',
+        }
+
+        for url, domain in domains.iteritems():
+            self.assertEqual(domain, UrlUtility.get_domain(url))
+
+        self.assertEqual('http://localhost/', UrlUtility.get_domain('http://localhost/'))
+        self.assertRaises(ValueError, UrlUtility.get_domain, 'http://localhost/', False)
+
+    def test_domain_cache(self):
+        UrlUtility.domain_cache.clear()
+
+        UrlUtility.get_domain('http://www.stoptrafficking.net/about')
+        UrlUtility.get_domain('http://www.stoptrafficking.net/services/training')
+        stats = UrlUtility.domain_cache_stats()
+
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['size'])
+
+    def test_domain_set(self):
+        domains = DomainSet(['facebook.com', 'go.com', ''])
+
+        self.assertIn('facebook.com', domains)
+        self.assertIn('www.facebook.com', domains)
+        self.assertIn('WWW.Facebook.com:80', domains)
+        self.assertIn('abc.go.com', domains)
+        self.assertNotIn('lego.com', domains)
+        self.assertNotIn('notfacebook.com', domains)
+        self.assertNotIn('com', domains)
+        self.assertEqual(2, len(domains))
+
+
+if __name__ == '__main__':
+    unittest.main()
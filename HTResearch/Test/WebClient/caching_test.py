@@ -0,0 +1,146 @@
+# stdlib imports
+from datetime import datetime, timedelta
+from django.conf import settings
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+if not settings.configured:
+    settings.configure(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+
+from django.core.cache import get_cache
+
+# project imports
+from HTResearch.WebClient.WebClient import caching
+from HTResearch.WebClient.WebClient.caching import KeyLock, get_cached, set_cached
+
+
+class StubTime(object):
+    """Stands in for the time module in caching, calling back instead of sleeping."""
+
+    def __init__(self, on_sleep):
+        self.on_sleep = on_sleep
+        self.sleeps = 0
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        self.sleeps += 1
+        self.on_sleep(self.sleeps)
+
+
+class CachingTest(unittest.TestCase):
+    def setUp(self):
+        self._cache, self._time = caching.cache, caching.time
+        caching.cache = get_cache('django.core.cache.backends.locmem.LocMemCache', LOCATION='caching_test')
+        caching.cache.clear()
+        self.builds = 0
+
+    def tearDown(self):
+        caching.cache.clear()
+        caching.cache, caching.time = self._cache, self._time
+
+    def build(self):
+        self.builds += 1
+        return 'built'
+
+    def fail(self):
+        self.builds += 1
+        raise ValueError('the database is down')
+
+    def set_stale(self, key):
+        caching.cache.set(key, ('stale', datetime.utcnow() - timedelta(hours=1)))
+
+    def test_fresh(self):
+        set_cached('payload', 'fresh')
+        self.assertEqual('fresh', get_cached('payload', timedelta(minutes=5), self.build))
+        self.assertEqual(0, self.builds)
+
+    def test_stale_while_locked(self):
+        self.set_stale('payload')
+        other = KeyLock('payload')
+        self.assertTrue(other.acquire())
+
+        # Another process is rebuilding it, so the stale value is served right away
+        self.assertEqual('stale', get_cached('payload', timedelta(minutes=5), self.build))
+        self.assertEqual(0, self.builds)
+
+        other.release()
+        self.assertEqual('built', get_cached('payload', timedelta(minutes=5), self.build))
+        self.assertEqual(1, self.builds)
+
+    def test_wait_for_lock_holder(self):
+        other = KeyLock('payload')
+        other.acquire()
+
+        def on_sleep(sleeps):
+            if sleeps == 3:
+                set_cached('payload', 'built elsewhere')
+                other.release()
+        caching.time = StubTime(on_sleep)
+
+        self.assertEqual('built elsewhere', get_cached('payload', timedelta(minutes=5), self.build))
+        self.assertEqual(0, self.builds)
+        self.assertEqual(3, caching.time.sleeps)
+
+    def test_take_over_from_failed_lock_holder(self):
+        other = KeyLock('payload')
+        other.acquire()
+
+        def on_sleep(sleeps):
+            if sleeps == 2:
+                # Gave up the lock without storing anything
+                other.release()
+        caching.time = StubTime(on_sleep)
+
+        self.assertEqual('built', get_cached('payload', timedelta(minutes=5), self.build))
+        self.assertEqual(1, self.builds)
+        self.assertTrue(KeyLock('payload').acquire())
+
+    def test_failed_rebuild(self):
+        self.set_stale('payload')
+        self.assertEqual('stale', get_cached('payload', timedelta(minutes=5), self.fail))
+        self.assertEqual(1, self.builds)
+        # The lock is released, so the next request tries again
+        self.assertEqual('built', get_cached('payload', timedelta(minutes=5), self.build))
+
+        # With nothing stale to serve, the failure is raised
+        self.assertRaises(ValueError, get_cached, 'other payload', timedelta(minutes=5), self.fail)
+        self.assertTrue(KeyLock('other payload').acquire())
+
+
+class FileKeyLockTest(unittest.TestCase):
+    def setUp(self):
+        self._cache = caching.cache
+        self.cache_dir = tempfile.mkdtemp()
+        caching.cache = get_cache('django.core.cache.backends.filebased.FileBasedCache',
+                                  LOCATION=os.path.join(self.cache_dir, 'cache'))
+
+    def tearDown(self):
+        caching.cache = self._cache
+        shutil.rmtree(self.cache_dir)
+
+    def test_contention(self):
+        lock = KeyLock('payload')
+        self.assertTrue(lock.acquire())
+        self.assertTrue(os.path.exists(lock._path))
+        self.assertFalse(KeyLock('payload').acquire())
+
+        lock.release()
+        self.assertFalse(os.path.exists(lock._path))
+        self.assertTrue(KeyLock('payload').acquire())
+
+    def test_stale_lock(self):
+        lock = KeyLock('payload')
+        lock.acquire()
+        # Left behind by a process that died long ago
+        old = time.time() - caching.LOCK_TIMEOUT - 1
+        os.utime(lock._path, (old, old))
+        self.assertTrue(KeyLock('payload').acquire())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# stdlib imports
+from datetime import datetime, timedelta
+from django.conf import settings
+import unittest
+
+if not settings.configured:
+    settings.configure(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+
+from django.core.cache import get_cache
+
+# project imports
+from HTResearch.WebClient.WebClient import caching
+from HTResearch.WebClient.WebClient.caching import KeyLock
+from HTResearch.WebClient.WebClient.payloads import PayloadRefresher, RETRY_DELAY
+
+
+class StubDatetime(object):
+    """Stands in for datetime in caching, so the cache dates values by the test's clock."""
+
+    def __init__(self, test):
+        self.test = test
+
+    def utcnow(self):
+        return self.test.now
+
+
+class PayloadRefresherTest(unittest.TestCase):
+    def setUp(self):
+        self._cache, self._datetime = caching.cache, caching.datetime
+        caching.cache = get_cache('django.core.cache.backends.locmem.LocMemCache', LOCATION='payloads_test')
+        caching.cache.clear()
+        caching.datetime = StubDatetime(self)
+
+        self.now = datetime(2013, 11, 5, 8, 30)
+        self.builds = {'count': 0, 'map': 0}
+        self.map_fails = True
+        self.refresher = PayloadRefresher(payloads={
+            'count': (timedelta(minutes=20), self.build_count),
+            'map': (timedelta(minutes=20), self.build_map),
+        }, clock=lambda: self.now)
+
+    def tearDown(self):
+        caching.cache.clear()
+        caching.cache, caching.datetime = self._cache, self._datetime
+
+    def build_count(self):
+        self.builds['count'] += 1
+        return 42
+
+    def build_map(self):
+        self.builds['map'] += 1
+        if self.map_fails:
+            raise ValueError('the database is down')
+        return {}
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+    def test_due_times(self):
+        # Everything is missing, so everything is built, and the failed payload is tried again soon
+        self.assertEqual(RETRY_DELAY.total_seconds(), self.refresher.refresh())
+        self.assertEqual({'count': 1, 'map': 1}, self.builds)
+
+        self.advance(seconds=10)
+        self.assertEqual(RETRY_DELAY.total_seconds() - 10, self.refresher.refresh())
+        self.assertEqual({'count': 1, 'map': 1}, self.builds)
+
+        # Once it is rebuilt, it is due again after half of its refresh period
+        self.advance(seconds=20)
+        self.map_fails = False
+        self.assertEqual(10 * 60 - 30, self.refresher.refresh())
+        self.assertEqual({'count': 1, 'map': 2}, self.builds)
+
+        self.advance(minutes=9, seconds=30)
+        self.refresher.refresh()
+        self.assertEqual({'count': 2, 'map': 2}, self.builds)
+
+    def test_held_elsewhere(self):
+        self.map_fails = False
+        self.refresher.refresh()
+
+        # Another process is rebuilding the count when it comes due, so look again after the retry delay
+        self.advance(minutes=10)
+        other = KeyLock('count')
+        other.acquire()
+        self.assertEqual(RETRY_DELAY.total_seconds(), self.refresher.refresh())
+        self.assertEqual({'count': 1, 'map': 2}, self.builds)
+
+        # It still hasn't been rebuilt, so try it here
+        other.release()
+        self.advance(seconds=30)
+        self.refresher.refresh()
+        self.assertEqual({'count': 2, 'map': 2}, self.builds)
+
+    def test_force(self):
+        self.map_fails = False
+        self.refresher.refresh()
+        self.refresher.refresh(force=True)
+        self.assertEqual({'count': 2, 'map': 2}, self.builds)
+
+
+if __name__ == '__main__':
+    unittest.main()
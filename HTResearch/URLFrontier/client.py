@@ -0,0 +1,125 @@
+#
+# client.py
+# A module for fetching URLs from the URLFrontier without blocking the Twisted reactor.
+#
+
+# stdlib imports
+from collections import deque
+from twisted.internet import threads
+from twisted.internet.defer import Deferred, succeed
+
+# project imports
+from HTResearch.URLFrontier.urlfrontier import URLFrontierRules
+from HTResearch.Utilities.logutil import LoggingSection, get_logger
+
+#region Globals
+logger = get_logger(LoggingSection.FRONTIER, __name__)
+#endregion
+
+
+class URLFrontierClient(object):
+    """
+    A client of the URLFrontier for code running on the Twisted reactor, such as spiders and their middlewares.
+
+    URLs are fetched from the frontier in batches on the reactor's thread pool and buffered locally. Whenever
+    the buffer drops to its low watermark, the next batch is prefetched, so callers rarely wait on the frontier
+    and the reactor never does.
+
+    Attributes:
+        frontier (URLFrontier): The frontier to fetch URLs from.
+        rules (URLFrontierRules): The rules used in fetching URLs.
+        batch_size (int): The most URLs fetched from the frontier at once.
+        low_watermark (int): The buffer size at or below which the next batch is prefetched.
+        fill_timeout (float): The most seconds a fetch waits for the frontier to fill its cache.
+    """
+
+    def __init__(self, frontier, rules=URLFrontierRules(), batch_size=50, low_watermark=10, fill_timeout=10):
+        self.frontier = frontier
+        self.rules = rules
+        self.batch_size = batch_size
+        self.low_watermark = low_watermark
+        self.fill_timeout = fill_timeout
+        self._buffer = deque()
+        self._fetching = False
+        self._waiters = []
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def next_url(self):
+        """
+        Fetches the next URL.
+
+        Returns:
+            A Deferred that fires with a URLMetadata model, or None if the frontier had no URLs in time.
+        """
+        d = self.next_urls(1)
+        d.addCallback(lambda urls: urls[0] if urls else None)
+        return d
+
+    def next_urls(self, count):
+        """
+        Fetches a batch of URLs.
+
+        Arguments:
+            count (int): The most URLs to fetch.
+
+        Returns:
+            A Deferred that fires with a list of up to count URLMetadata models. The list may be short
+            if the frontier is running low.
+        """
+        if len(self._buffer) >= count:
+            return succeed(self._take(count))
+
+        d = Deferred()
+        self._waiters.append(d)
+        self._fetch()
+        d.addCallback(lambda _: self._take(count))
+        return d
+
+    def next_url_nowait(self):
+        """
+        Takes the next URL if one is already buffered, prefetching more if the buffer is running low.
+
+        Returns:
+            A URLMetadata model, or None if no URL is buffered.
+        """
+        urls = self._take(1)
+        return urls[0] if urls else None
+
+    def empty_cache(self):
+        """
+        Drops the buffered URLs and empties the frontier's cache.
+
+        Returns:
+            A Deferred that fires once the cache has been emptied.
+        """
+        self._buffer.clear()
+        return threads.deferToThread(self.frontier.empty_cache, self.rules)
+
+    def _take(self, count):
+        urls = []
+        while self._buffer and len(urls) < count:
+            urls.append(self._buffer.popleft())
+        if len(self._buffer) <= self.low_watermark:
+            self._fetch()
+        return urls
+
+    def _fetch(self):
+        # Only one batch is on its way at a time; everyone waiting is served from it
+        if self._fetching:
+            return
+        self._fetching = True
+        d = threads.deferToThread(self.frontier.next_urls, self.batch_size, self.rules, self.fill_timeout)
+        d.addCallbacks(self._fetched, self._fetch_failed)
+
+    def _fetched(self, urls):
+        self._fetching = False
+        self._buffer.extend(urls)
+        waiters, self._waiters = self._waiters, []
+        for d in waiters:
+            d.callback(None)
+
+    def _fetch_failed(self, failure):
+        logger.error('Failed to fetch URLs from the frontier: %s' % failure.getErrorMessage())
+        self._fetched([])
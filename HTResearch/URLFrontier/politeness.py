@@ -0,0 +1,143 @@
+#
+# politeness.py
+# A module for spreading URL fetches across domains so no single site is hammered.
+#
+
+# stdlib imports
+from collections import deque
+import heapq
+import time
+
+
+class DomainScheduler(object):
+    """
+    A scheduler that queues URLs per domain and hands out at most one URL per domain every delay seconds.
+
+    Domains are kept in a heap ordered by the time they may next be fetched from, so each URL handed out
+    costs O(log domains), and domains that are ready take turns in round-robin order.
+
+    Attributes:
+        delay (float): The least number of seconds between two URLs handed out for the same domain.
+    """
+
+    def __init__(self, delay=2.0, clock=time.time):
+        """
+        Constructs a new DomainScheduler instance.
+
+        Arguments:
+            delay (float): The least number of seconds between two URLs handed out for the same domain.
+            clock (function): Returns the current time in seconds.
+        """
+        self.delay = delay
+        self._clock = clock
+        self._queues = {}
+        self._size = 0
+        # (next allowed fetch time, insertion order, domain) for every domain with queued URLs
+        self._heap = []
+        self._pushes = 0
+        # Next allowed fetch time of domains that have recently been handed out
+        self._next_allowed = {}
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def domain_count(self):
+        """The number of domains with queued URLs."""
+        return len(self._queues)
+
+    def queued(self, domain):
+        """
+        Counts the URLs queued for a domain.
+
+        Arguments:
+            domain (string): The domain.
+
+        Returns:
+            The number of URLs queued for the domain.
+        """
+        queue = self._queues.get(domain)
+        return len(queue) if queue is not None else 0
+
+    def add(self, url, domain):
+        """
+        Queues a URL.
+
+        Arguments:
+            url (object): The URL to queue, e.g. a URLMetadata model.
+            domain (string): The domain of the URL.
+        """
+        queue = self._queues.get(domain)
+        if queue is None:
+            queue = self._queues[domain] = deque()
+            self._push(domain, self._next_allowed.pop(domain, 0))
+        queue.append(url)
+        self._size += 1
+
+    def next_ready(self, count, now=None):
+        """
+        Hands out URLs from the domains that may be fetched from now, one per domain.
+
+        Arguments:
+            count (int): The most URLs to hand out.
+            now (float): The current time in seconds. Defaults to the scheduler's clock.
+
+        Returns:
+            A list of up to count URLs, none of which share a domain.
+        """
+        if now is None:
+            now = self._clock()
+
+        urls = []
+        cooling = []
+        while self._heap and len(urls) < count and self._heap[0][0] <= now:
+            ready_time, order, domain = heapq.heappop(self._heap)
+            queue = self._queues[domain]
+            urls.append(queue.popleft())
+            self._size -= 1
+
+            next_time = now + self.delay
+            if queue:
+                # Wait until the other domains have had their turn before coming back to this one
+                cooling.append((domain, next_time))
+            else:
+                del self._queues[domain]
+                self._next_allowed[domain] = next_time
+
+        for domain, next_time in cooling:
+            self._push(domain, next_time)
+        self._forget_expired(now)
+        return urls
+
+    def wait_time(self, now=None):
+        """
+        Finds how long until a URL can be handed out.
+
+        Arguments:
+            now (float): The current time in seconds. Defaults to the scheduler's clock.
+
+        Returns:
+            The number of seconds to wait, 0 if a URL is ready, or None if no URLs are queued.
+        """
+        if not self._heap:
+            return None
+        if now is None:
+            now = self._clock()
+        return max(0, self._heap[0][0] - now)
+
+    def clear(self):
+        """Drops every queued URL. Domains still wait out their delay."""
+        for ready_time, order, domain in self._heap:
+            self._next_allowed[domain] = ready_time
+        self._queues.clear()
+        self._heap = []
+        self._size = 0
+
+    def _push(self, domain, ready_time):
+        self._pushes += 1
+        heapq.heappush(self._heap, (ready_time, self._pushes, domain))
+
+    def _forget_expired(self, now):
+        # Only domains still waiting out their delay need to be remembered
+        if len(self._next_allowed) > 2 * len(self._queues) + 1000:
+            self._next_allowed = dict((domain, t) for domain, t in self._next_allowed.iteritems() if t > now)
@@ -4,15 +4,24 @@
 #
 
 # stdlib imports
+from datetime import datetime
 import hashlib
-from multiprocessing import Queue, Process, Condition, RLock
+import os
+import tempfile
+import threading
+import time
+from multiprocessing import Queue, Process, Condition, Event, RLock
 from Queue import Empty, Full
 
 # project imports
 from HTResearch.DataAccess.dto import URLMetadataDTO
 from HTResearch.DataModel.model import URLMetadata
+from HTResearch.URLFrontier.politeness import DomainScheduler
+from HTResearch.Utilities.config import get_config_value
 from HTResearch.Utilities.converter import DTOConverter
+from HTResearch.Utilities.data_structures import BloomFilter, LRUCache
 from HTResearch.Utilities.types import Singleton
+from HTResearch.Utilities.url_tools import UrlUtility
 from HTResearch.Utilities.logutil import LoggingSection, get_logger
 
 #region Globals
@@ -60,8 +69,11 @@ class URLFrontierRules:
         return md5.hexdigest()
 
 
-def _monitor_cache(dao, max_size, cache, job_queue, job_cond, fill_cond, empty_cond,
+def _monitor_cache(dao, max_size, domain_cap, cache, job_queue, job_cond, fill_cond, empty_cond, fill_pending,
                    req_doms, blk_doms, srt_list, logger_lock):
+    # URLs recently put in the cache. A fill can start before the URLs from the last one have been visited,
+    # so skip these rather than queue them twice.
+    queued = LRUCache(max_size=2 * max_size)
     while True:
         try:
             with job_cond:
@@ -78,14 +90,24 @@ def _monitor_cache(dao, max_size, cache, job_queue, job_cond, fill_cond, empty_c
             with logger_lock:
                 logger.info('Filling the cache')
             with fill_cond:
-                urls = dao().findmany_by_domains(max_size - cache.qsize(),
-                                                 req_doms, blk_doms, srt_list)
+                urls = dao().findmany_by_domains(max_size, req_doms, blk_doms, srt_list)
+                # Take at most domain_cap URLs of each domain per fill, so a few big domains can't crowd out the
+                # rest. The others aren't marked as queued, so a later fill picks them up.
+                per_domain = {}
                 for u in urls:
+                    if u.url in queued:
+                        continue
+                    domain = u.domain or UrlUtility.get_domain(u.url)
+                    if per_domain.get(domain, 0) >= domain_cap:
+                        continue
                     url_obj = DTOConverter.from_dto(URLMetadata, u)
                     try:
-                        cache.put(url_obj)
+                        cache.put(url_obj, block=False)
                     except Full:
                         break
+                    queued.put(u.url, True)
+                    per_domain[domain] = per_domain.get(domain, 0) + 1
+                fill_pending.clear()
                 fill_cond.notify_all()
 
         elif next_job == CacheJobs.Empty:
@@ -97,6 +119,7 @@ def _monitor_cache(dao, max_size, cache, job_queue, job_cond, fill_cond, empty_c
                         cache.get(block=False)
                     except Empty:
                         break
+                queued.clear()
                 empty_cond.notify()
 
 
@@ -110,6 +133,30 @@ class URLFrontier:
 
         # Private members
         self._max_size = 1000
+        # Refill the cache once it holds fewer URLs than this, so it never runs dry in front of a crawler
+        self._low_watermark = 100
+        # Least number of seconds between two URLs handed out for the same domain
+        self.domain_delay = 2.0
+        # Most URLs of one domain the cache process takes per fill. A domain's URLs beyond this are left in the
+        # database for a later fill, so a few big domains can't crowd out the rest.
+        self._domain_fill_size = 10
+        self._schedulers = dict()
+        # URLs known to be in the database, snapshotted to disk every so many additions
+        self.seen_urls_path = get_config_value('FRONTIER', 'seen_urls_path') or \
+            os.path.join(tempfile.gettempdir(), 'htresearch_seen_urls.bloom')
+        self.seen_urls_capacity = int(get_config_value('FRONTIER', 'seen_urls_capacity') or 10000000)
+        self.seen_urls_error_rate = float(get_config_value('FRONTIER', 'seen_urls_error_rate') or 0.001)
+        self._seen_urls = None
+        self._seen_urls_loader = None
+        # URLs seen while the filter loads, which the load may have missed
+        self._seen_while_loading = []
+        # Guards the filter, which the reactor thread and deferred threads both add to
+        self._seen_urls_lock = threading.RLock()
+        # Only the process that made the frontier writes snapshots. Processes forked from it, such as analysis
+        # workers, keep what they add to themselves.
+        self._owner_pid = os.getpid()
+        self._seen_urls_snapshot_every = 10000
+        self._seen_urls_unsaved = 0
         self._start_term_lock = RLock()
         self._url_queues = dict()
         self._job_queues = dict()
@@ -118,6 +165,7 @@ class URLFrontier:
         self._empty_conds = dict()
         self._mid_empty_conds = dict()
         self._job_conds = dict()
+        self._fill_pending = dict()
         self._cache_procs = dict()
         self._proc_counts = dict()
         self._logger_lock = RLock()
@@ -139,14 +187,18 @@ class URLFrontier:
                 self._empty_conds[cs] = Condition()
                 self._mid_empty_conds[cs] = Condition()
                 self._job_conds[cs] = Condition()
+                self._fill_pending[cs] = Event()
+                self._schedulers[cs] = DomainScheduler(self.domain_delay)
                 self._cache_procs[cs] = Process(target=_monitor_cache,
                                                 args=(self.dao,
                                                       self._max_size,
+                                                      self._domain_fill_size,
                                                       self._url_queues[cs],
                                                       self._job_queues[cs],
                                                       self._job_conds[cs],
                                                       self._fill_conds[cs],
                                                       self._empty_conds[cs],
+                                                      self._fill_pending[cs],
                                                       rules.required_domains,
                                                       rules.blocked_domains,
                                                       rules.sort_list,
@@ -183,6 +235,9 @@ class URLFrontier:
                     del self._fill_conds[cs]
                     del self._empty_conds[cs]
                     del self._job_conds[cs]
+                    del self._fill_pending[cs]
+                    del self._schedulers[cs]
+                    self.save_seen_urls()
 
     def next_url(self, rules=URLFrontierRules()):
         """
@@ -194,6 +249,25 @@ class URLFrontier:
         Returns:
             A URL string for the next URL in the queue, or None.
         """
+        urls = self.next_urls(1, rules=rules)
+        return urls[0] if urls else None
+
+    def next_urls(self, count, rules=URLFrontierRules(), timeout=None):
+        """
+        Fetches a batch of URLs from the queue.
+
+        URLs are handed out at most one per domain every domain_delay seconds, taking turns among the domains
+        in the cache. If no URL is ready, this waits for a domain to cool down or for the cache process to
+        fill the cache. If the cache is running low, this asks the cache process to refill it without waiting.
+
+        Arguments:
+            count (int): The most URLs to fetch.
+            rules (URLFrontierRules): The rules used in fetching the URLs.
+            timeout (float): The most seconds to wait for a URL, or None to wait until there is one.
+
+        Returns:
+            A list of up to count URLMetadata models, which is empty if no URLs were found in time.
+        """
         cs = rules.checksum
         start_process = False
 
@@ -205,18 +279,55 @@ class URLFrontier:
 
         with self._next_url_locks[cs]:
             with self._mid_empty_conds[cs]:
-                try:
-                    return self._url_queues[cs].get(block=False)
-                except Empty:
-                    with self._fill_conds[cs]:
-                        with self._job_conds[cs]:
-                            self._job_queues[cs].put(CacheJobs.Fill)
-                            self._job_conds[cs].notify()
-                        self._fill_conds[cs].wait()
-                    try:
-                        return self._url_queues[cs].get(block=False)
-                    except Empty:
-                        return None
+                scheduler = self._schedulers[cs]
+                scheduler.delay = self.domain_delay
+                self._schedule_cached_urls(cs)
+                urls = scheduler.next_ready(count)
+                if not urls:
+                    wait = scheduler.wait_time()
+                    if wait is None:
+                        # Nothing to hand out at all, so wait for the cache to be filled
+                        with self._fill_conds[cs]:
+                            self._request_fill(cs)
+                            self._fill_conds[cs].wait(timeout)
+                        self._schedule_cached_urls(cs)
+                    else:
+                        # Every domain has just been fetched from, so wait for the first to cool down
+                        time.sleep(wait if timeout is None else min(wait, timeout))
+                    urls = scheduler.next_ready(count)
+                # Count what this process already has queued, too, since the shared cache is emptied into it
+                if len(scheduler) + self._cache_size(cs) < self._low_watermark:
+                    self._request_fill(cs)
+                # These came out of the database, so they have been seen
+                for u in urls:
+                    self._see_url(u.url)
+                return urls
+
+    def _schedule_cached_urls(self, cs):
+        # Move URLs from the shared cache into this process's domain scheduler
+        scheduler = self._schedulers[cs]
+        while True:
+            try:
+                url = self._url_queues[cs].get(block=False)
+            except Empty:
+                break
+            scheduler.add(url, url.domain or UrlUtility.get_domain(url.url))
+
+    def _request_fill(self, cs):
+        # The cache process clears this once it has filled, so one fill is asked for at a time
+        if self._fill_pending[cs].is_set():
+            return
+        self._fill_pending[cs].set()
+        with self._job_conds[cs]:
+            self._job_queues[cs].put(CacheJobs.Fill)
+            self._job_conds[cs].notify()
+
+    def _cache_size(self, cs):
+        try:
+            return self._url_queues[cs].qsize()
+        except NotImplementedError:
+            # qsize is not available on every platform; assume the cache is running low
+            return 0
 
     def put_url(self, u):
         """
@@ -225,8 +336,111 @@ class URLFrontier:
         Arguments:
             u (URLMetadata): The URL to be placed in the database.
         """
-        url_dto = DTOConverter.to_dto(URLMetadataDTO, u)
-        self.dao().create_update(url_dto)
+        self.put_urls([u])
+
+    def put_urls(self, urls):
+        """
+        Puts many URLs in the database at once.
+
+        Links that were found but never visited add nothing to a stored URL, so they are only written if the URL
+        is not stored yet.
+
+        Arguments:
+            urls (URLMetadata[]): The URLs to be placed in the database, with at most one model per URL.
+        """
+        seen_urls = self.seen_urls
+        # A link the filter has not seen is definitely new. One it has seen probably is stored, but the filter can
+        # be wrong, so look those up before leaving them out.
+        links = [u.url for u in urls if self._is_unvisited_link(u) and (seen_urls is None or u.url in seen_urls)]
+        if links:
+            stored = self.dao().stored_urls(links)
+            if stored is None:
+                # The lookup failed; writing the links is always safe
+                stored = set()
+            urls = [u for u in urls if not (u.url in stored and self._is_unvisited_link(u))]
+
+        url_dtos = [DTOConverter.to_dto(URLMetadataDTO, u) for u in urls]
+        self.dao().upsert_many(url_dtos)
+        for u in urls:
+            self._see_url(u.url)
+
+    @property
+    def seen_urls(self):
+        """
+        A BloomFilter of the URLs that have been put in or taken out of the database, or None while it is not
+        ready.
+
+        A URL that is not in the filter is definitely not stored. The first use starts loading the filter from its
+        last snapshot, or building it from the database if there is no snapshot, in a background thread. Until
+        that is done, every URL has to be looked up.
+        """
+        with self._seen_urls_lock:
+            if self._seen_urls is None and self._seen_urls_loader is None:
+                self._seen_urls_loader = threading.Thread(target=self._load_seen_urls, name='SeenURLsLoader')
+                self._seen_urls_loader.daemon = True
+                self._seen_urls_loader.start()
+            return self._seen_urls
+
+    def _load_seen_urls(self):
+        seen_urls = None
+        if os.path.exists(self.seen_urls_path):
+            try:
+                seen_urls = BloomFilter.load(self.seen_urls_path)
+            except Exception as e:
+                logger.error('Could not load the seen URLs from %s: %s' % (self.seen_urls_path, e))
+        if seen_urls is None:
+            seen_urls = self._build_seen_urls()
+        with self._seen_urls_lock:
+            if seen_urls is None:
+                # Let the next use try again
+                self._seen_urls_loader = None
+            else:
+                for url in self._seen_while_loading:
+                    seen_urls.add(url)
+                self._seen_urls = seen_urls
+            self._seen_while_loading = []
+
+    def _build_seen_urls(self):
+        # Without a snapshot, every stored URL has to go in the filter, or stored URLs would look new
+        logger.info('Building the seen URLs from the database')
+        seen_urls = BloomFilter(self.seen_urls_capacity, self.seen_urls_error_rate)
+        try:
+            for url in self.dao().all_urls():
+                seen_urls.add(url)
+        except Exception as e:
+            logger.error('Could not build the seen URLs from the database: %s' % e)
+            return None
+        logger.info('Built the seen URLs from %d stored URLs' % len(seen_urls))
+        return seen_urls
+
+    def save_seen_urls(self):
+        """Writes a snapshot of the seen URLs to disk, unless this process was forked from the frontier's."""
+        with self._seen_urls_lock:
+            if self._seen_urls is None or self._owner_pid != os.getpid():
+                return
+            try:
+                self._seen_urls.save(self.seen_urls_path)
+                self._seen_urls_unsaved = 0
+            except Exception as e:
+                logger.error('Could not save the seen URLs to %s: %s' % (self.seen_urls_path, e))
+
+    def _see_url(self, url):
+        with self._seen_urls_lock:
+            seen_urls = self.seen_urls
+            if seen_urls is None:
+                # A forked process never gets the filter its parent was loading, so only the owner keeps these
+                if self._seen_urls_loader is not None and self._owner_pid == os.getpid():
+                    self._seen_while_loading.append(url)
+            elif seen_urls.add(url):
+                self._seen_urls_unsaved += 1
+                if self._seen_urls_unsaved >= self._seen_urls_snapshot_every:
+                    self.save_seen_urls()
+
+    @staticmethod
+    def _is_unvisited_link(u):
+        # A link that was found but never visited adds nothing to a stored URL
+        return u.checksum is None and u.score is None and u.update_freq is None and \
+            (u.last_visited is None or u.last_visited == datetime.min)
 
     def empty_cache(self, rules=URLFrontierRules()):
         """
@@ -237,6 +451,7 @@ class URLFrontier:
         """
         cs = rules.checksum
         with self._mid_empty_conds[cs]:
+            self._schedulers[cs].clear()
             with self._empty_conds[cs]:
                 repeat = True
                 while repeat:
@@ -3,6 +3,15 @@
 # A module with various custom data structures.
 #
 
+# stdlib imports
+from collections import OrderedDict
+import hashlib
+import math
+import os
+import struct
+from threading import RLock
+
+
 def enum(*sequential, **named):
     """ Implemented an enum based on: http://stackoverflow.com/a/1695250/1440310 """
     enums = dict(zip(sequential, range(len(sequential))), **named)
@@ -10,4 +19,220 @@ def enum(*sequential, **named):
     reverse = dict((value, key) for key, value in enums.iteritems())
     enums['mapping'] = mapping
     enums['reverse_mapping'] = reverse
-    return type("Enum", (), enums)
\ No newline at end of file
+    return type("Enum", (), enums)
+
+
+class LRUCache(object):
+    """
+    A size-bounded mapping that evicts its least recently used entries.
+
+    Attributes:
+        max_size (int): The maximum number of entries to hold.
+        hits (int): The number of lookups that found an entry.
+        misses (int): The number of lookups that did not find an entry.
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Fetches an entry and marks it as recently used.
+
+        Arguments:
+            key (object): The key of the entry.
+            default (object): The value to return if there is no entry.
+
+        Returns:
+            The cached value, or default.
+        """
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores an entry, evicting the least recently used entry if the cache is full.
+
+        Arguments:
+            key (object): The key of the entry.
+            value (object): The value to store.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry and resets the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Reports the usage of the cache.
+
+        Returns:
+            A dictionary of the cache's hits, misses, size and max_size.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+        }
+
+
+class BloomFilter(object):
+    """
+    A fixed-size set of strings that may report false positives but never false negatives.
+
+    The filter is sized for capacity strings at a false positive rate of error_rate. It keeps working past its
+    capacity, but its false positive rate climbs.
+
+    Attributes:
+        capacity (int): The number of strings the filter is sized for.
+        error_rate (float): The false positive rate the filter is sized for.
+    """
+
+    # magic, capacity, error rate, number of bits, number of hashes, number of strings added
+    _header = struct.Struct('<4sQdQIQ')
+    _magic = 'BLM1'
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self._num_hashes = max(1, int(round(float(self._num_bits) / capacity * math.log(2))))
+        self._bits = bytearray((self._num_bits + 7) // 8)
+        self._count = 0
+        self._lock = RLock()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        bits = self._bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, key):
+        """
+        Adds a string to the filter.
+
+        Arguments:
+            key (string): The string to add.
+
+        Returns:
+            True if the string was not in the filter before, or False if it may have been.
+        """
+        new = False
+        with self._lock:
+            bits = self._bits
+            for pos in self._positions(key):
+                mask = 1 << (pos & 7)
+                if not bits[pos >> 3] & mask:
+                    bits[pos >> 3] |= mask
+                    new = True
+            if new:
+                self._count += 1
+        return new
+
+    def clear(self):
+        """Removes every string."""
+        with self._lock:
+            self._bits = bytearray(len(self._bits))
+            self._count = 0
+
+    def stats(self):
+        """
+        Reports the usage of the filter.
+
+        Returns:
+            A dictionary of the filter's count, capacity, memory_bytes, hashes, error_rate, and the
+            current_error_rate expected from the strings added so far.
+        """
+        fill = 1 - math.exp(-float(self._num_hashes) * self._count / self._num_bits)
+        return {
+            'count': self._count,
+            'capacity': self.capacity,
+            'memory_bytes': len(self._bits),
+            'hashes': self._num_hashes,
+            'error_rate': self.error_rate,
+            'current_error_rate': fill ** self._num_hashes,
+        }
+
+    def save(self, path):
+        """
+        Writes a snapshot of the filter to a file, replacing the file in one step.
+
+        Arguments:
+            path (string): The path of the file.
+        """
+        # Each process writes its own temporary file, so two processes saving at once can't mix their writes
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with self._lock:
+            with open(tmp_path, 'wb') as f:
+                f.write(self._header.pack(self._magic, self.capacity, self.error_rate, self._num_bits,
+                                          self._num_hashes, self._count))
+                f.write(self._bits)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Windows will not rename over an existing file
+            os.remove(path)
+            os.rename(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a filter from a snapshot written by save.
+
+        Arguments:
+            path (string): The path of the file.
+
+        Returns:
+            The BloomFilter in the file.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(cls._header.size)
+            bits = bytearray(f.read())
+        magic, capacity, error_rate, num_bits, num_hashes, count = cls._header.unpack(header)
+        if magic != cls._magic or len(bits) != (num_bits + 7) // 8:
+            raise ValueError('%s is not a BloomFilter snapshot' % path)
+
+        bloom_filter = cls(capacity, error_rate)
+        bloom_filter._num_bits = num_bits
+        bloom_filter._num_hashes = num_hashes
+        bloom_filter._bits = bits
+        bloom_filter._count = count
+        return bloom_filter
+
+    def _positions(self, key):
+        # Double hashing: every position is derived from the two halves of one digest
+        if isinstance(key, unicode):
+            key = key.encode('utf-8')
+        h1, h2 = struct.unpack('<QQ', hashlib.md5(key).digest())
+        h2 |= 1
+        return [(h1 + i * h2) % self._num_bits for i in xrange(self._num_hashes)]
@@ -0,0 +1,29 @@
+#
+# backfill_regions.py
+# An executable script for finding the regions of organizations stored before regions were kept.
+#
+
+# stdlib imports
+import sys
+
+# project imports
+from HTResearch.DataAccess.connection import DBConnection
+from HTResearch.DataAccess.dto import OrganizationDTO
+from HTResearch.Utilities.regions import region_code
+
+
+# Organizations find their regions whenever they are saved, so this only needs to run once over the old ones.
+# Pass -a to redo every organization, such as after the region rules change.
+if __name__ == '__main__':
+    redo_all = '-a' in sys.argv[1:]
+    with DBConnection():
+        orgs = OrganizationDTO.objects if redo_all else OrganizationDTO.objects(region__exists=False)
+        count = 0
+        found = 0
+        for org in orgs.only('address'):
+            region = region_code(org.address)
+            OrganizationDTO.objects(id=org.id).update_one(set__region=region)
+            count += 1
+            if region is not None:
+                found += 1
+        print 'Found regions for %d of %d organizations' % (found, count)
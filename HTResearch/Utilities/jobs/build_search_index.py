@@ -0,0 +1,22 @@
+#
+# build_search_index.py
+# An executable script for indexing the text of documents stored before the search index existed.
+#
+
+# project imports
+from HTResearch.DataAccess.connection import DBConnection
+from HTResearch.DataAccess.dto import ContactDTO, OrganizationDTO, PublicationDTO, UserDTO
+
+
+# Documents index their text whenever they are saved, so this only needs to run once over the old ones
+if __name__ == '__main__':
+    with DBConnection():
+        for dto_class in [ContactDTO, OrganizationDTO, PublicationDTO, UserDTO]:
+            print 'Indexing %s' % dto_class._get_collection_name()
+            count = 0
+            for dto in dto_class.objects(search_terms__exists=False).exclude('search_words', 'search_terms'):
+                dto.clean()
+                dto_class.objects(id=dto.id).update_one(set__search_words=dto.search_words,
+                                                        set__search_terms=dto.search_terms)
+                count += 1
+            print 'Indexed %d documents' % count
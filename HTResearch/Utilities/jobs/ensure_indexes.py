@@ -0,0 +1,28 @@
+#
+# ensure_indexes.py
+# An executable script for building the indexes declared on the DTOs.
+#
+
+# stdlib imports
+import sys
+
+# project imports
+from HTResearch.DataAccess.indexes import ensure_indexes, index_report
+
+
+def _print_report(report):
+    for entry in report:
+        print '%s: %d declared' % (entry['collection'], len(entry['declared']))
+        for key in entry['missing']:
+            print '    missing     %s' % (key,)
+        for key in entry['undeclared']:
+            print '    undeclared  %s' % (key,)
+
+
+# Run with -r to only report which indexes are missing
+if __name__ == '__main__':
+    if '-r' in sys.argv:
+        _print_report(index_report())
+    else:
+        print 'Building missing indexes in the background'
+        _print_report(ensure_indexes())
@@ -0,0 +1,99 @@
+#
+# regions.py
+# A module for finding which state or union territory of India an address is in.
+#
+
+# stdlib imports
+import re
+
+#region Globals
+# Region codes (ISO 3166-2:IN), with the names they are shown by and any other names found in addresses
+REGIONS = [
+    ('UP', 'Uttar Pradesh', []),
+    ('MH', 'Maharashtra', []),
+    ('BR', 'Bihar', []),
+    ('WB', 'West Bengal', []),
+    ('AP', 'Andhra Pradesh', []),
+    ('MP', 'Madhya Pradesh', []),
+    ('TN', 'Tamil Nadu', []),
+    ('RJ', 'Rajasthan', []),
+    ('KA', 'Karnataka', []),
+    ('GJ', 'Gujarat', []),
+    ('OR', 'Odisha', ['Orissa']),
+    ('KL', 'Kerala', []),
+    ('JH', 'Jharkhand', []),
+    ('AS', 'Assam', []),
+    ('PB', 'Punjab', []),
+    ('CT', 'Chhattisgarh', ['Chattisgarh']),
+    ('HR', 'Haryana', []),
+    ('JK', 'Jammu and Kashmir', ['Jammu & Kashmir']),
+    ('UT', 'Uttarakhand', ['Uttaranchal']),
+    ('HP', 'Himachal Pradesh', []),
+    ('TR', 'Tripura', []),
+    ('ML', 'Meghalaya', []),
+    ('MN', 'Manipur', []),
+    ('NL', 'Nagaland', []),
+    ('GA', 'Goa', []),
+    ('AR', 'Arunachal Pradesh', []),
+    ('MZ', 'Mizoram', []),
+    ('SK', 'Sikkim', []),
+    ('DL', 'Delhi', []),
+    ('PY', 'Puducherry', ['Pondicherry']),
+    ('CH', 'Chandigarh', []),
+    ('AN', 'Andaman and Nicobar Islands', ['Andaman', 'Nicobar Islands']),
+    ('DN', 'Dadra and Nagar Haveli', ['Dadra', 'Nagar Haveli']),
+    ('DD', 'Daman and Diu', ['Daman', 'Diu']),
+    ('LD', 'Lakshadweep', []),
+]
+REGION_NAMES = dict((code, name) for code, name, aliases in REGIONS)
+
+# Regions by the first digits of their PIN codes. The longest matching prefix wins; a few prefixes are shared by
+# neighbouring regions and go to the one with most of their post offices.
+PIN_PREFIXES = {
+    '11': 'DL', '12': 'HR', '13': 'HR', '14': 'PB', '15': 'PB', '16': 'PB', '160': 'CH', '17': 'HP',
+    '18': 'JK', '19': 'JK', '20': 'UP', '21': 'UP', '22': 'UP', '23': 'UP', '24': 'UP', '246': 'UT',
+    '248': 'UT', '249': 'UT', '25': 'UP', '26': 'UP', '262': 'UT', '263': 'UT', '27': 'UP', '28': 'UP',
+    '30': 'RJ', '31': 'RJ', '32': 'RJ', '33': 'RJ', '34': 'RJ', '36': 'GJ', '37': 'GJ', '38': 'GJ', '39': 'GJ',
+    '40': 'MH', '403': 'GA', '41': 'MH', '42': 'MH', '43': 'MH', '44': 'MH', '45': 'MP', '46': 'MP', '47': 'MP',
+    '48': 'MP', '49': 'CT', '50': 'AP', '51': 'AP', '52': 'AP', '53': 'AP', '56': 'KA', '57': 'KA', '58': 'KA',
+    '59': 'KA', '60': 'TN', '605': 'PY', '61': 'TN', '62': 'TN', '63': 'TN', '64': 'TN', '67': 'KL', '68': 'KL',
+    '69': 'KL', '70': 'WB', '71': 'WB', '72': 'WB', '73': 'WB', '737': 'SK', '74': 'WB', '744': 'AN',
+    '75': 'OR', '76': 'OR', '77': 'OR', '78': 'AS', '790': 'AR', '791': 'AR', '792': 'AR', '793': 'ML',
+    '794': 'ML', '795': 'MN', '796': 'MZ', '797': 'NL', '798': 'NL', '799': 'TR', '80': 'BR', '81': 'BR',
+    '814': 'JH', '815': 'JH', '816': 'JH', '82': 'BR', '822': 'JH', '825': 'JH', '826': 'JH', '827': 'JH',
+    '828': 'JH', '829': 'JH', '83': 'JH', '84': 'BR', '85': 'BR',
+}
+
+_NAME_PATTERNS = [(code, re.compile(r'\b(?:%s)\b' % '|'.join(re.escape(n) for n in [name] + aliases), re.I))
+                  for code, name, aliases in REGIONS]
+# PIN codes are six digits, sometimes written as two groups of three
+_PIN = re.compile(r'(?<!\d)(\d{3}) ?(\d{3})(?!\d)')
+#endregion
+
+
+def region_code(address):
+    """
+    Finds the region of India an address is in, by the last region named in it, or else by its PIN code. Addresses
+    end with their region, so a region named earlier on is most likely part of a street or building name.
+
+    Arguments:
+        address (string): The address.
+
+    Returns:
+        The region's code, or None if the address is empty or its region is not known.
+    """
+    if not address:
+        return None
+    last = None
+    for code, pattern in _NAME_PATTERNS:
+        for match in pattern.finditer(address):
+            if last is None or match.start() > last[0]:
+                last = (match.start(), code)
+    if last is not None:
+        return last[1]
+    for match in _PIN.finditer(address):
+        pin = match.group(1) + match.group(2)
+        for length in (3, 2):
+            if pin[:length] in PIN_PREFIXES:
+                return PIN_PREFIXES[pin[:length]]
+    return None
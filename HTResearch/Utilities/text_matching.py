@@ -0,0 +1,167 @@
+#
+# text_matching.py
+# A module for finding many dictionary words in text at once.
+#
+
+# stdlib imports
+from collections import deque
+
+
+class DictionaryMatcher(object):
+    """
+    An Aho-Corasick automaton that finds every occurrence of a dictionary of patterns
+    in a single linear pass over a text.
+
+    Attributes:
+        patterns (string[]): The distinct patterns, in the order they were listed.
+        whole_words (boolean): Whether matches must be bounded by non-alphanumeric characters.
+        ignore_case (boolean): Whether patterns and text are compared case-insensitively.
+    """
+
+    def __init__(self, patterns, whole_words=False, ignore_case=False):
+        """
+        Builds the automaton.
+
+        Arguments:
+            patterns (string[]): The patterns to search for. Empty patterns are ignored.
+            whole_words (boolean): Whether matches must be bounded by non-alphanumeric characters.
+            ignore_case (boolean): Whether to compare patterns and text case-insensitively.
+        """
+        self.whole_words = whole_words
+        self.ignore_case = ignore_case
+        self.patterns = []
+        self._order = {}
+
+        # Trie transitions, failure links and the patterns ending at each state
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pattern in patterns:
+            key = self._normalize(pattern)
+            if not key or key in self._order:
+                continue
+            self._order[key] = len(self.patterns)
+            self.patterns.append(pattern)
+            self._add(key, pattern)
+
+        self._link()
+
+    def __contains__(self, word):
+        return self._normalize(word) in self._order
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __iter__(self):
+        return iter(self.patterns)
+
+    def _normalize(self, text):
+        return text.lower() if self.ignore_case else text
+
+    def _add(self, key, pattern):
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(pattern)
+
+    def _link(self):
+        # Breadth-first, so a state's failure link is always resolved before its children's
+        queue = deque(self._goto[0].itervalues())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].iteritems():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def index(self, pattern):
+        """
+        Returns the position a pattern was listed at.
+
+        Arguments:
+            pattern (string): A pattern of the dictionary.
+
+        Returns:
+            The index of the pattern, or -1 if it is not in the dictionary.
+        """
+        return self._order.get(self._normalize(pattern), -1)
+
+    def find_all(self, text):
+        """
+        Finds every occurrence of every pattern in a text, including overlapping ones.
+
+        Arguments:
+            text (string): The text to search.
+
+        Returns:
+            A generator of (start, end, pattern) tuples in the order their ends appear in the text.
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        key = self._normalize(text)
+        length = len(key)
+
+        state = 0
+        for i, char in enumerate(key):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in out[state]:
+                start = i + 1 - len(pattern)
+                if self.whole_words and ((start > 0 and key[start - 1].isalnum()) or
+                                         (i + 1 < length and key[i + 1].isalnum())):
+                    continue
+                yield start, i + 1, pattern
+
+    def search(self, text):
+        """
+        Finds the first occurrence of any pattern in a text.
+
+        Arguments:
+            text (string): The text to search.
+
+        Returns:
+            A (start, end, pattern) tuple, or None if nothing matched.
+        """
+        for match in self.find_all(text):
+            return match
+        return None
+
+    def matches(self, text):
+        """
+        Finds the distinct patterns that occur in a text.
+
+        Arguments:
+            text (string): The text to search.
+
+        Returns:
+            A set of the patterns found.
+        """
+        return set(pattern for start, end, pattern in self.find_all(text))
+
+    def first_listed(self, text):
+        """
+        Finds the earliest-listed pattern that occurs in a text.
+
+        Arguments:
+            text (string): The text to search.
+
+        Returns:
+            The pattern, or None if nothing matched.
+        """
+        found = self.matches(text)
+        if not found:
+            return None
+        return min(found, key=self.index)
@@ -9,6 +9,7 @@ import os
 from urlparse import urlparse
 
 # project imports
+from data_structures import LRUCache
 from logutil import get_logger, LoggingSection
 from types import Singleton
 
@@ -21,13 +22,43 @@ class UrlUtility:
     """A class for parsing and interacting with URLs."""
     __metaclass__ = Singleton
 
+    # The effective TLD rules, as a set for constant-time lookups
     tlds = None
 
+    # Registered domains of recently seen hosts (None if the host has no known TLD)
+    domain_cache = LRUCache(max_size=50000)
+
     @staticmethod
     def _populate_tlds():
         with open(
                 os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources/effective_tld_names.dat.txt')) as f:
-            UrlUtility.tlds = [line.strip().decode('utf-8') for line in f if line[0] not in "/\n"]
+            UrlUtility.tlds = frozenset(line.strip().decode('utf-8') for line in f if line[0] not in "/\n")
+
+    @staticmethod
+    def _registered_domain(host):
+        """Finds the registered domain of a host, or None if it has no known TLD."""
+        tlds = UrlUtility.tlds
+        url_elements = host.split('.')
+        # url_elements = ["domain", "co", "uk"]
+
+        for i in range(-len(url_elements), 0):
+            last_i_elements = url_elements[i:]
+            #    i=-3: ["domain", "co", "uk"]
+            #    i=-2: ["co", "uk"]
+            #    i=-1: ["uk"]
+
+            candidate = ".".join(last_i_elements)  # domain.co.uk, co.uk, uk
+            wildcard_candidate = ".".join(["*"] + last_i_elements[1:])  # *.co.uk, *.uk
+            exception_candidate = "!" + candidate
+
+            # match tlds
+            if exception_candidate in tlds:
+                return ".".join(url_elements[i:])
+            if candidate in tlds or wildcard_candidate in tlds:
+                return ".".join(url_elements[i - 1:])
+                # returns domain.co.uk
+
+        return None
 
     @staticmethod
     def get_domain(url, no_exception=True):
@@ -50,29 +81,57 @@ class UrlUtility:
         elements = urlparse(url)
         if elements[1] is None or len(elements[1]) == 0:
             elements = urlparse('//' + url)
-        url_elements = elements[1].split('.')
-        # url_elements = ["domain", "co", "uk"]
+        host = elements[1]
 
-        for i in range(-len(url_elements), 0):
-            last_i_elements = url_elements[i:]
-            #    i=-3: ["domain", "co", "uk"]
-            #    i=-2: ["co", "uk"]
-            #    i=-1: ["uk"]
-
-            candidate = ".".join(last_i_elements)  # domain.co.uk, co.uk, uk
-            wildcard_candidate = ".".join(["*"] + last_i_elements[1:])  # *.co.uk, *.uk
-            exception_candidate = "!" + candidate
+        domain = UrlUtility.domain_cache.get(host, default=False)
+        if domain is False:
+            domain = UrlUtility._registered_domain(host)
+            UrlUtility.domain_cache.put(host, domain)
 
-            # match tlds
-            if exception_candidate in UrlUtility.tlds:
-                return ".".join(url_elements[i:])
-            if candidate in UrlUtility.tlds or wildcard_candidate in UrlUtility.tlds:
-                return ".".join(url_elements[i - 1:])
-                # returns domain.co.uk
+        if domain is not None:
+            return domain
 
         if no_exception:
             return url
         else:
             msg = "Domain for URL=%s not in global list of TLDs" % url
             logger.error(msg)
-            raise ValueError(msg)
\ No newline at end of file
+            raise ValueError(msg)
+
+    @staticmethod
+    def domain_cache_stats():
+        """
+        Reports how well get_domain's host cache is working.
+
+        Returns:
+            A dictionary of the cache's hits, misses, size and max_size.
+        """
+        return UrlUtility.domain_cache.stats()
+
+
+class DomainSet(object):
+    """A set of domains that also contains their subdomains, e.g. www.facebook.com for facebook.com."""
+
+    def __init__(self, domains):
+        """
+        Constructs a new DomainSet instance.
+
+        Arguments:
+            domains (string[]): The domains in the set.
+        """
+        self._domains = frozenset(domain.strip().lower() for domain in domains if domain.strip())
+
+    def __contains__(self, host):
+        # Check the host and each of its parent domains, so a lookup costs one set probe per label
+        host = host.lower().split(':', 1)[0]
+        while host:
+            if host in self._domains:
+                return True
+            host = host.partition('.')[2]
+        return False
+
+    def __len__(self):
+        return len(self._domains)
+
+    def __iter__(self):
+        return iter(self._domains)
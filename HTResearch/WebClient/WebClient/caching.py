@@ -0,0 +1,201 @@
+#
+# caching.py
+# A module for caching expensive payloads in the shared cache, rebuilding each in only one process at a time.
+#
+
+# stdlib imports
+from datetime import datetime
+from django.core.cache import cache
+import errno
+import os
+import time
+
+# project imports
+from HTResearch.Utilities.logutil import LoggingSection, get_logger
+
+#region Globals
+logger = get_logger(LoggingSection.CLIENT, __name__)
+# How long a process may hold the lock on a key before the others assume it died, in seconds
+LOCK_TIMEOUT = 300
+# How often a process waiting for another one to build a value checks on it, in seconds
+POLL_INTERVAL = 0.25
+#endregion
+
+
+def get_cached(key, max_age, build):
+    """
+    Gets a value from the shared cache, building it if it is missing or older than max_age.
+
+    Only one process builds a key at a time. While it does, the others get the stale value, or, if nothing is
+    cached yet, wait for as long as it holds the lock. If it gives up the lock without storing a value, or its
+    lock goes stale, one of the waiting processes builds the value instead. A value that fails to build is served
+    stale, if there is one.
+
+    Arguments:
+        key (string): The cache key.
+        max_age (timedelta): How long the value is fresh for.
+        build (function): Builds the value. Called with no arguments.
+
+    Returns:
+        The cached or built value.
+    """
+    entry = cache.get(key)
+    if entry is not None and datetime.utcnow() - entry[1] <= max_age:
+        return entry[0]
+
+    lock = KeyLock(key)
+    if lock.acquire():
+        return _build_locked(key, lock, entry, build)
+
+    if entry is not None:
+        # Another process is rebuilding it
+        return entry[0]
+
+    # Nothing to serve, so wait on the process building it rather than pile onto the database as well
+    while True:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if lock.acquire():
+            entry = cache.get(key)
+            if entry is not None:
+                # It was stored just before the lock was released
+                lock.release()
+                return entry[0]
+            # The other process failed or died, so take over
+            logger.warn('No other process is building {0}, building it here'.format(key))
+            return _build_locked(key, lock, None, build)
+
+
+def _build_locked(key, lock, entry, build):
+    # Build a value under its lock, falling back on the stale entry, if there is one
+    try:
+        value = build()
+        set_cached(key, value)
+        return value
+    except:
+        if entry is None:
+            raise
+        logger.exception('Failed to rebuild {0}, serving the stale value'.format(key))
+        return entry[0]
+    finally:
+        lock.release()
+
+
+def set_cached(key, value):
+    """
+    Stores a freshly built value in the shared cache.
+
+    Arguments:
+        key (string): The cache key.
+        value (object): The value.
+    """
+    cache.set(key, (value, datetime.utcnow()))
+
+
+def refresh_cached(key, build):
+    """
+    Rebuilds a value in the shared cache, unless another process is already rebuilding it.
+
+    Arguments:
+        key (string): The cache key.
+        build (function): Builds the value. Called with no arguments.
+
+    Returns:
+        Whether the value was rebuilt.
+    """
+    lock = KeyLock(key)
+    if not lock.acquire():
+        return False
+    try:
+        set_cached(key, build())
+    finally:
+        lock.release()
+    return True
+
+
+def cached_age(key, now=None):
+    """
+    Finds how long ago a value in the shared cache was built.
+
+    Arguments:
+        key (string): The cache key.
+        now (datetime): The current UTC time. Defaults to the system's.
+
+    Returns:
+        A timedelta, or None if nothing is cached for the key.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    return (now or datetime.utcnow()) - entry[1]
+
+
+class KeyLock(object):
+    """
+    A lock on building one cache key, shared by the processes using the cache.
+
+    With the file-based cache, the lock is a file beside the cache's directory, which only one process can
+    create. With other caches it is a key added to the cache, which is atomic for memcached.
+    """
+
+    def __init__(self, key):
+        self.key = 'lock:' + key
+        self._path = None
+        cache_dir = getattr(cache, '_dir', None)
+        if cache_dir is not None:
+            # Kept out of the cache's directory, where culling could delete them
+            lock_dir = cache_dir.rstrip(os.sep) + '_locks'
+            self._path = os.path.join(lock_dir, cache.make_key(self.key).replace(':', '_'))
+        self._held = False
+
+    def acquire(self):
+        """
+        Takes the lock if no other process holds it, without waiting.
+
+        Returns:
+            Whether the lock was taken.
+        """
+        if self._path is None:
+            self._held = cache.add(self.key, os.getpid(), LOCK_TIMEOUT)
+        else:
+            self._held = self._create_lock_file()
+        return self._held
+
+    def release(self):
+        """Releases the lock, if it was taken."""
+        if not self._held:
+            return
+        self._held = False
+        if self._path is None:
+            cache.delete(self.key)
+        else:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+    def _create_lock_file(self):
+        lock_dir = os.path.dirname(self._path)
+        if not os.path.exists(lock_dir):
+            try:
+                os.makedirs(lock_dir)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+        for attempt in range(2):
+            try:
+                os.close(os.open(self._path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            # Break a lock left behind by a process that died while holding it
+            try:
+                if time.time() - os.path.getmtime(self._path) < LOCK_TIMEOUT:
+                    return False
+                os.remove(self._path)
+            except OSError:
+                pass
+        return False
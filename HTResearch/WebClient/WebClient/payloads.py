@@ -0,0 +1,246 @@
+#
+# payloads.py
+# A module for building the dashboard payloads the API views serve from the shared cache.
+#
+
+# stdlib imports
+from datetime import datetime, timedelta
+from springpython.context import ApplicationContext
+import time
+
+# project imports
+from HTResearch.DataModel.enums import OrgTypesEnum
+from HTResearch.Utilities.context import DAOContext
+from HTResearch.Utilities.encoder import MongoJSONEncoder
+from HTResearch.Utilities.logutil import LoggingSection, get_logger
+from HTResearch.Utilities.regions import REGION_NAMES
+from HTResearch.WebClient.WebClient.caching import cached_age, get_cached, refresh_cached
+
+#region Globals
+logger = get_logger(LoggingSection.CLIENT, __name__)
+ctx = ApplicationContext(DAOContext())
+REFRESH_COORDS_LIST = timedelta(minutes=5)
+REFRESH_PARTNER_MAP = timedelta(minutes=20)
+REFRESH_ORG_BREAKDOWN = timedelta(minutes=20)
+REFRESH_COUNT = timedelta(minutes=20)
+# How long the worker waits to try a payload again after failing to rebuild it, or finding another process at it
+RETRY_DELAY = timedelta(seconds=30)
+# The (least, most, label) numbers of members the organization breakdown counts organizations by
+MEMBER_RANGES = [(1, 3, '1-3'), (4, 6, '4-6'), (7, 9, '7-9'), (10, None, '10+')]
+#endregion
+
+
+def get_payload(key):
+    """
+    Gets a payload from the shared cache. Payloads are kept fresh by run_worker, so a view only builds one if
+    the worker is not running.
+
+    Arguments:
+        key (string): The payload's cache key, from PAYLOADS.
+
+    Returns:
+        The payload.
+    """
+    refresh, build = PAYLOADS[key]
+    return get_cached(key, refresh, build)
+
+
+def refresh_payloads(force=False):
+    """
+    Rebuilds the payloads that are due once (see PayloadRefresher).
+
+    Arguments:
+        force (bool): Whether to rebuild every payload.
+
+    Returns:
+        The number of seconds until the next payload is due.
+    """
+    return PayloadRefresher().refresh(force)
+
+
+def run_worker():
+    """Keeps every payload fresh, rebuilding each as it comes due. Does not return."""
+    logger.info('Payload worker started')
+    refresher = PayloadRefresher()
+    while True:
+        time.sleep(refresher.refresh())
+
+
+class PayloadRefresher(object):
+    """
+    Rebuilds payloads as they come due: when they are missing from the cache, or past half of their refresh period,
+    so they are replaced well before a view would find them stale.
+
+    A payload that fails to rebuild, or that another process is rebuilding, is looked at again after RETRY_DELAY.
+    """
+
+    def __init__(self, payloads=None, clock=datetime.utcnow):
+        """
+        Constructs a new PayloadRefresher instance.
+
+        Arguments:
+            payloads (dict): The (refresh period, builder) of each payload by cache key. Defaults to PAYLOADS.
+            clock (function): Returns the current UTC time.
+        """
+        self.payloads = payloads if payloads is not None else PAYLOADS
+        self._clock = clock
+        self._retry_at = {}
+
+    def refresh(self, force=False):
+        """
+        Rebuilds the payloads that are due.
+
+        Arguments:
+            force (bool): Whether to rebuild every payload.
+
+        Returns:
+            The number of seconds until the next payload is due.
+        """
+        now = self._clock()
+        next_due = None
+        for key, (refresh, build) in self.payloads.iteritems():
+            due_at = self._due_at(key, refresh / 2, now)
+            if force or due_at <= now:
+                rebuilt = False
+                try:
+                    rebuilt = refresh_cached(key, build)
+                except Exception:
+                    logger.exception('Failed to rebuild payload {0}'.format(key))
+                if rebuilt:
+                    logger.info('Rebuilt payload {0}'.format(key))
+                    due_at = now + refresh / 2
+                else:
+                    # Come back soon to see whether it needs another try
+                    due_at = self._retry_at[key] = now + RETRY_DELAY
+            next_due = due_at if next_due is None else min(next_due, due_at)
+        if next_due is None:
+            return 1.0
+        return max((next_due - now).total_seconds(), 1.0)
+
+    def _due_at(self, key, due, now):
+        retry_at = self._retry_at.get(key)
+        if retry_at is not None and now < retry_at:
+            return retry_at
+        self._retry_at.pop(key, None)
+        age = cached_age(key, now)
+        return now if age is None else now + due - age
+
+
+def build_heatmap_coordinates():
+    """Builds the lat/long coordinates of every organization, encoded in JSON."""
+    org_dao = ctx.get_object('OrganizationDAO')
+    organizations = org_dao.findmany(latlng__exists=True, latlng__ne=[], only=['latlng'])
+    return MongoJSONEncoder().encode([org.latlng for org in organizations])
+
+
+def count_organizations():
+    """Counts the organizations."""
+    return ctx.get_object('OrganizationDAO').count()
+
+
+def count_contacts():
+    """Counts the contacts and users."""
+    return ctx.get_object('ContactDAO').count() + ctx.get_object('UserDAO').count()
+
+
+def count_publications():
+    """Counts the publications."""
+    return ctx.get_object('PublicationDAO').count()
+
+
+def build_partner_map():
+    """Builds the nodes and links of the organization partner map, encoded in JSON."""
+    new_pmap = {
+        "nodes": [],
+        "links": [],
+        "types": {
+            'ADVOCACY': OrgTypesEnum.ADVOCACY,
+            'EDUCATION': OrgTypesEnum.EDUCATION,
+            'GOVERNMENT': OrgTypesEnum.GOVERNMENT,
+            'NGO': OrgTypesEnum.NGO,
+            "PREVENTION": OrgTypesEnum.PREVENTION,
+            "PROTECTION": OrgTypesEnum.PROTECTION,
+            "PROSECUTION": OrgTypesEnum.PROSECUTION,
+            'RELIGIOUS': OrgTypesEnum.RELIGIOUS,
+            'RESEARCH': OrgTypesEnum.RESEARCH,
+            'UNKNOWN': OrgTypesEnum.UNKNOWN
+        }
+    }
+    org_dao = ctx.get_object('OrganizationDAO')
+    organizations = org_dao.all('name', 'id', 'partners', 'types', 'address')
+    i = 0
+    for org in organizations:
+        new_pmap["nodes"].append({
+            "name": org.name,
+            "id": str(org.id),
+            "types": org.types,
+            "addr": org.address
+        })
+        for part in org.partners:
+            partner_id = str(part.id)
+            for j in xrange(0, i):
+                if new_pmap["nodes"][j]["id"] == partner_id:
+                    new_pmap["links"].append({
+                       "source": i,
+                       "target": j
+                    })
+
+        i += 1
+
+    return MongoJSONEncoder().encode(new_pmap)
+
+
+def build_org_breakdowns():
+    """
+    Builds the organization counts by region, by type and by number of members, with an aggregation each.
+
+    Returns:
+        A { 'region', 'type', 'members' } dictionary, each with the 'categories' counted, the 'total' number of
+        organizations and the 'total_known' number counted in a category.
+    """
+    org_dao = ctx.get_object('OrganizationDAO')
+    total = org_dao.count()
+    by_region = org_dao.count_by_region()
+    by_type = org_dao.count_by_type()
+    by_contacts = org_dao.count_by_contacts()
+
+    region_results = [{'label': REGION_NAMES.get(code, code), 'value': count}
+                      for code, count in by_region.iteritems()]
+
+    type_results = []
+    for i in range(len(OrgTypesEnum.mapping)):
+        type_results.append({
+            'label': OrgTypesEnum.reverse_mapping[i].lower(),
+            'value': by_type.get(i, 0),
+        })
+    # Sort results by value and put unknown at end
+    type_results = sorted(type_results, key=lambda x: x['value'], reverse=True)
+    type_results = sorted(type_results, key=lambda x: 1 if x['label'] == 'unknown' else 0)
+
+    member_results = []
+    for low, high, label in MEMBER_RANGES:
+        member_results.append({
+            'label': label,
+            'value': sum(count for members, count in by_contacts.iteritems()
+                         if members >= low and (high is None or members <= high)),
+        })
+
+    breakdowns = {}
+    for key, results in (('region', region_results), ('type', type_results), ('members', member_results)):
+        breakdowns[key] = {
+            'categories': results,
+            'total': total,
+            'total_known': sum(result['value'] for result in results),
+        }
+    return breakdowns
+
+
+# The payloads by cache key, with how long each is fresh for and its builder
+PAYLOADS = {
+    'organization_coords_list': (REFRESH_COORDS_LIST, build_heatmap_coordinates),
+    'organization_count': (REFRESH_COUNT, count_organizations),
+    'contact_count': (REFRESH_COUNT, count_contacts),
+    'publication_count': (REFRESH_COUNT, count_publications),
+    'partner_map': (REFRESH_PARTNER_MAP, build_partner_map),
+    'org_breakdowns': (REFRESH_ORG_BREAKDOWN, build_org_breakdowns),
+}
@@ -1,4 +1,5 @@
 import os.path
+import tempfile
 import mongoengine
 from HTResearch.Utilities.config import get_config_value
 # Django settings for HTResearch.WebClient project.
@@ -115,9 +116,15 @@ MIDDLEWARE_CLASSES = (
     # 'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
 
+# A cache shared by every worker process, so each cached payload is built once rather than once per worker, and
+# survives restarts. The CACHE section of htconfig can point it elsewhere, such as at a memcached socket with
+# backend = django.core.cache.backends.memcached.MemcachedCache and location = unix:/tmp/memcached.sock
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': get_config_value("CACHE", "backend") or 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': get_config_value("CACHE", "location") or os.path.join(tempfile.gettempdir(), 'htresearch_cache'),
+        # Payloads are refreshed by age (see caching.get_cached), and stale ones are served while they are rebuilt
+        'TIMEOUT': 60 * 60 * 24 * 7,
     }
 }
 
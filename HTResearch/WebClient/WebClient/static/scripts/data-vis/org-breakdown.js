@@ -108,7 +108,7 @@ define(['jquery', 'd3', 'underscore'], function($, d3, _) {
             element.prepend(info2).prepend(info1).append(title);
         }
 
-        $.get('/api/orgs-by-region/', function(data) {
+        function showRegions(data) {
             // If no organizations, indicate empty
             var categories = data.total ? data.categories : emptyCategory;
 
@@ -170,8 +170,9 @@ define(['jquery', 'd3', 'underscore'], function($, d3, _) {
                 });
 
             addBreakdownHtml(element, 'Region');
-        });
-        $.get('/api/orgs-by-type/', function(data) {
+        }
+
+        function showTypes(data) {
             // If no organizations, indicate empty
             var categories = data.total ? data.categories : emptyCategory;
 
@@ -255,8 +256,9 @@ define(['jquery', 'd3', 'underscore'], function($, d3, _) {
                 });
 
             addBreakdownHtml(element, 'Type');
-        });
-        $.get('/api/orgs-by-members/', function(data) {
+        }
+
+        function showMembers(data) {
             // If no organizations, indicate empty
             var categories = data.total ? data.categories : emptyCategory;
 
@@ -318,6 +320,13 @@ define(['jquery', 'd3', 'underscore'], function($, d3, _) {
                 });
 
             addBreakdownHtml(element, 'Members');
+        }
+
+        // All three breakdowns come from one request
+        $.get('/api/org-breakdowns/', function(breakdowns) {
+            showRegions(breakdowns.region);
+            showTypes(breakdowns.type);
+            showMembers(breakdowns.members);
         });
     }
 
@@ -16,6 +16,7 @@ urlpatterns = patterns('HTResearch.WebClient.WebClient.views.api_views',
                        url(r'^api/orgs-by-region/$', 'orgs_by_region', name='orgs-by-region'),
                        url(r'^api/orgs-by-type/$', 'orgs_by_type', name='orgs-by-type'),
                        url(r'^api/orgs-by-members/$', 'orgs_by_members', name='orgs-by-members'),
+                       url(r'^api/org-breakdowns/$', 'org_breakdowns', name='org-breakdowns'),
                        url(r'^api/org-count/$', 'org_count', name='org-count'),
                        url(r'^api/contact-count/$', 'contact_count', name='contact-count'),
                        url(r'^api/pub-count/$', 'pub_count', name='pub-count'),)
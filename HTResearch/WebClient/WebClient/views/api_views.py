@@ -1,24 +1,29 @@
 # stdlib imports
 import json
-from datetime import datetime, timedelta
-from django.core.cache import cache
-from django.http import HttpResponse, HttpResponseNotAllowed, HttpResponseServerError
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseServerError
 from springpython.context import ApplicationContext
 
 # project imports
-from HTResearch.DataModel.enums import OrgTypesEnum
+from HTResearch.DataAccess.dao import reference_id
+from HTResearch.DataAccess.pagination import InvalidCursorError
 from HTResearch.Utilities.context import DAOContext
 from HTResearch.Utilities.logutil import LoggingSection, get_logger
 from HTResearch.Utilities.encoder import MongoJSONEncoder
 from HTResearch.Utilities import decorators
+from HTResearch.WebClient.WebClient.payloads import get_payload
 
 #region Globals
 logger = get_logger(LoggingSection.CLIENT, __name__)
 ctx = ApplicationContext(DAOContext())
-REFRESH_COORDS_LIST = timedelta(minutes=5)
-REFRESH_PARTNER_MAP = timedelta(minutes=20)
-REFRESH_ORG_BREAKDOWN = timedelta(minutes=20)
-REFRESH_COUNT = timedelta(minutes=20)
+MAX_PAGE_SIZE = 200
+# The fields each view's JSON is built from. Documents are loaded with only these, leaving out the rest (such as
+# the page_rank_info of organizations, which holds every page linking to them).
+ORG_SEARCH_FIELDS = ['name', 'organization_url', 'phone_numbers', 'emails', 'address', 'latlng', 'types', 'keywords']
+CONTACT_SEARCH_FIELDS = ['first_name', 'last_name', 'email', 'phones', 'position', 'publications', 'organization',
+                         'content_weight']
+USER_SEARCH_FIELDS = ['first_name', 'last_name', 'email', 'background', 'organization', 'content_weight']
+PUB_SEARCH_FIELDS = ['title', 'authors', 'publisher', 'publication_date', 'content_url']
+LINKED_ORG_FIELDS = ['name', 'types']
 #endregion
 
 
@@ -33,27 +38,11 @@ def heatmap_coordinates(request):
     if request.method != 'GET':
         return HttpResponseNotAllowed(request)
 
-    coords = cache.get('organization_coords_list')
-    last_update = cache.get('organization_coords_list_last_update')
-    if not coords or not last_update or (datetime.utcnow() - last_update > REFRESH_COORDS_LIST):
-        new_coords = []
-        cache.set('organization_address_list_last_update', datetime.utcnow())
-        ctx = ApplicationContext(DAOContext())
-        org_dao = ctx.get_object('OrganizationDAO')
-
-        try:
-            organizations = org_dao.findmany(latlng__exists=True, latlng__ne=[])
-        except:
-            logger.error('Error occurred on organization lookup')
-            return HttpResponseServerError(request)
-
-        for org in organizations:
-            new_coords.append(org.latlng)
-
-        coords = MongoJSONEncoder().encode(new_coords)
-
-        if len(coords) > 0:
-            cache.set('organization_coords_list', coords)
+    try:
+        coords = get_payload('organization_coords_list')
+    except:
+        logger.error('Error occurred on organization lookup')
+        return HttpResponseServerError(request)
 
     return HttpResponse(coords, content_type="application/json")
 
@@ -70,22 +59,11 @@ def org_count(request):
 
     logger.info('Publication count request made by user {0}'.format(user_id))
 
-    # Cache organization count
-    count = cache.get('organization_count')
-    last_update = cache.get('organization_count_last_update')
-    if not count or not last_update or (datetime.utcnow() - last_update > REFRESH_COUNT):
-
-        cache.set('organization_count_last_update', datetime.utcnow())
-
-        org_dao = ctx.get_object('OrganizationDAO')
-        count = ''
-        try:
-            count = org_dao.count()
-        except:
-            logger.error('Exception encountered on organziation count by user={0}'.format(user_id))
-            return HttpResponseServerError(request)
-
-        cache.set('organization_count', count)
+    try:
+        count = get_payload('organization_count')
+    except:
+        logger.error('Exception encountered on organziation count by user={0}'.format(user_id))
+        return HttpResponseServerError(request)
 
     data = {
         'count': count
@@ -106,33 +84,11 @@ def contact_count(request):
 
     logger.info('Contact count request made by user {0}'.format(user_id))
 
-    # Cache contact count
-    count = cache.get('contact_count')
-    last_update = cache.get('contact_count_last_update')
-    if not count or not last_update or (datetime.utcnow() - last_update > REFRESH_COUNT):
-
-        cache.set('contact_count_last_update', datetime.utcnow())
-
-        contact_dao = ctx.get_object('ContactDAO')
-        user_dao = ctx.get_object('UserDAO')
-
-        contacts_count = 0
-        user_count = 0
-        try:
-            contacts_count = contact_dao.count()
-        except:
-            logger.error('Exception encountered on contact count by user={0}'.format(user_id))
-            return HttpResponseServerError(request)
-
-        try:
-            user_count = user_dao.count()
-        except:
-            logger.error('Exception encountered on user count by user={0}'.format(user_id))
-            return HttpResponseServerError(request)
-
-        count = contacts_count + user_count
-
-        cache.set('contact_count', count)
+    try:
+        count = get_payload('contact_count')
+    except:
+        logger.error('Exception encountered on contact count by user={0}'.format(user_id))
+        return HttpResponseServerError(request)
 
     data = {
         'count': count
@@ -153,22 +109,11 @@ def pub_count(request):
 
     logger.info('Publication count request made by user {0}'.format(user_id))
 
-    # Cache publication count
-    count = cache.get('publication_count')
-    last_update = cache.get('publication_count_last_update')
-    if not count or not last_update or (datetime.utcnow() - last_update > REFRESH_COUNT):
-
-        cache.set('publication_count_last_update', datetime.utcnow())
-
-        pub_dao = ctx.get_object('PublicationDAO')
-
-        try:
-            count = pub_dao.count()
-        except:
-            logger.error('Exception encountered on publication count by user={0}'.format(user_id))
-            return HttpResponseServerError(request)
-
-        cache.set('publication_count', count)
+    try:
+        count = get_payload('publication_count')
+    except:
+        logger.error('Exception encountered on publication count by user={0}'.format(user_id))
+        return HttpResponseServerError(request)
 
     data = {
         'count': count
@@ -189,65 +134,23 @@ def org_partner_map(request):
     if request.method != 'GET':
         return HttpResponseNotAllowed(request)
 
-    pmap = cache.get('partner_map')
-    last_update = cache.get('partner_map_last_update')
-    if not pmap or not last_update or (datetime.utcnow() - last_update > REFRESH_PARTNER_MAP):
-        new_pmap = {
-            "nodes": [],
-            "links": [],
-            "types": {
-                'ADVOCACY': OrgTypesEnum.ADVOCACY,
-                'EDUCATION': OrgTypesEnum.EDUCATION,
-                'GOVERNMENT': OrgTypesEnum.GOVERNMENT,
-                'NGO': OrgTypesEnum.NGO,
-                "PREVENTION": OrgTypesEnum.PREVENTION,
-                "PROTECTION": OrgTypesEnum.PROTECTION,
-                "PROSECUTION": OrgTypesEnum.PROSECUTION,
-                'RELIGIOUS': OrgTypesEnum.RELIGIOUS,
-                'RESEARCH': OrgTypesEnum.RESEARCH,
-                'UNKNOWN': OrgTypesEnum.UNKNOWN
-            }
-        }
-        cache.set('partner_map_last_update', datetime.utcnow())
-        ctx = ApplicationContext(DAOContext())
-        org_dao = ctx.get_object('OrganizationDAO')
-        try:
-            organizations = org_dao.all('name', 'id', 'partners', 'types', 'address')
-        except:
-            logger.error('Error fetching organizations')
-            return HttpResponseServerError(request)
-        i = 0
-        for org in organizations:
-            new_pmap["nodes"].append({
-                "name": org.name,
-                "id": str(org.id),
-                "types": org.types,
-                "addr": org.address
-            })
-            for part in org.partners:
-                partner_id = str(part.id)
-                for j in xrange(0, i):
-                    if new_pmap["nodes"][j]["id"] == partner_id:
-                        new_pmap["links"].append({
-                           "source": i,
-                           "target": j
-                        })
-
-            i += 1
-
-        pmap = MongoJSONEncoder().encode(new_pmap)
-
-        cache.set('partner_map', pmap)
+    try:
+        pmap = get_payload('partner_map')
+    except:
+        logger.error('Error fetching organizations')
+        return HttpResponseServerError(request)
 
     return HttpResponse(pmap, content_type="application/json")
 
 
 def search_publications(request):
     """
-    Searches for publications based on the search text.
+    Searches for publications based on the search text. Passing page_size or cursor returns a page of results
+    at a time (see _page_params).
 
     Returns:
-        A { 'results' : list of JSON-encoded Publications } dictionary for the search results of Publications.
+        A { 'results' : list of JSON-encoded Publications } dictionary for the search results of Publications,
+        with a 'next_cursor' when paging.
     """
     user_id = request.session['user_id'] if 'user_id' in request.session else None
 
@@ -259,13 +162,19 @@ def search_publications(request):
         search_text = ''
 
     publications = []
+    paging = _page_params(request)
+    next_cursor = None
 
     if search_text:
         pub_dao = ctx.get_object('PublicationDAO')
         try:
-            publications = pub_dao.findmany(search=search_text,
-                                            sort_fields=['valid', 'title'],
-                                            valid=True)
+            if paging:
+                publications, next_cursor = pub_dao.findmany(search=search_text, valid=True,
+                                                             only=PUB_SEARCH_FIELDS, **paging)
+            else:
+                publications = pub_dao.findmany(search=search_text, valid=True, only=PUB_SEARCH_FIELDS)
+        except InvalidCursorError:
+            return HttpResponseBadRequest('Invalid cursor')
         except:
             logger.error('Exception encountered on publication search with search_text={0}'.format(search_text))
             return HttpResponseServerError(request)
@@ -278,6 +187,8 @@ def search_publications(request):
         results.append(pub)
 
     data = {'results': results}
+    if paging:
+        data['next_cursor'] = next_cursor
     return HttpResponse(MongoJSONEncoder().encode(data), content_type='application/json')
 
 
@@ -302,9 +213,7 @@ def search_contacts(request):
     if search_text:
         contact_dao = ctx.get_object('ContactDAO')
         try:
-            contacts = contact_dao.findmany(search=search_text,
-                                            sort_fields=['valid', 'content_weight', 'last_name', 'first_name'],
-                                            valid=True)
+            contacts = contact_dao.findmany(search=search_text, valid=True, only=CONTACT_SEARCH_FIELDS)
         except:
             logger.error('Exception encountered on contact search with search_text={0}'.format(search_text))
             return HttpResponseServerError(request)
@@ -312,41 +221,35 @@ def search_contacts(request):
         if user_id:
             user_dao = ctx.get_object('UserDAO')
             try:
-                users = user_dao.findmany(search=search_text,
-                                          sort_fields=['valid', 'content_weight', 'last_name', 'first_name'])
+                users = user_dao.findmany(search=search_text, only=USER_SEARCH_FIELDS)
             except:
                 logger.error('Exception encountered on user search with search_text={0}'.format(search_text))
                 return HttpResponseServerError(request)
 
+    contacts = [dto.__dict__['_data'] for dto in contacts]
+    users = [dto.__dict__['_data'] for dto in users]
+
+    # Look up the organizations of every contact and user at once
+    org_dao = ctx.get_object('OrganizationDAO')
+    try:
+        orgs = org_dao.find_references([c['organization'] for c in contacts + users], only=LINKED_ORG_FIELDS)
+    except:
+        logger.error('Exception encountered on organization search with search_text={0}'.format(search_text))
+        return HttpResponseServerError(request)
+
     results = []
-    for dto in contacts:
-        c = dto.__dict__['_data']
-        org_dao = ctx.get_object('OrganizationDAO')
-        try:
-            if c['organization']:
-                org = org_dao.find(id=c['organization'].id)
-                #Prevent adding this field as it cannot be properly encoded
-                org.page_rank_info = None
-                c['organization'] = org.__dict__['_data']
-        except:
-            logger.error('Exception encountered on organization search with search_text={0}'.format(search_text))
-            return HttpResponseServerError(request)
+    for c in contacts:
+        if c['organization']:
+            org = orgs.get(reference_id(c['organization']))
+            c['organization'] = org.__dict__['_data'] if org else None
         c['type'] = 'contact'
         results.append(c)
 
-    for dto in users:
-        u = dto.__dict__['_data']
-        org_dao = ctx.get_object('OrganizationDAO')
-        try:
-            if u['organization']:
-                org = org_dao.find(id=u['organization'].id)
-                if org:
-                    #Prevent adding this field as it cannot be properly encoded
-                    org.page_rank_info = None
-                    u['organization'] = org.__dict__['_data']
-        except:
-            logger.error('Exception encountered on organization search with search_text={0}'.format(search_text))
-            return HttpResponseServerError(request)
+    for u in users:
+        if u['organization']:
+            org = orgs.get(reference_id(u['organization']))
+            if org:
+                u['organization'] = org.__dict__['_data']
         u['type'] = 'user'
         results.append(u)
 
@@ -358,10 +261,12 @@ def search_contacts(request):
 
 def search_organizations(request):
     """
-    Searches for organizations based on the search text.
+    Searches for organizations based on the search text. Passing page_size or cursor returns a page of results
+    at a time (see _page_params).
 
     Returns:
-        A { 'results' : list of JSON-encoded Organizations } dictionary for the search results of Organizations.
+        A { 'results' : list of JSON-encoded Organizations } dictionary for the search results of Organizations,
+        with a 'next_cursor' when paging.
     """
     user_id = request.session['user_id'] if 'user_id' in request.session else None
 
@@ -373,15 +278,20 @@ def search_organizations(request):
         search_text = ''
 
     organizations = []
+    paging = _page_params(request)
+    next_cursor = None
 
     if search_text:
         org_dao = ctx.get_object('OrganizationDAO')
         try:
-            organizations = org_dao.findmany(search=search_text,
-                                             sort_fields=['valid', 'combined_weight', 'name'],
-                                             valid=True)
-            for org in organizations:
-                org.page_rank_info = None
+            # Ranked by the search index, best match first
+            if paging:
+                organizations, next_cursor = org_dao.findmany(search=search_text, valid=True,
+                                                              only=ORG_SEARCH_FIELDS, **paging)
+            else:
+                organizations = org_dao.findmany(search=search_text, valid=True, only=ORG_SEARCH_FIELDS)
+        except InvalidCursorError:
+            return HttpResponseBadRequest('Invalid cursor')
         except:
             logger.error('Exception encountered on organization search with search_text={0}'.format(search_text))
             return HttpResponseServerError(request)
@@ -393,83 +303,66 @@ def search_organizations(request):
         org['keywords'] = (org['keywords'] or '').split()
         results.append(org)
     data = {'results': results}
+    if paging:
+        data['next_cursor'] = next_cursor
     json_data = MongoJSONEncoder().encode(data)
     return HttpResponse(json_data, content_type="application/json")
 
 
+def _page_params(request):
+    # A search pages when it is given a page_size or a cursor: the first page is requested with a page_size
+    # alone, and each page after it with the next_cursor returned with the one before. The searches are ranked,
+    # so their cursors are offsets into the ranking, and every page ranks the matches again.
+    if 'page_size' not in request.GET and 'cursor' not in request.GET:
+        return None
+    try:
+        page_size = int(request.GET.get('page_size', 50))
+    except ValueError:
+        page_size = 50
+    return {
+        'page_size': max(1, min(page_size, MAX_PAGE_SIZE)),
+        'cursor': request.GET.get('cursor', ''),
+    }
+
+
 @decorators.safe_apicall
-def orgs_by_region(request):
+def org_breakdowns(request):
     """
-    Gets the organization count by each region in India.
+    Gets the organization counts by region, by type and by number of members together.
 
     Returns:
-        Organization counts by region, encoded in JSON. Includes the total number of organizations and the total whose
-        region is known.
+        A { 'region', 'type', 'members' } dictionary of the organization breakdowns, encoded in JSON. See
+        orgs_by_region, orgs_by_type and orgs_by_members.
     """
-
     user_id = request.session['user_id'] if 'user_id' in request.session else None
 
-    logger.info('Org breakdown by region request made by user {0}'.format(user_id))
-
-    orgs_json = cache.get('orgs_by_region')
-    last_update = cache.get('orgs_by_region_last_update')
-    if not orgs_json or not last_update or (datetime.utcnow() - last_update > REFRESH_ORG_BREAKDOWN):
-        cache.set('orgs_by_region_last_update', datetime.utcnow())
+    logger.info('Org breakdowns request made by user {0}'.format(user_id))
 
-        org_dao = ctx.get_object('OrganizationDAO')
+    breakdowns = _org_breakdowns(user_id)
+    if breakdowns is None:
+        return HttpResponseServerError(request)
 
-        regions = [
-            'Uttar Pradesh', 'Maharashtra', 'Bihar', 'West Bengal', 'Andhra Pradesh', 'Madhya Pradesh', 'Tamil Nadu',
-            'Rajasthan', 'Karnataka', 'Gujarat', 'Odisha', 'Kerala', 'Jharkhand', 'Assam', 'Punjab', 'Chhattisgarh',
-            'Haryana', 'Jammu and Kashmir', 'Uttarakhand', 'Himachal Pradesh', 'Tripura', 'Meghalaya', 'Manipur',
-            'Nagaland', 'Goa', 'Arunachal Pradesh', 'Mizoram', 'Sikkim', 'Delhi', 'Puducherry', 'Chandigarh', 'Andaman',
-            'Nicobar Islands', 'Dadra', 'Nagar Haveli', 'Daman', 'Diu', 'Lakshadweep',
-        ]
+    return HttpResponse(json.dumps(breakdowns), content_type='application/json')
 
-        region_count = {}
-        results = []
-        # Total count in known categories
-        total_known = 0
 
-        try:
-            organizations = list(org_dao.findmany())
-        except:
-            logger.error('Error fetching organizations by user={0}'.format(user_id))
-            return HttpResponseServerError(request)
+@decorators.safe_apicall
+def orgs_by_region(request):
+    """
+    Gets the organization count by each region in India.
 
-        for org in organizations:
-            if org['address']:
-                for region in regions:
-                    if region in org['address']:
-                        if region in region_count:
-                            region_count[region] += 1
-                        else:
-                            region_count[region] = 1
-                        break
-
-        for key in region_count.iterkeys():
-            count = region_count[key]
-            total_known += count
-            results.append({
-                'label': key,
-                'value': count,
-            })
+    Returns:
+        Organization counts by region, encoded in JSON. Includes the total number of organizations and the total whose
+        region is known.
+    """
+    user_id = request.session['user_id'] if 'user_id' in request.session else None
 
-        try:
-            total = org_dao.count()
-        except:
-            logger.error('Error fetching count of organizations by user={0}'.format(user_id))
-            return HttpResponseServerError(request)
+    logger.info('Org breakdown by region request made by user {0}'.format(user_id))
 
-        data = {
-            'categories': results,
-            'total': total,
-            'total_known': total_known,
-        }
-        orgs_json = json.dumps(data)
-        cache.set('orgs_by_region', orgs_json)
+    breakdowns = _org_breakdowns(user_id)
+    if breakdowns is None:
+        return HttpResponseServerError(request)
 
-    return HttpResponse(orgs_json, content_type='application/json')
+    return HttpResponse(json.dumps(breakdowns['region']), content_type='application/json')
 
 
 @decorators.safe_apicall
@@ -481,61 +374,15 @@ def orgs_by_type(request):
         Organization counts by type, encoded in JSON. Includes the total number of organizations and the total whose
         type is known.
     """
-
     user_id = request.session['user_id'] if 'user_id' in request.session else None
 
     logger.info('Org breakdown by type request made by user {0}'.format(user_id))
 
-    orgs_json = cache.get('orgs_by_type')
-    last_update = cache.get('orgs_by_type_last_update')
-    if not orgs_json or not last_update or (datetime.utcnow() - last_update > REFRESH_ORG_BREAKDOWN):
-        cache.set('orgs_by_type_last_update', datetime.utcnow())
-
-        org_dao = ctx.get_object('OrganizationDAO')
-
-        results = []
-        type_count = {}
-        # Total count in known categories
-        total_known = 0
-
-        for i in range(len(OrgTypesEnum.mapping)):
-            key = OrgTypesEnum.reverse_mapping[i]
-            try:
-                orgs = org_dao.findmany(types=i)
-            except:
-                logger.error('Error fetching organizations by user={0}'.format(user_id))
-                return HttpResponseServerError(request)
-            type_count[key] = len(orgs)
-            total_known += len(orgs)
-
-        for key in type_count.iterkeys():
-            count = type_count[key]
-            total_known += count
-            results.append({
-                'label': key.lower(),
-                'value': count,
-            })
-
-        # Sort results by value and put unknown at end
-        results = sorted(results, key=lambda x: x['value'], reverse=True)
-        results = sorted(results, key=lambda x: 1 if x['label'] == 'unknown'
-                                           else 0)
-
-        try:
-            total = org_dao.count()
-        except:
-            logger.error('Error fetching count of organizations by user={0}'.format(user_id))
-            return HttpResponseServerError(request)
-
-        data = {
-            'categories': results,
-            'total': total,
-            'total_known': total_known,
-        }
-        orgs_json = json.dumps(data)
-        cache.set('orgs_by_type', orgs_json)
+    breakdowns = _org_breakdowns(user_id)
+    if breakdowns is None:
+        return HttpResponseServerError(request)
 
-    return HttpResponse(orgs_json, content_type='application/json')
+    return HttpResponse(json.dumps(breakdowns['type']), content_type='application/json')
 
 
 @decorators.safe_apicall
@@ -547,57 +394,21 @@ def orgs_by_members(request):
         Organization counts by members, encoded in JSON. Includes the total number of organizations and the total whose
         number of organizations whose member count is shown.
     """
-
     user_id = request.session['user_id'] if 'user_id' in request.session else None
 
     logger.info('Org breakdown by members request made by user {0}'.format(user_id))
 
-    orgs_json = cache.get('orgs_by_members')
-    last_update = cache.get('orgs_by_members_last_update')
-    if not orgs_json or not last_update or (datetime.utcnow() - last_update > REFRESH_ORG_BREAKDOWN):
-        cache.set('orgs_by_members_last_update', datetime.utcnow())
+    breakdowns = _org_breakdowns(user_id)
+    if breakdowns is None:
+        return HttpResponseServerError(request)
 
-        org_dao = ctx.get_object('OrganizationDAO')
-
-        ranges = [
-            (1, 3, '1-3'),
-            (4, 6, '4-6'),
-            (7, 9, '7-9'),
-            (10, 12, '10+'),
-        ]
-
-        results = []
-        # Total count in known categories
-        total_known = 0
-
-        for r in ranges:
-            count = 0
-            for i in range(r[0], r[1] + 1):
-                try:
-                    count += org_dao.count(contacts__size=i)
-                except:
-                    logger.error('Error fetching count of organizations by user={0}'.format(user_id))
-                    return HttpResponseServerError(request)
-
-            total_known += count
-
-            results.append({
-                'label': r[2],
-                'value': count,
-            })
-
-        try:
-            total = org_dao.count()
-        except:
-            logger.error('Error fetching count of organizations by user={0}'.format(user_id))
-            return HttpResponseServerError(request)
+    return HttpResponse(json.dumps(breakdowns['members']), content_type='application/json')
 
-        data = {
-            'categories': results,
-            'total': total,
-            'total_known': total_known
-        }
-        orgs_json = json.dumps(data)
-        cache.set('orgs_by_members', orgs_json)
 
-    return HttpResponse(orgs_json, content_type='application/json')
+def _org_breakdowns(user_id):
+    # The three breakdowns are built together and cached together. Returns None if they could not be built.
+    try:
+        return get_payload('org_breakdowns')
+    except:
+        logger.error('Error fetching organization breakdowns by user={0}'.format(user_id))
+        return None
@@ -6,6 +6,7 @@ from springpython.context import ApplicationContext
 import re
 
 # project imports
+from HTResearch.DataAccess.dao import reference_ids
 from HTResearch.DataAccess.dto import URLMetadataDTO
 from HTResearch.DataModel.model import URLMetadata
 from HTResearch.DataModel.enums import AccountType
@@ -41,7 +42,7 @@ def organization_profile(request, org_id):
     org_dao = ctx.get_object('OrganizationDAO')
 
     try:
-        org = org_dao.find(id=org_id)
+        org = org_dao.find(id=org_id, exclude=['page_rank_info'])
     except:
         logger.error('Exception encountered on organization lookup for org={0} by user={1}'.format(org_id, user_id))
         return not_found(request)
@@ -65,8 +66,23 @@ def organization_profile(request, org_id):
     twitter_str = "@" + org.twitter.split('/')[-1] if org.twitter else None
 
     can_edit = account_type == AccountType.CONTRIBUTOR
-    cleaned_partners = [partner for partner in org.partners if partner.name]
-    all_contacts = org.contacts + org.user_contacts if user_id else org.contacts
+
+    # Load the partners and contacts with a query per collection instead of dereferencing them one at a time.
+    # Partners without names are left out by the organization DAO.
+    partner_ids = reference_ids(org, 'partners')
+    contact_ids = reference_ids(org, 'contacts')
+    user_contact_ids = reference_ids(org, 'user_contacts') if user_id else []
+    try:
+        partners = org_dao.find_references(partner_ids, only=['name'])
+        contacts = ctx.get_object('ContactDAO').find_references(contact_ids, only=['first_name', 'last_name'])
+        if user_id:
+            contacts.update(ctx.get_object('UserDAO').find_references(user_contact_ids,
+                                                                      only=['first_name', 'last_name']))
+    except:
+        logger.error('Exception encountered on partner lookup for org={0} by user={1}'.format(org_id, user_id))
+        return not_found(request)
+    cleaned_partners = [partners[i] for i in partner_ids if i in partners]
+    all_contacts = [contacts[i] for i in contact_ids + user_contact_ids if i in contacts]
 
     params = {"organization": org,
               "scheme": scheme,
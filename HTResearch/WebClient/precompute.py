@@ -0,0 +1,21 @@
+#
+# precompute.py
+# An executable script that keeps the dashboard payloads in the shared cache fresh, so the API views only read them.
+#
+
+# stdlib imports
+import os
+import sys
+
+
+# Run alongside the web workers, with the same settings. Pass -o to rebuild every payload once and exit, such as
+# from a deploy script.
+if __name__ == '__main__':
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "WebClient.settings")
+
+    from HTResearch.WebClient.WebClient.payloads import refresh_payloads, run_worker
+
+    if '-o' in sys.argv[1:]:
+        refresh_payloads(force=True)
+    else:
+        run_worker()
@@ -0,0 +1,187 @@
+#
+# analysis.py
+# A module for running the organization scrapers over crawled pages, either inline or in a pool of worker processes.
+#
+
+# stdlib imports
+from collections import deque
+from multiprocessing import Pool
+from scrapy.http import HtmlResponse, Request
+from springpython.context import ApplicationContext
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred
+
+# project imports
+from scrapers.document_scrapers import *
+from scrapers.parsed_page import ParsedPage
+from HTResearch.Utilities.context import URLFrontierContext
+from HTResearch.Utilities.logutil import LoggingSection, get_logger
+
+#region Globals
+logger = get_logger(LoggingSection.CRAWLER, __name__)
+# The analyzer of a worker process, created when the worker starts
+_worker_analyzer = None
+#endregion
+
+
+class PageAnalyzer(object):
+    """A class that runs the organization, contact and link scrapers over a page."""
+
+    def __init__(self, url_frontier=None):
+        """
+        Constructs a new PageAnalyzer instance.
+
+        Arguments:
+            url_frontier (URLFrontier): The frontier whose seen URLs are checked to skip looking up new ones.
+                Worker processes have no up-to-date copy of them, so they leave it out.
+        """
+        self.meta_data_scraper = UrlMetadataScraper(url_frontier)
+        self.org_scraper = OrganizationScraper()
+        self.scrapers = [ContactScraper(), LinkScraper()]
+
+    def analyze(self, response):
+        """
+        Scrapes the items of a page.
+
+        Arguments:
+            response (Response): The page to be scraped.
+
+        Returns:
+            A list of the items scraped from the page. A scraper that fails is logged and left out, so the
+            others' items are still returned.
+        """
+        items = []
+        # Parse the page once and share it among every scraper
+        page = ParsedPage.of(response)
+        ret = self._scrape(self.meta_data_scraper, page)
+        if ret is not None:
+            items.append(ret)
+        ret = self._scrape(self.org_scraper, page)
+        if ret is not None:
+            items.append(ret)
+            for scraper in self.scrapers:
+                ret = self._scrape(scraper, page)
+                if isinstance(ret, type([])):
+                    items += ret
+                elif ret is not None:
+                    items.append(ret)
+        return items
+
+    @staticmethod
+    def _scrape(scraper, page):
+        try:
+            return scraper.parse(page)
+        except Exception as e:
+            logger.error('%s failed on %s: %s' % (type(scraper).__name__, page.url, e))
+            return None
+
+
+class AnalysisError(Exception):
+    """An exception raised when a worker process fails to scrape a page."""
+    pass
+
+
+def _init_worker():
+    global _worker_analyzer
+    # The scrapers put URLs in the frontier, so make sure this process's frontier has its DAO, however early
+    # the pool was started
+    ApplicationContext(URLFrontierContext()).get_object("URLFrontier")
+    _worker_analyzer = PageAnalyzer()
+
+
+def _analyze_in_worker(url, status, headers, body, encoding, request_url):
+    # Rebuild the response from its picklable parts; the scrapers only need the page and the URL that was requested.
+    # Python 2's pool has no error callback, so always return a (success, items or error message) pair.
+    try:
+        response = HtmlResponse(url=url, status=status, headers=headers, body=body, encoding=encoding,
+                                request=Request(request_url, dont_filter=True))
+        return True, _worker_analyzer.analyze(response)
+    except Exception as e:
+        return False, '%s: %s' % (type(e).__name__, e)
+
+
+class AnalysisPool(object):
+    """
+    A pool of worker processes that run a PageAnalyzer over pages off of the reactor thread.
+
+    At most max_pending pages are handed to the workers at once. Further pages wait in the pool until a worker
+    frees up, and since their Deferreds have not fired, Scrapy counts them against its scraper slot and slows
+    down downloading once too many are waiting.
+
+    Attributes:
+        size (int): The number of worker processes.
+        max_pending (int): The most pages handed to the workers at once.
+    """
+
+    def __init__(self, size, max_pending=None):
+        """
+        Starts the worker processes.
+
+        Arguments:
+            size (int): The number of worker processes.
+            max_pending (int): The most pages handed to the workers at once. Defaults to twice the size.
+        """
+        self.size = size
+        self.max_pending = max_pending or 2 * size
+        self._pool = Pool(processes=size, initializer=_init_worker)
+        # The Deferreds of the pages with the workers, and of those waiting for a worker
+        self._running = set()
+        self._waiting = deque()
+        self._closed = False
+
+    @property
+    def closed(self):
+        """Whether the worker processes have been stopped."""
+        return self._closed
+
+    def analyze(self, response):
+        """
+        Scrapes the items of a page in a worker process.
+
+        Arguments:
+            response (Response): The page to be scraped.
+
+        Returns:
+            A Deferred that fires on the reactor thread with the list of items scraped from the page, or fails
+            with an AnalysisError if the worker could not scrape it.
+        """
+        d = Deferred()
+        request_url = response.request.url if response.request is not None else response.url
+        args = (response.url, response.status, dict(response.headers), response.body,
+                getattr(response, 'encoding', None), request_url)
+        self._waiting.append((d, args))
+        self._dispatch()
+        return d
+
+    def close(self):
+        """
+        Stops the worker processes. The Deferreds of the pages that have not been analyzed fail with an
+        AnalysisError, so nothing is left waiting on them.
+        """
+        self._closed = True
+        self._pool.terminate()
+        dropped = list(self._running) + [d for d, args in self._waiting]
+        self._running.clear()
+        self._waiting.clear()
+        for d in dropped:
+            d.errback(AnalysisError('The analysis pool was closed'))
+
+    def _dispatch(self):
+        while self._waiting and len(self._running) < self.max_pending:
+            d, args = self._waiting.popleft()
+            self._running.add(d)
+            # The pool calls back on its result thread, so hand the result over to the reactor
+            self._pool.apply_async(_analyze_in_worker, args,
+                                   callback=lambda result, d=d: reactor.callFromThread(self._finished, d, result))
+
+    def _finished(self, d, result):
+        if d not in self._running:
+            # Already failed by close
+            return
+        self._running.remove(d)
+        success, payload = result
+        self._dispatch()
+        if success:
+            d.callback(payload)
+        else:
+            d.errback(AnalysisError(payload))
@@ -1,8 +1,11 @@
 from scrapy.exceptions import DropItem
+from scrapy.utils.project import get_project_settings
+from twisted.internet.task import LoopingCall
 
 from HTResearch.DataAccess.dao import *
 from HTResearch.Utilities.converter import *
 from HTResearch.URLFrontier.urlfrontier import URLFrontier
+from HTResearch.WebCrawler.WebCrawler.item_pipeline.url_buffer import URLMetadataBuffer
 from HTResearch.Utilities.logutil import LoggingSection, get_logger
 
 
@@ -19,6 +22,23 @@ class ItemSwitch(object):
         self.pub_dao = PublicationDAO()
         self.url_dao = URLMetadataDAO()
 
+        # Scraped URLs are written behind in bulk, as they make up most of the items
+        settings = get_project_settings()
+        self.url_buffer = URLMetadataBuffer(self.frontier,
+                                            max_size=settings.getint('URL_BUFFER_SIZE', 500),
+                                            max_age=settings.getfloat('URL_BUFFER_MAX_AGE', 5.0))
+        self._url_flusher = LoopingCall(self._flush_due_urls)
+
+    def open_spider(self, spider):
+        """Starts flushing buffered URLs once they have waited long enough, even if no more items arrive"""
+        self._url_flusher.start(self.url_buffer.max_age, now=False)
+
+    def close_spider(self, spider):
+        """Writes out every buffered URL"""
+        if self._url_flusher.running:
+            self._url_flusher.stop()
+        self.url_buffer.flush()
+
     def process_item(self, item, spider):
         """Consumes item from spider and passes to correct handler asynchronously"""
         item_class = item.__class__.__name__
@@ -73,9 +93,12 @@ class ItemSwitch(object):
         dao.create_update(pub_dto)
 
     def _store_url(self, scraped_url):
-        # For now, store the new metadata ourselves
         # item to Model
         url = ModelConverter.to_model(URLMetadata, scraped_url)
 
-        frontier = self.frontier
-        frontier.put_url(url)
+        # The buffer puts it in the frontier along with the other buffered URLs
+        self.url_buffer.add(url)
+
+    def _flush_due_urls(self):
+        if self.url_buffer.due:
+            self.url_buffer.flush()
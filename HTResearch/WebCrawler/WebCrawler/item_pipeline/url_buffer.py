@@ -0,0 +1,99 @@
+#
+# url_buffer.py
+# A module for buffering scraped URLs so they can be written to the database in bulk.
+#
+
+# stdlib imports
+from collections import OrderedDict
+import time
+
+# project imports
+from HTResearch.Utilities.logutil import LoggingSection, get_logger
+
+#region Globals
+logger = get_logger(LoggingSection.CRAWLER, __name__)
+#endregion
+
+
+class URLMetadataBuffer(object):
+    """
+    A write-behind buffer of URLMetadata models bound for the URLFrontier.
+
+    Models for the same URL are merged in the buffer, so a link found on many pages is written once. The buffer
+    is written out with a single bulk upsert once it holds max_size URLs or its oldest URL is max_age seconds
+    old, whichever comes first.
+
+    Attributes:
+        frontier (URLFrontier): The frontier the URLs are put in.
+        max_size (int): The most URLs held before the buffer is flushed.
+        max_age (float): The most seconds a URL is held before the buffer is flushed.
+    """
+
+    def __init__(self, frontier, max_size=500, max_age=5.0, clock=time.time):
+        """
+        Constructs a new URLMetadataBuffer instance.
+
+        Arguments:
+            frontier (URLFrontier): The frontier the URLs are put in.
+            max_size (int): The most URLs held before the buffer is flushed.
+            max_age (float): The most seconds a URL is held before the buffer is flushed.
+            clock (function): Returns the current time in seconds.
+        """
+        self.frontier = frontier
+        self.max_size = max_size
+        self.max_age = max_age
+        self._clock = clock
+        self._urls = OrderedDict()
+        self._oldest = None
+
+    def __len__(self):
+        return len(self._urls)
+
+    @property
+    def due(self):
+        """Whether the buffer is full or has held a URL for too long."""
+        if not self._urls:
+            return False
+        return len(self._urls) >= self.max_size or self._clock() - self._oldest >= self.max_age
+
+    def add(self, url):
+        """
+        Buffers a URL, merging it with any buffered model for the same URL, and flushes the buffer if it is due.
+
+        Arguments:
+            url (URLMetadata): The URL to be buffered.
+        """
+        buffered = self._urls.get(url.url)
+        if buffered is None:
+            if not self._urls:
+                self._oldest = self._clock()
+            self._urls[url.url] = url
+        else:
+            self._merge(buffered, url)
+
+        if self.due:
+            self.flush()
+
+    def flush(self):
+        """Writes every buffered URL to the frontier."""
+        if not self._urls:
+            return
+        urls = self._urls.values()
+        self._urls = OrderedDict()
+        self._oldest = None
+        try:
+            self.frontier.put_urls(urls)
+        except Exception as e:
+            logger.error('Failed to store %d URLs: %s' % (len(urls), e))
+
+    @staticmethod
+    def _merge(url, new_url):
+        # Same rules as URLMetadataDAO.create_update: the latest visit wins, and any other field that is set
+        for key, value in new_url.__dict__.iteritems():
+            if value is None:
+                continue
+            if key == 'last_visited':
+                if url.last_visited is None or value > url.last_visited:
+                    url.last_visited = value
+            else:
+                setattr(url, key, value)
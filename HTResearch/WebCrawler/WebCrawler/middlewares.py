@@ -30,7 +30,11 @@ class UrlQueueMiddleware(object):
         except Exception as e:
             _middleware_logger.error(e.message)
 
-        # queue next url
+        # queue next urls, without waiting on the frontier if the spider can schedule the requests itself
+        if hasattr(spider, 'schedule_next_requests'):
+            spider.schedule_next_requests(failed_request=request)
+            return None
+
         ctx = ApplicationContext(URLFrontierContext())
         url_frontier = ctx.get_object("URLFrontier")
         try:
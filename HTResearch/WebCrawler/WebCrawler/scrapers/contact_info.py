@@ -0,0 +1,111 @@
+#
+# contact_info.py
+# A module for finding emails and phone numbers in page text in a single pass.
+#
+
+# stdlib imports
+from collections import namedtuple
+import re
+
+#region Globals
+EMAIL = 'email'
+OBFUSCATED_EMAIL = 'obfuscated_email'
+INDIA_PHONE = 'india_phone'
+US_PHONE = 'us_phone'
+
+EMAIL_KINDS = (EMAIL, OBFUSCATED_EMAIL)
+PHONE_KINDS = (INDIA_PHONE, US_PHONE)
+#endregion
+
+
+# A piece of contact info found in some text, with its value normalized
+ContactInfo = namedtuple('ContactInfo', ['kind', 'start', 'end', 'value'])
+
+
+class ContactInfoScanner(object):
+    """
+    Finds emails, obfuscated emails (e.g. name [at] domain [dot] org), Indian phone numbers and US phone numbers
+    with one precompiled pattern, in one pass over a text.
+
+    Every repetition in the pattern is bounded and each alternative can only start at a word boundary,
+    so the work per character is constant no matter what the page contains.
+    """
+
+    # Limits on the work done per text
+    MAX_TEXT_LENGTH = 1000000
+    MAX_RESULTS = 1000
+
+    _local_part = r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]{1,64}'
+    _us_phone = r'\b(?!\s)1?\s?[(-./]?\s?[2-9][0-8][0-9]\s?[)-./]?\s?[2-9][0-9]{2}\s?\W?\s?[0-9]{4}\b'
+    _digits = re.compile(r'\D')
+    _pattern = re.compile(
+        # name@domain.org
+        r'(?P<email>' + _local_part + r'@(?:[A-Za-z0-9-]{1,63}\.){1,8}[A-Za-z]{2,4}\b)|'
+        # name[at]domain[dot]org, name(at)domain(dot)org or name at domain dot org
+        r'(?P<obfuscated>(?P<local>' + _local_part + r')(?:\[at]|\(at\)| at )(?P<domain>[A-Za-z0-9.-]{1,255})'
+        r'(?:\[dot]|\(dot\)| dot )(?P<tld>[A-Za-z]{2,4})\b)|'
+        # 022 2345 6789, 91-22-23456789, 9876543210
+        r'(?P<india>(?<!\w)(?:91[-./\s]{1,3})?[0-9]{2,10}[-./\s]?[0-9]{0,2}[-./\s]?[0-9]?[-./\s]?'
+        r'(?:[0-9]{5,6}|[0-9]{4}[-./\s]?[0-9]{4})(?!\w))|'
+        # (402) 555-1234, 1-402-555-1234
+        r'(?P<us>' + _us_phone + r')')
+    # Checks whether a number the India alternative matched is also a US number
+    _us_pattern = re.compile(_us_phone)
+
+    def scan(self, text):
+        """
+        Finds the contact info in a text.
+
+        Arguments:
+            text (string): The text to scan. Only the first MAX_TEXT_LENGTH characters are scanned.
+
+        Returns:
+            A list of at most MAX_RESULTS ContactInfo tuples, in the order they appear in the text.
+            Emails (including deobfuscated ones) are ASCII strings, and phone numbers are strings of digits.
+            A ten digit number that fits both formats is found once as an Indian and once as a US number.
+        """
+        return self.scan_lines([text])
+
+    def scan_lines(self, lines):
+        """
+        Finds the contact info in some lines of text, such as the text nodes of a page, without letting a match
+        run from one line into the next.
+
+        Arguments:
+            lines (list): The lines to scan. Only the first MAX_TEXT_LENGTH characters of them are scanned.
+
+        Returns:
+            A list like scan's, with the start and end of each match counted in the lines joined by newlines.
+        """
+        results = []
+        offset = 0
+        for line in lines:
+            end = min(len(line), self.MAX_TEXT_LENGTH - offset)
+            if end <= 0:
+                break
+            for match in self._pattern.finditer(line, 0, end):
+                if len(results) >= self.MAX_RESULTS:
+                    return results
+                kind = match.lastgroup
+                if kind == 'email':
+                    value = match.group()
+                elif kind == 'obfuscated':
+                    kind = OBFUSCATED_EMAIL
+                    value = '%s@%s.%s' % (match.group('local'), match.group('domain'), match.group('tld'))
+                elif kind == 'india':
+                    kind = INDIA_PHONE
+                    value = self._digits.sub('', match.group())
+                else:
+                    kind = US_PHONE
+                    value = self._digits.sub('', match.group())
+                results.append(ContactInfo(kind, offset + match.start(), offset + match.end(),
+                                           value.encode('ascii', 'ignore')))
+
+                # The alternatives can't both match the same text, so recheck Indian numbers in the US format
+                if kind == INDIA_PHONE:
+                    us = self._us_pattern.match(line, match.start(), match.end())
+                    if us is not None and us.end() == match.end() and len(results) < self.MAX_RESULTS:
+                        results.append(ContactInfo(US_PHONE, offset + match.start(), offset + match.end(),
+                                                   results[-1].value))
+            offset += len(line) + 1
+        return results
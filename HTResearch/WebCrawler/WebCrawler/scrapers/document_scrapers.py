@@ -11,7 +11,9 @@ import string
 from HTResearch.Utilities.url_tools import UrlUtility
 from HTResearch.DataModel.model import URLMetadata
 from HTResearch.URLFrontier.urlfrontier import URLFrontier
+from HTResearch.Utilities.text_matching import DictionaryMatcher
 from link_scraper import PageRankScraper
+from parsed_page import ParsedPage
 from utility_scrapers import *
 
 
@@ -58,14 +60,16 @@ class OrganizationScraper():
             'page_rank_info': [PageRankScraper]
         }
         self._multiple = ['types', 'phone_numbers', 'emails', 'partners', 'contacts']
-        self._required_words = ['prostitution', 'sex trafficking', 'child labor', 'child labour', 'slavery',
-                                'human trafficking', 'brothel', 'child trafficking', 'anti trafficking',
-                                'social justice']
+        self._required_words = DictionaryMatcher(['prostitution', 'sex trafficking', 'child labor', 'child labour',
+                                                  'slavery', 'human trafficking', 'brothel', 'child trafficking',
+                                                  'anti trafficking', 'social justice'])
         self._punctuation = re.compile('[%s]' % re.escape(string.punctuation))
         self.org_dao = OrganizationDAO
         self.url_frontier = URLFrontier()
 
     def parse(self, response):
+        # Share one parse of the page among all of the field scrapers
+        response = ParsedPage.of(response)
         organization = None
         flag = self.check_valid_org(response)
         if flag:
@@ -115,16 +119,13 @@ class OrganizationScraper():
             return False
         else:
             # this is homepage, scrape for keywords
-            hxs = HtmlXPathSelector(response)
-            site_text = hxs.select('//html//text()').extract()
-            site_text = [element.strip() for element in site_text if element.strip() != '']
-
-            for word in self._required_words:
-                for sentence in site_text:
-                    sentence = self._punctuation.sub(' ', sentence)
-                    if word in sentence.lower():
-                        return True
-                        # no keyword found, check if we already added organization
+            site_text = ParsedPage.of(response).html_text
+
+            # look for every required word in a single pass over each sentence
+            for sentence in site_text:
+                sentence = self._punctuation.sub(' ', sentence)
+                if self._required_words.search(sentence.lower()):
+                    return True
 
         return False
 
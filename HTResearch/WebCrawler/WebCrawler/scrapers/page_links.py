@@ -0,0 +1,124 @@
+#
+# page_links.py
+# A module for extracting a single table of the links on a page, shared by the link-consuming scrapers.
+#
+
+# stdlib imports
+import posixpath
+import re
+from urlparse import urljoin, urlparse
+from scrapy.linkextractor import IGNORED_EXTENSIONS
+from scrapy.selector.lxmldocument import LxmlDocument
+from scrapy.utils.url import canonicalize_url
+from w3lib.url import safe_url_string
+
+# project imports
+from HTResearch.Utilities.url_tools import UrlUtility
+
+#region Globals
+_VALID_SCHEMES = ['http', 'https', 'file']
+_DENIED_EXTENSIONS = set(['.' + ext for ext in IGNORED_EXTENSIONS])
+_INDEX_REGEX = re.compile(r'\[\d+\]')
+#endregion
+
+
+class PageLink(object):
+    """A link found on a page."""
+
+    def __init__(self, url, canonical_url, netloc, domain, text, path):
+        """
+        Constructs a new PageLink instance.
+
+        Arguments:
+            url (string): The absolute URL of the link, as written on the page.
+            canonical_url (string): The canonicalized form of url.
+            netloc (string): The lowercased network location of the link.
+            domain (string): The registered domain of the link, or None if it could not be found.
+            text (unicode): The anchor text of the link.
+            path (string): The structural DOM path to the link's element, e.g. /html/body/div/a.
+        """
+        self.url = url
+        self.canonical_url = canonical_url
+        self.netloc = netloc
+        self.domain = domain
+        self.text = text
+        self.path = path
+
+    @property
+    def tag(self):
+        """The name of the link's element (a or area)."""
+        return self.path.rsplit('/', 1)[-1]
+
+    @property
+    def crawlable(self):
+        """Whether the link points at a page we would crawl (as opposed to an image, document, etc.)."""
+        return posixpath.splitext(urlparse(self.url).path)[1].lower() not in _DENIED_EXTENSIONS
+
+
+def extract_page_links(response):
+    """
+    Extracts every link on a page in a single walk of its DOM.
+
+    Arguments:
+        response (Response): The Scrapy Response of the page.
+
+    Returns:
+        A list of PageLinks in document order, with one entry per distinct URL and DOM path.
+    """
+    root = LxmlDocument(response)
+    tree = root.getroottree()
+    encoding = getattr(response, 'encoding', 'utf-8')
+
+    base_url = response.url
+    base = root.xpath('//base/@href')
+    if base:
+        base_url = urljoin(response.url, base[0].strip().encode(encoding))
+
+    links = []
+    seen = set()
+    for element in root.iter('a', 'area'):
+        href = element.get('href')
+        if href is None:
+            continue
+
+        if isinstance(href, unicode):
+            href = href.encode(encoding)
+        url = safe_url_string(urljoin(base_url, href.strip()), encoding)
+        parsed_url = urlparse(url)
+        if parsed_url.scheme not in _VALID_SCHEMES:
+            continue
+
+        path = _INDEX_REGEX.sub('', tree.getpath(element))
+        if (url, path) in seen:
+            continue
+        seen.add((url, path))
+
+        canonical_url = canonicalize_url(parsed_url)
+        try:
+            domain = UrlUtility.get_domain(canonical_url, False)
+        except ValueError:
+            domain = None
+        text = u''.join(element.itertext()).strip()
+
+        links.append(PageLink(url, canonical_url, parsed_url.netloc.lower(), domain, text, path))
+
+    return links
+
+
+def crawlable_links(links):
+    """
+    Filters a link table down to the pages we would crawl, one link per canonical URL.
+
+    Arguments:
+        links (PageLink[]): The link table of a page.
+
+    Returns:
+        A list of PageLinks in document order.
+    """
+    ret = []
+    seen = set()
+    for link in links:
+        if link.canonical_url not in seen and link.crawlable:
+            seen.add(link.canonical_url)
+            ret.append(link)
+    return ret
@@ -0,0 +1,163 @@
+#
+# parsed_page.py
+# A module containing the per-response parse context shared by the scrapers.
+#
+
+# stdlib imports
+import re
+
+# third-party imports
+from nltk import FreqDist
+from scrapy.selector import HtmlXPathSelector
+
+# project imports
+from contact_info import ContactInfoScanner
+from page_links import extract_page_links
+from tokenizer import tokenize
+
+#region Globals
+_CDATA = re.compile(r'(.*?)<!\[CDATA(.*?)]]>(.*?)', re.DOTALL)
+_contact_info_scanner = ContactInfoScanner()
+#endregion
+
+
+class ParsedPage(object):
+    """
+    A wrapper around a Scrapy Response that parses the page once and memoizes the
+    selections shared by the scrapers.
+
+    Attribute access that is not defined here falls through to the wrapped response,
+    so a ParsedPage can be passed anywhere a scraper expects a response.
+
+    Attributes:
+        response (Response): The wrapped Scrapy Response.
+    """
+
+    # Elements whose text is considered when scraping keywords
+    KEYWORD_ELEMENTS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'a', 'b', 'code', 'em', 'italic',
+                        'small', 'strong', 'div', 'span', 'li', 'th', 'td', 'a[contains(@href, "image")]']
+
+    def __init__(self, response):
+        self.response = response
+        self._hxs = None
+        self._body_text = None
+        self._html_text = None
+        self._contact_lines = None
+        self._contact_text = None
+        self._contact_info = None
+        self._keyword_text = None
+        self._keyword_tokens = None
+        self._keyword_freqs = None
+        self._body_tokens = None
+        self._links = None
+
+    @staticmethod
+    def of(response):
+        """
+        Returns the parse context for a response, creating one if necessary.
+
+        Arguments:
+            response (Response or ParsedPage): The page to be scraped.
+
+        Returns:
+            A ParsedPage wrapping the response.
+        """
+        if isinstance(response, ParsedPage):
+            return response
+        return ParsedPage(response)
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the page itself
+        if name == 'response':
+            raise AttributeError(name)
+        return getattr(self.response, name)
+
+    @property
+    def hxs(self):
+        """The HtmlXPathSelector for the page's DOM."""
+        if self._hxs is None:
+            self._hxs = HtmlXPathSelector(self.response)
+        return self._hxs
+
+    @property
+    def body_text(self):
+        """The stripped, non-empty text nodes under <body>."""
+        if self._body_text is None:
+            self._body_text = [s.strip() for s in self.hxs.select('//body//text()').extract() if s.strip()]
+        return self._body_text
+
+    @property
+    def html_text(self):
+        """The stripped, non-empty text nodes under <html>."""
+        if self._html_text is None:
+            self._html_text = [s.strip() for s in self.hxs.select('//html//text()').extract() if s.strip()]
+        return self._html_text
+
+    @property
+    def contact_lines(self):
+        """
+        The page's stripped, non-empty text nodes and the targets of its mailto and tel links, in document order.
+        CDATA sections are left out.
+        """
+        if self._contact_lines is None:
+            nodes = self.hxs.select('//html//text() | '
+                                    '//a[contains(@href, "@") or starts-with(@href, "tel:")]/@href').extract()
+            self._contact_lines = [s.strip() for s in nodes if s.strip() and not _CDATA.match(s)]
+        return self._contact_lines
+
+    @property
+    def contact_text(self):
+        """The contact_lines, one per line."""
+        if self._contact_text is None:
+            self._contact_text = u'\n'.join(self.contact_lines)
+        return self._contact_text
+
+    @property
+    def contact_info(self):
+        """
+        The emails and phone numbers in contact_text, with no match spanning two of its lines
+        (see contact_info.ContactInfoScanner).
+        """
+        if self._contact_info is None:
+            self._contact_info = _contact_info_scanner.scan_lines(self.contact_lines)
+        return self._contact_info
+
+    @property
+    def keyword_text(self):
+        """The text of every element considered when scraping keywords."""
+        if self._keyword_text is None:
+            self._keyword_text = []
+            for element in ParsedPage.KEYWORD_ELEMENTS:
+                self._keyword_text += self.hxs.select('//' + element + '/text()').extract()
+        return self._keyword_text
+
+    @property
+    def keyword_tokens(self):
+        """The lemmatized words of keyword_text, without punctuation or numbers."""
+        if self._keyword_tokens is None:
+            self._keyword_tokens = list(tokenize(self.keyword_text))
+        return self._keyword_tokens
+
+    @property
+    def keyword_freqs(self):
+        """A frequency distribution of keyword_tokens."""
+        if self._keyword_freqs is None:
+            self._keyword_freqs = FreqDist(self.keyword_tokens)
+        return self._keyword_freqs
+
+    @property
+    def body_tokens(self):
+        """The body text as ASCII alphanumeric tokens, in document order."""
+        if self._body_tokens is None:
+            self._body_tokens = []
+            for text in self.body_text:
+                text = text.encode('ascii', 'ignore')
+                self._body_tokens += "".join((char if char.isalnum() else " ") for char in text).split()
+        return self._body_tokens
+
+    @property
+    def links(self):
+        """The table of links on the page (see page_links.extract_page_links)."""
+        if self._links is None:
+            self._links = extract_page_links(self.response)
+        return self._links
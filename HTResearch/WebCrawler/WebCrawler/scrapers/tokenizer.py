@@ -0,0 +1,51 @@
+#
+# tokenizer.py
+# A module for splitting page text into lemmatized words.
+#
+
+# stdlib imports
+import string
+from nltk import WordNetLemmatizer
+
+# project imports
+from HTResearch.Utilities.data_structures import LRUCache
+
+#region Globals
+_lemmatizer = WordNetLemmatizer()
+# Lemmas of recently seen words, shared by every scraper in the process
+lemma_cache = LRUCache(max_size=100000)
+#endregion
+
+
+def lemmatize(word):
+    """
+    Shortens a word to a more-commonly-used form of the word, remembering the result.
+
+    Arguments:
+        word (string): The word to lemmatize.
+
+    Returns:
+        The lemma of the word.
+    """
+    lemma = lemma_cache.get(word)
+    if lemma is None:
+        lemma = _lemmatizer.lemmatize(word)
+        lemma_cache.put(word, lemma)
+    return lemma
+
+
+def tokenize(lines):
+    """
+    Gets all the words from some text by removing punctuation and digits.
+
+    Arguments:
+        lines (string[]): The text from the page to be scraped.
+
+    Returns:
+        A generator of the lowercase, lemmatized words of the text.
+    """
+    for line in lines:
+        line = line.encode('ascii', 'ignore').lower().translate(None, string.punctuation)
+        for word in line.split():
+            if not word.isdigit():
+                yield lemmatize(word)
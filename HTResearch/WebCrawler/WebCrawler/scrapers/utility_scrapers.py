@@ -4,55 +4,78 @@
 #
 
 # stdlib imports
+from bisect import bisect_left
 from bson.binary import Binary
+from collections import OrderedDict
 import datetime
 import hashlib
 import heapq
-import itertools
 import os
 import re
-import string
-from nltk import FreqDist, WordNetLemmatizer
 from scrapy.selector import HtmlXPathSelector
-from scrapy.selector import XPathSelectorList
-from scrapy.contrib.linkextractors.sgml import SgmlLinkExtractor
-from sgmllib import SGMLParseError
-from urlparse import urlparse, urljoin
+from urlparse import urlparse
 
 # project imports
 from ..items import *
+from contact_info import EMAIL_KINDS, INDIA_PHONE, US_PHONE
 from link_scraper import LinkScraper
+from parsed_page import ParsedPage
+from tokenizer import lemmatize
 from HTResearch.DataAccess.dao import *
 from HTResearch.DataModel.enums import OrgTypesEnum
 from HTResearch.Utilities.converter import *
 from HTResearch.Utilities.logutil import *
+from HTResearch.Utilities.text_matching import DictionaryMatcher
+from HTResearch.Utilities.url_tools import DomainSet
 
 #region Globals
 _utilityscrapers_logger = get_logger(LoggingSection.CRAWLER, __name__)
 #endregion
 
 
+def _read_resource(filename):
+    """
+    Reads the lines of one of the crawler's resource dictionaries.
+
+    Arguments:
+        filename (string): The name of the file in the Resources directory.
+
+    Returns:
+        A list of the lines in the file.
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Resources', filename)) as f:
+        return f.read().splitlines()
+
+
+def _rank(words):
+    """
+    Numbers the words of a dictionary in the order they are listed.
+
+    Arguments:
+        words (string[]): The words. Empty and repeated words are skipped.
+
+    Returns:
+        A dictionary of the position each word is first listed at.
+    """
+    ranks = {}
+    for word in words:
+        if word and word not in ranks:
+            ranks[word] = len(ranks)
+    return ranks
+
+
 class ContactNameScraper(object):
     """A class that scrapes first and last names of people on a given page."""
-    try:
-        _names and _last_names and _stopwords and _titles
-    except NameError:
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Resources/names.txt'), 'r') as f:
-            names = f.read().splitlines()
-            _names = [name.title() for name in names]
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Resources/lastnames.txt'), 'r') as f:
-            lnames = f.read().splitlines()
-            _last_names = [lname.title() for lname in lnames]
-        #Load words to be ignored
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Resources/stopwords.txt')) as f:
-            stopwords = f.read().splitlines()
-            _stopwords = [word.title() for word in stopwords]
+    # Dictionaries are built once and shared by every instance. They are only checked for single words, so they
+    # are sets rather than matchers.
+    _names = frozenset(name.title() for name in _read_resource('names.txt'))
+    _last_names = frozenset(lname.title() for lname in _read_resource('lastnames.txt'))
+    #Load words to be ignored
+    _stopwords = frozenset(word.title() for word in _read_resource('stopwords.txt'))
 
-        _titles = ['Mr', 'Mrs', 'Ms', 'Miss', 'Dr', 'Sh', 'Smt', 'Prof', 'Shri']
-        length = len(_titles)
-        # catch Dr and Dr.
-        for i in range(0, length):
-            _titles.append(_titles[i] + '.')
+    _titles = ['Mr', 'Mrs', 'Ms', 'Miss', 'Dr', 'Sh', 'Smt', 'Prof', 'Shri']
+    # catch Dr and Dr.
+    _titles += list(title + '.' for title in _titles)
 
     def __init__(self):
         # Make a regex check for if a potential name is actually a date. Not concerned with months that aren't in the
@@ -64,9 +87,8 @@ class ContactNameScraper(object):
                                 r'August ([0-9]{4}|[0-9]{1,2}|[0-9]{1,2}(rd|th|nd)?)')
 
     def parse(self, response):
-        hxs = HtmlXPathSelector(response)
-        body = hxs.select('//body//text()').extract()
-        body = [s.strip() for s in body if s.strip()]
+        page = ParsedPage.of(response)
+        body = page.body_text
         names = []
         cns = ContactNameScraper
 
@@ -123,50 +145,49 @@ class ContactNameScraper(object):
 
 class ContactPositionScraper(object):
     """A class that scrapes work positions of people on a given page."""
+    _positions = DictionaryMatcher(_read_resource('positions.txt'))
+
     def __init__(self):
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Resources/positions.txt')) as f:
-            self._positions = f.read().splitlines()
         self._tag = re.compile(r'<[A-Za-z0-9]*>|<[A-Za-z0-9]+|</[A-Za-z0-9]*>')
 
     def parse(self, response):
-        for position in self._positions:
-            if string.find(response.body, position) is not -1:
-                return position
-
+        # Earlier positions in the dictionary take precedence
+        return self._positions.first_listed(response.body)
 
-class EmailScraper(object):
-    """A class that scrapes emails on a given page."""
-    def __init__(self):
-        self._email_regex = re.compile(r'\b[A-Za-z0-9._%+-]+\[at][A-Za-z0-9.-]+\[dot][A-Za-z]{2,4}\b|'
-                                       r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,4}\b|'
-                                       r'\b[A-Za-z0-9._%+-]+ at [A-Za-z0-9.-]+ dot [A-Za-z]{2,4}\b|'
-                                       r'\b[A-Za-z0-9._%+-]+\(at\)[A-Za-z0-9.-]+\(dot\)[A-Za-z]{2,4}\b')
-        self._c_data = re.compile(r'(.*?)<!\[CDATA(.*?)]]>(.*?)', re.DOTALL)
+    def find_all(self, text):
+        """
+        Finds every work position in some text.
 
-    def parse(self, response):
-        hxs = HtmlXPathSelector(response)
+        Arguments:
+            text (string): The text to search.
 
-        # all_text will get emails from the text of the page
-        all_text = hxs.select('//html//text()')
+        Returns:
+            A generator of (start, end, position) tuples.
+        """
+        return self._positions.find_all(text)
 
-        # Remove C_Data tags, since they are showing up in the body text for some reason
-        all_text = XPathSelectorList([text for text in all_text if not (re.match(self._c_data, text.extract()) or
-                                                                        text.extract().strip() == '')])
+    def first_listed(self, positions):
+        """
+        Picks the position that takes precedence among several found.
 
-        all_text = all_text.re(self._email_regex)
+        Arguments:
+            positions (string[]): Positions found by find_all.
 
-        # hrefs will get emails from hrefs
-        hrefs = hxs.select("//./a[contains(@href,'@')]/@href").re(self._email_regex)
+        Returns:
+            The position listed earliest in the dictionary, or None if there are none.
+        """
+        return min(positions, key=self._positions.index) if positions else None
 
-        emails = hrefs + all_text
 
-        # Take out the unicode, and substitute [at] for @ and [dot] for .
-        for i in range(len(emails)):
-            emails[i] = emails[i].encode('ascii', 'ignore')
-            emails[i] = re.sub(r'(\[at]|\(at\)| at )([A-Za-z0-9.-]+)(\[dot]|\(dot\)| dot )', r'@\2.', emails[i])
+class EmailScraper(object):
+    """A class that scrapes emails on a given page."""
+    def parse(self, response):
+        # Emails (with [at] and [dot] already substituted) come from the page's single contact info scan,
+        # which covers both the text of the page and its mailto links
+        contact_info = ParsedPage.of(response).contact_info
 
         # Makes it a set then back to a list to take out duplicates that may have been both in the body and links
-        emails = list(set(emails))
+        emails = list(set(info.value for info in contact_info if info.kind in EMAIL_KINDS))
 
         return emails
 
@@ -174,109 +195,60 @@ class EmailScraper(object):
 class KeywordScraper(object):
     """A class that scrapes the 50 most used words on a given page."""
     NUM_KEYWORDS = 50
-    _stopwords = []
-    _lemmatizer = WordNetLemmatizer()
-
-    def __init__(self):
-        #Load words to be ignored
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Resources/stopwords.txt')) as f:
-            self._stopwords = f.read().splitlines()
+    # Words to be ignored
+    _stopwords = frozenset(_read_resource('stopwords.txt'))
 
     def parse(self, response):
-        all_words = []
-
-        #Parse the response
-        hxs = HtmlXPathSelector(response)
-
-        elements = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'a', 'b', 'code', 'em', 'italic',
-                    'small', 'strong', 'div', 'span', 'li', 'th', 'td', 'a[contains(@href, "image")]']
+        # The frequency distribution is shared with the other scrapers of the page, so leave it intact
+        freq_dist = ParsedPage.of(response).keyword_freqs
 
-        for element in elements:
-            words = hxs.select('//' + element + '/text()').extract()
-            all_words = append_words(all_words, words)
-
-        #Run a frequency distribution on the web page body
-        all_words_no_punct = [word.translate(None, string.punctuation) for word in all_words]
-        freq_dist = FreqDist(all_words_no_punct)
-
-        #Remove ignored words
-        for word in self._stopwords:
-            if word in freq_dist:
-                del freq_dist[word]
-
-        # Take the NUM_KEYWORDS most frequent keywords
-        most_freq_keywords = heapq.nlargest(self.NUM_KEYWORDS, freq_dist, key=freq_dist.get)
+        # Take the NUM_KEYWORDS most frequent keywords, ignoring stopwords
+        words = (word for word in freq_dist if word not in self._stopwords)
+        most_freq_keywords = heapq.nlargest(self.NUM_KEYWORDS, words, key=freq_dist.get)
         return ' '.join(most_freq_keywords)
 
 
 class IndianPhoneNumberScraper(object):
     """A class that scrapes Indian phone numbers on a given page."""
-    def __init__(self):
-        self._india_format_regex = re.compile(r'\b(?!\s)(?:91[-./\s]+)?[0-9]+[0-9]+[-./\s]?[0-9]?[0-9]?[-./\s]?[0-9]?'
-                                              r'[-./\s]?[0-9]{5}[0-9]?\b|\b(?!\s)(?:91[-./\s]+)?[0-9]+[0-9]+[-./\s]?'
-                                              r'[0-9]?[0-9]?[-./\s]?[0-9]{4}[-./\s]?[0-9]{4}\b')
-
     def parse(self, response):
-        hxs = HtmlXPathSelector(response)
-
-        # body will get phone numbers that are just text in the body
-        body = hxs.select('//body').re(self._india_format_regex)
-
-        phone_nums = body
-
-        # Remove unicode indicators
-        for i in range(len(phone_nums)):
-            phone_nums[i] = phone_nums[i].encode('ascii', 'ignore')
+        contact_info = ParsedPage.of(response).contact_info
 
         # Makes it a set then back to a list to take out duplicates that may have been both in the body and links
-        phone_nums = list(set(phone_nums))
-
-        # Make the list an item
-        phone_nums_list = []
-        for num in phone_nums:
-            num = re.sub("\D", "", num)
-            phone_nums_list.append(num)
-
-        return phone_nums_list
+        return list(set(info.value for info in contact_info if info.kind == INDIA_PHONE))
 
 
 class OrgAddressScraper(object):
     """A class that scrapes the city and country of an organization on a given page."""
-    def __init__(self):
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../Resources/cities.txt')) as f:
-            self._cities = f.read().splitlines()
+    # Tokens are only looked up one at a time, so this maps each city to its rank rather than matching text
+    _cities = _rank(city.strip() for city in _read_resource('cities.txt'))
 
     def parse(self, response):
-        hxs = HtmlXPathSelector(response)
+        page = ParsedPage.of(response)
 
-        body = hxs.select('//body//text()').extract()
-        for i in range(len(body)):
-            body[i] = (body[i].encode('ascii', 'ignore')).strip()
-            body[i] = "".join((char if char.isalnum() else " ") for char in body[i]).split()
-        body = list(flatten(body))
+        body = page.body_tokens
 
-        # This loop will check if city is in the body, if it is, find all occurrences of that city in the body,
-        # and then it will check all the occurring indices, and if the next index (or next 2 indices) is the zip code
+        # This loop will find every token of the body that is a city, and then it will check if the next index
+        # (or next 2 indices) is the zip code
         city_and_zip = []
-        for city in self._cities:
-            city = city.strip()
-            if city in body:
-                indices = [i for i, x in enumerate(body) if x == city]
-                for i in indices:
-                    # because the body is separated by spaces, "New Delhi" would be in separate indices, so
-                    # check if the index before it could add to the city name and still be valid
-                    # EX: "Delhi" is valid and "New Delhi" is valid
-                    check = body[i]
-                    counter = 0
-                    while check in self._cities:
-                        city = check
-                        check = body[i - 1 - counter] + " " + city
-                        counter += 1
-                    if len(body[i + 1]) == 6 and body[i + 1].isdigit():
-                        city_and_zip.append((city, body[i + 1]))
-                    elif len(body[i + 1]) == 3 and len(body[i + 2]) == 3 and body[i + 1].isdigit() and \
-                            body[i + 2].isdigit():
-                        city_and_zip.append((city, body[i + 1] + body[i + 2]))
+        for i, token in enumerate(body):
+            if token in self._cities:
+                # because the body is separated by spaces, "New Delhi" would be in separate indices, so
+                # check if the index before it could add to the city name and still be valid
+                # EX: "Delhi" is valid and "New Delhi" is valid
+                city = check = token
+                counter = 0
+                while check in self._cities:
+                    city = check
+                    check = body[i - 1 - counter] + " " + city
+                    counter += 1
+                # cities listed first in the dictionary take precedence
+                rank = (self._cities[token], i)
+                if i + 1 < len(body) and len(body[i + 1]) == 6 and body[i + 1].isdigit():
+                    city_and_zip.append((rank, city, body[i + 1]))
+                elif i + 2 < len(body) and len(body[i + 1]) == 3 and len(body[i + 2]) == 3 and \
+                        body[i + 1].isdigit() and body[i + 2].isdigit():
+                    city_and_zip.append((rank, city, body[i + 1] + body[i + 2]))
+        city_and_zip = [(city, zip_code) for rank, city, zip_code in sorted(city_and_zip)]
         address_list = []
         for i in range(len(city_and_zip)):
             item = ScrapedAddress()
@@ -291,55 +263,94 @@ class OrgContactsScraper(object):
     """A class that scrapes the contacts that are associated with an organization on a given page."""
     def __init__(self):
         self._name_scraper = ContactNameScraper()
-        self._number_scraper = IndianPhoneNumberScraper()
-        self._us_number_scraper = USPhoneNumberScraper()
-        self._email_scraper = EmailScraper()
         self._position_scraper = ContactPositionScraper()
         self._org_name_scraper = OrgNameScraper()
         self._contacts = []
 
     def parse(self, response):
-        contact_indices = []
-
-        names = self._name_scraper.parse(response)
-        org_name = self._org_name_scraper.parse(response)
-        if names is not None:
-            self._contacts = {name.get('name'): {} for name in names}
-            for name in names:
-                n = string.find(response.body, name.get('name'))    # find the index of each contact so we can search
-                contact_indices.append(n)                           # only between the contacts for their info
-        for i in range(len(names)):
-            if i < len(names) - 1:
-                cr = response.replace(body=response.body[contact_indices[i]:contact_indices[i + 1]])
-            else:
-                cr = response.replace(body=response.body[contact_indices[i]:])
-            self._contacts[names[i].get('name')]['position'] = [self._position_scraper.parse(cr)
-                                                                if self._position_scraper.parse(cr)
-                                                                else None][0]
-            india_num = self._number_scraper.parse(cr)[0] if self._number_scraper.parse(cr) else None
-            if india_num:
-                numbers = [india_num]
-            else:
-                us_num = self._us_number_scraper.parse(cr)[0] if self._us_number_scraper.parse(cr) else None
-                if us_num:
-                    numbers = [us_num]
-                else:
-                    numbers = []
-            self._contacts[names[i].get('name')]['number'] = numbers
-            self._contacts[names[i].get('name')]['email'] = [self.compare_emails(cr, names[i].get('name'))
-                                                             if self.compare_emails(cr, names[i].get('name'))
-                                                             else None][0]
-            self._contacts[names[i].get('name')]['organization'] = org_name
+        page = ParsedPage.of(response)
+        text = page.contact_text
+
+        names = [name.get('name') for name in self._name_scraper.parse(page)]
+        org_name = self._org_name_scraper.parse(page)
+
+        # Use the page's single scan for contact info, then give each hit to the contact whose segment holds it
+        segments = self._segment(text, names)
+        positions = self._assign(segments, self._position_scraper.find_all(text))
+        india_nums = self._assign(segments, self._spans(page.contact_info, INDIA_PHONE))
+        us_nums = self._assign(segments, self._spans(page.contact_info, US_PHONE))
+        emails = self._assign(segments, self._spans(page.contact_info, *EMAIL_KINDS))
+
+        self._contacts = {}
+        for i, name in enumerate(names):
+            numbers = india_nums[i] or us_nums[i]
+            self._contacts[name] = {
+                'position': self._position_scraper.first_listed(positions[i]),
+                'number': numbers[:1],
+                'email': self.compare_emails(emails[i], name),
+                'organization': org_name,
+            }
         return self._contacts
 
+    @staticmethod
+    def _spans(contact_info, *kinds):
+        """Gets the (start, end, value) spans of the given kinds of contact info."""
+        return [(info.start, info.end, info.value) for info in contact_info if info.kind in kinds]
+
+    @staticmethod
+    def _segment(text, names):
+        """
+        Splits the text into the stretch belonging to each contact, from the contact's name up to the next name.
+
+        Arguments:
+            text (string): The contact text of the page.
+            names (string[]): The names of the contacts, in the order they were scraped.
+
+        Returns:
+            A list of (start, end) offsets for each contact. Contacts not found in the text get an empty segment.
+        """
+        # find the index of each contact so we can search only between the contacts for their info
+        starts = [text.find(name) for name in names]
+        segments = []
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else len(text)
+            segments.append((start, end) if start >= 0 else (0, 0))
+        return segments
+
+    @staticmethod
+    def _assign(segments, spans):
+        """
+        Groups the values of scanned spans by the segment that contains them.
+
+        Arguments:
+            segments ((int, int)[]): The (start, end) offsets of each segment.
+            spans ((int, int, object)[]): The (start, end, value) spans found by a scanner.
+
+        Returns:
+            A list with the distinct values found in each segment, in document order.
+        """
+        spans = sorted(spans)
+        span_starts = [span[0] for span in spans]
+        groups = []
+        for start, end in segments:
+            group = []
+            # Walk the spans from the first one in the segment, without copying the rest of the list
+            for i in xrange(bisect_left(span_starts, start), len(spans)):
+                span_start, span_end, value = spans[i]
+                if span_start >= end:
+                    break
+                if span_end <= end and value not in group:
+                    group.append(value)
+            groups.append(group)
+        return groups
+
     # if any part of the name is in the email, take that email, otherwise just take the first element from the list
-    def compare_emails(self, response, name):
+    def compare_emails(self, emails, name):
         """
         Checks if the contact's name is in an email to try and get the correct one.
 
         Arguments:
-            response (Response): The page to scrape for emails.
-            name (string): Name of the contact.
+            emails (string[]): The emails found near the contact.
             name (string): Name of the contact.
 
         Returns:
@@ -347,7 +358,6 @@ class OrgContactsScraper(object):
             Else return first email in the list.
             If no emails in the list, return None.
         """
-        emails = self._email_scraper.parse(response)
         name_split = name.split()
         for email in emails:
             for split_index in name_split:
@@ -361,40 +371,25 @@ class OrgContactsScraper(object):
 class OrgFacebookScraper(object):
     """A class that scrapes an organization's Facebook link on a given page."""
     def __init__(self):
-        regex_allow = re.compile("^(?:(?:http|https)://)?(?:www\.)?facebook\.com/.+(?:/)?$", re.IGNORECASE)
-        self._fb_link_ext = SgmlLinkExtractor(allow=regex_allow, canonicalize=False, unique=True)
+        self._regex_allow = re.compile("^(?:(?:http|https)://)?(?:www\.)?facebook\.com/.+(?:/)?$", re.IGNORECASE)
 
     def parse(self, response):
-        try:
-            fb_links = self._fb_link_ext.extract_links(response)
-        except SGMLParseError as e:
-            # Page was poorly formatted, oh well
-            _utilityscrapers_logger.error('Exception encountered when link extracting page: %s' % str(response.url))
-            return None
-
-        urls = [x.url for x in fb_links]
-        if len(fb_links) > 0:
-            return urls[0]
+        for link in ParsedPage.of(response).links:
+            if link.crawlable and self._regex_allow.search(link.url):
+                return link.url
         return None
 
 
 class OrgTwitterScraper(object):
     """A class that scrapes an organization's Twitter link on a given page."""
     def __init__(self):
-        regex_allow = re.compile("^(?:(?:http|https)://)?(?:www\.)?twitter\.com/(?:#!/)?\w+(?:/)?$", re.IGNORECASE)
-        self._tw_link_ext = SgmlLinkExtractor(allow=regex_allow, canonicalize=False, unique=True)
+        self._regex_allow = re.compile("^(?:(?:http|https)://)?(?:www\.)?twitter\.com/(?:#!/)?\w+(?:/)?$",
+                                       re.IGNORECASE)
 
     def parse(self, response):
-        try:
-            tw_links = self._tw_link_ext.extract_links(response)
-        except SGMLParseError as e:
-            # Page was poorly formatted, oh well
-            _utilityscrapers_logger.error('Exception encountered when link extracting page: %s' % str(response.url))
-            return None
-
-        urls = [x.url for x in tw_links]
-        if len(urls) > 0:
-            return urls[0]
+        for link in ParsedPage.of(response).links:
+            if link.crawlable and self._regex_allow.search(link.url):
+                return link.url
         return None
 
 
@@ -407,7 +402,7 @@ class OrgNameScraper(object):
             self._stopwords = f.read().splitlines()
 
     def parse(self, response):
-        hxs = HtmlXPathSelector(response)
+        hxs = ParsedPage.of(response).hxs
 
         url = response.url
         url = urlparse(url).netloc
@@ -451,96 +446,59 @@ class OrgNameScraper(object):
 
 class OrgPartnersScraper(object):
     """A class that scrapes partner organizations of a particular organization on a given page."""
-    def __init__(self):
-        self._link_scraper = LinkScraper()
-        self._partner_text = 'partner'
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                               '../Resources/blocked_org_domains.txt')) as f:
-            self._blocked_domains = map(lambda x: x.rstrip(), f)
+    # Domains that are never partner organizations, including their subdomains
+    _blocked_domains = DomainSet(_read_resource('blocked_org_domains.txt'))
 
-    def _path_to(self, sel):
-        """
-        Find the path to selected node(s).
-
-        Arguments:
-            sel (HtmlXPathSelector): XPath to potential partner links.
+    # Headers indicating partnerships (not inside links)
+    _partner_header = "//*[self::h1 or self::h2 or self::h3 or self::h4 or self::h5 or self::h6]" \
+                      "[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), " \
+                      "'partner')][not(ancestor::a)]"
 
-        Returns:
-            path (string): XPath to the partner organization's link.
-        """
-        path = ''
-        while sel:
-            tags = sel.select('name()').extract()
-            path = '/%s%s' % (tags[0], path)
-            sel = sel.select('..')
-        return path
-
-    def _external_link_count(self, page_url, sel):
+    def _is_partner(self, page_netloc, netloc):
         """
-        Find out how many external links are in a list.
+        Checks whether a link could point to a partner organization.
 
         Arguments:
-            page_url (string): Url of the page.
-            sel (HtmlXPathSelector): XPath to check all the links in that XPath.
+            page_netloc (string): Network location of the page.
+            netloc (string): Network location of the link.
 
         Returns:
-            count (integer): Number of external links.
-                         Returns 0 if not all external links.
+            True if the link is external and not to a blocked domain.
         """
-        count = 0
-        checked_domains = []
-        for href in sel.select('@href').extract():
-            link_url = urlparse(urljoin(page_url.geturl(), href))
-            # link is external
-            if link_url.netloc != page_url.netloc:
-                # link is not to a blocked domain
-                if not any(link_url.netloc.endswith(domain) for domain in self._blocked_domains):
-                    checked_domains.append(link_url.netloc)
-                    count += 1
-        return count
+        return netloc != page_netloc and netloc not in self._blocked_domains
 
     def parse(self, response):
 
-        hxs = HtmlXPathSelector(response)
+        page = ParsedPage.of(response)
         partners = []
 
-        # Look for a tag indicating partnerships (not inside links)
-        elements = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', ]
-        partner_page = False
-        for e in elements:
-            found = hxs.select(
-                "//%s[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'partner')]" % e)
-            if found and '/a/' not in self._path_to(found):
-                partner_page = True
-                break
-
         # Only scrape partner organizations if this page indicates that it lists partners
-        if partner_page:
-            page_url = urlparse(response.url)
-
-            # Find the largest group of external links on the page
+        if page.hxs.select(self._partner_header):
+            page_netloc = urlparse(response.url).netloc.lower()
+
+            # Group the page's links by their structural path, counting the external ones in each group as we go.
+            # Partner logos are usually a repeated element, so they share a path.
+            groups = OrderedDict()
+            counts = {}
+            for link in page.links:
+                if link.tag == 'a':
+                    groups.setdefault(link.path, []).append(link)
+                    if self._is_partner(page_netloc, link.netloc):
+                        counts[link.path] = counts.get(link.path, 0) + 1
+
+            # The largest group of external links holds the partners (the first one, on a tie)
             partner_links = []
-            checked_paths = []
             max_count = 0
-            all_links = hxs.select('//a')
-            for link in all_links:
-                path = self._path_to(link)
-                # Don't check groups of links more than once
-                if path not in checked_paths:
-                    checked_paths.append(path)
-                    related_links = hxs.select(path)
-                    count = self._external_link_count(page_url, related_links)
-                    if count > max_count:
-                        max_count = count
-                        partner_links = related_links
+            for path, links in groups.iteritems():
+                if counts.get(path, 0) > max_count:
+                    max_count = counts[path]
+                    partner_links = links
 
             # Add organizations with links' URLs
-            partner_hrefs = partner_links.select('@href').extract()
-            for href in partner_hrefs:
-                link_url = urlparse(urljoin(page_url.geturl(), href))
-                if link_url.netloc not in self._blocked_domains + [page_url.netloc]:
+            for link in partner_links:
+                if self._is_partner(page_netloc, link.netloc):
                     partner = ScrapedOrganization()
-                    partner['organization_url'] = '%s/' % link_url.netloc
+                    partner['organization_url'] = '%s/' % link.netloc
                     partners.append(partner)
 
         return partners
@@ -548,184 +506,223 @@ class OrgPartnersScraper(object):
 
 class OrgTypeScraper(object):
     """A class that scrapes the type of an organization based on keywords that were scraped."""
+    # Obvious religious keywords. These must be lowercase
+    _religion_words = ['god', 'spiritual', 'religion', 'worship', 'church', 'prayer']
+    # Regex for url of government websites
+    _government_detector = re.compile(r'^([a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?\.)+[Gg][Oo][Vv](\.[a-zA-Z]{2})?$')
+    # Keywords to look for for other types. These must be lowercase
+    _type_words = {
+        OrgTypesEnum.EDUCATION: [
+            'education',
+            'school',
+            'study',
+            'teach',
+        ],
+        OrgTypesEnum.ADVOCACY: [
+            'advocacy',
+            'lobby',
+            'policy',
+        ],
+        OrgTypesEnum.RESEARCH: [
+            'research',
+            'conduct',
+            'document',
+            'identify',
+            'analyze',
+            'correlate',
+            'compile',
+            'report',
+            'data',
+            'publication',
+            'journal',
+            'periodical',
+            'newsletter',
+        ],
+        OrgTypesEnum.PREVENTION: [
+            'prevention',
+            'intervention',
+            'education',
+            'development',
+            'community',
+            'ownership',
+            'avoidance',
+            'blockage',
+            'determent',
+            'forestalling',
+            'halt',
+            'hindrance',
+            'impediment',
+            'inhibitor',
+            'interception',
+            'interruption',
+            'obstacle',
+            'obstruction',
+            'prohibition',
+            'stoppage',
+            'thwarting',
+            'deterence',
+        ],
+        OrgTypesEnum.PROTECTION: [
+            'protection',
+            'rescue',
+            'rehabilitation',
+            'reintegration',
+            'repatriation',
+            'empowerment',
+            'repatriation',
+            'fulfilment',
+            'freedom',
+            'opportunity',
+            'women',
+            'conservation',
+            'insurance',
+            'preservation',
+            'safeguard',
+            'safety',
+            'security',
+            'shelter',
+            'stability',
+            'assurance',
+            'barrier',
+            'cover',
+            'custody',
+            'defense',
+            'fix',
+            'guard',
+            'invulnerability',
+            'reassurance',
+            'refuge',
+            'safekeeping',
+            'salvation',
+            'screen',
+            'self-defense',
+            'shield',
+            'strength',
+            'surety',
+            'guarding',
+        ],
+        OrgTypesEnum.PROSECUTION: [
+            'prosecution',
+            'compliance',
+            'abolish',
+            'law',
+            'enforcement',
+            'regulatory',
+            'regulation',
+            'justice',
+            'case',
+            'cause',
+            'claim',
+            'lawsuit',
+            'litigation',
+            'proceeding',
+            'suit',
+        ],
+    }
+    # Types of which every organization is given at least one
+    _threepees = frozenset([OrgTypesEnum.PREVENTION, OrgTypesEnum.PROTECTION, OrgTypesEnum.PROSECUTION])
+    # Lemmatized religious keywords and the index of lemma -> set(types), built on first use
+    _religion_lemmas = None
+    _type_index = None
+
     def __init__(self):
-        # Lemmatizer for shortening each word to a more-commonly-used form of the word
-        self._lemmatizer = WordNetLemmatizer()
         # Scraper to get common keywords from response
         self._keyword_scraper = KeywordScraper
         # Maximum number of types
         self._max_types = 3
-        # Obvious religious keywords. These must be lowercase
-        self._religion_words = ['god', 'spiritual', 'religion', 'worship', 'church', 'prayer']
-        # Regex for url of government websites
-        self._government_detector = r'^([a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?\.)+[Gg][Oo][Vv](\.[a-zA-Z]{2})?$'
-        # Lowest (highest number) rank a keyword can have and still count towards determining organization type
-        self._max_rank = 40
-        # Keywords to look for for other types. These must be lowercase
-        self._type_words = {
-            OrgTypesEnum.EDUCATION: [
-                'education',
-                'school',
-                'study',
-                'teach',
-            ],
-            OrgTypesEnum.ADVOCACY: [
-                'advocacy',
-                'lobby',
-                'policy',
-            ],
-            OrgTypesEnum.RESEARCH: [
-                'research',
-                'conduct',
-                'document',
-                'identify',
-                'analyze',
-                'correlate',
-                'compile',
-                'report',
-                'data',
-                'publication',
-                'journal',
-                'periodical',
-                'newsletter',
-            ],
-            OrgTypesEnum.PREVENTION: [
-                'prevention',
-                'intervention',
-                'education',
-                'development',
-                'community',
-                'ownership',
-                'avoidance',
-                'blockage',
-                'determent',
-                'forestalling',
-                'halt',
-                'hindrance',
-                'impediment',
-                'inhibitor',
-                'interception',
-                'interruption',
-                'obstacle',
-                'obstruction',
-                'prohibition',
-                'stoppage',
-                'thwarting',
-                'deterence',
-            ],
-            OrgTypesEnum.PROTECTION: [
-                'protection',
-                'rescue',
-                'rehabilitation',
-                'reintegration',
-                'repatriation',
-                'empowerment',
-                'repatriation',
-                'fulfilment',
-                'freedom',
-                'opportunity',
-                'women',
-                'conservation',
-                'insurance',
-                'preservation',
-                'safeguard',
-                'safety',
-                'security',
-                'shelter',
-                'stability',
-                'assurance',
-                'barrier',
-                'cover',
-                'custody',
-                'defense',
-                'fix',
-                'guard',
-                'invulnerability',
-                'reassurance',
-                'refuge',
-                'safekeeping',
-                'salvation',
-                'screen',
-                'self-defense',
-                'shield',
-                'strength',
-                'surety',
-                'guarding',
-            ],
-            OrgTypesEnum.PROSECUTION: [
-                'prosecution',
-                'compliance',
-                'abolish',
-                'law',
-                'enforcement',
-                'regulatory',
-                'regulation',
-                'justice',
-                'case',
-                'cause',
-                'claim',
-                'lawsuit',
-                'litigation',
-                'proceeding',
-                'suit',
-            ],
-        }
-
-        # Stem search words (religious, general)
-        self._religion_words = [self._lemmatizer.lemmatize(word) for word in self._religion_words]
-        for key in self._type_words.iterkeys():
-            self._type_words[key] = [self._lemmatizer.lemmatize(word) for word in self._type_words[key]]
+
+    @classmethod
+    def _index(cls):
+        if cls._type_index is None:
+            # Stem search words (religious, general)
+            cls._religion_lemmas = frozenset(lemmatize(word) for word in cls._religion_words)
+            type_index = {}
+            for org_type, words in cls._type_words.iteritems():
+                for word in words:
+                    type_index.setdefault(lemmatize(word), set()).add(org_type)
+            cls._type_index = type_index
+        return cls._type_index
 
     # Get the organization type
     def parse(self, response):
-        keyword_scraper_inst = self._keyword_scraper()
+        page = ParsedPage.of(response)
 
         # Get keywords
-        keyword_string = keyword_scraper_inst.parse(response)
-        keywords = keyword_string.split()
+        keywords = self._keyword_scraper().parse(page)
 
-        # Get all words
-        all_words = []
-        hxs = HtmlXPathSelector(response)
-        elements = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'a', 'b', 'code', 'em', 'italic',
-                    'small', 'strong', 'div', 'span', 'li', 'th', 'td', 'a[contains(@href, "image")]']
-        for element in elements:
-            words = hxs.select('//' + element + '/text()').extract()
-            append_words(all_words, words)
+        return self.classify(keywords, response.url, page.keyword_freqs)
+
+    def parse_many(self, responses):
+        """
+        Gets the types of several pages.
 
-        all_words = list(set(self._lemmatizer.lemmatize(word) for word in all_words))
+        Arguments:
+            responses (Response[]): The pages to be scraped.
+
+        Returns:
+            A list with the types of each page, in order.
+        """
+        return [self.parse(response) for response in responses]
+
+    def classify(self, keywords, url=None, words=None):
+        """
+        Determines the types of an organization from its keywords.
+
+        Arguments:
+            keywords (string or string[]): The lemmatized keywords of the organization, most frequent first.
+                                           A string is split on whitespace, as stored on organizations.
+            url (string): The URL of the organization, with or without a scheme.
+            words (container): Every lemmatized word on the organization's page. Defaults to the keywords.
+
+        Returns:
+            A list of OrgTypesEnum values.
+        """
+        if isinstance(keywords, basestring):
+            keywords = keywords.split()
+        if words is None:
+            words = keywords
+        type_index = self._index()
 
-        threepees = False
         types = []
         # Government: check the URL
-        if re.search(self._government_detector, urlparse(response.url).netloc):
+        host = (urlparse(url).netloc or url.split('/', 1)[0]) if url else ''
+        if self._government_detector.search(host):
             types.append(OrgTypesEnum.GOVERNMENT)
         # Religion: check for the appearance of certain religious terms
         # (this means that government and religion types are mutually exclusive)
-        elif any(word in self._religion_words for word in all_words):
+        elif any(word in words for word in self._religion_lemmas):
             types.append(OrgTypesEnum.RELIGIOUS)
-            # Other types
 
+        # Other types: go through keywords in order of frequency, checking if they associate with one of our types.
+        # A word listed under several types counts towards the first of them.
         for word in keywords:
-        #go through keywords in order of frequency, checking if they associate with one of our types
-            for type in self._type_words.iterkeys():
-                if word in self._type_words[type]:
-                    types.append(type)
-                    if type == OrgTypesEnum.PREVENTION or type == OrgTypesEnum.PROTECTION or type == OrgTypesEnum.PROSECUTION:
-                        threepees = True
-                    #uniquify
-                    types = list(set(types))
-                    break
-                if len(types) >= self._max_types:
-                    #if there are three types but none of them are P's, replace the last one with prevention
-                    if not threepees:
-                        types[self._max_types] = OrgTypesEnum.PREVENTION
-                        threepees = True
-                    break
-        #if there are less than three types and none of them are P's, append prevention
-        if not threepees:
-            types.append(OrgTypesEnum.PREVENTION)
-        return types or [OrgTypesEnum.UNKNOWN]
+            if len(types) >= self._max_types:
+                break
+            word_types = type_index.get(word)
+            if word_types:
+                org_type = min(word_types)
+                if org_type not in types:
+                    types.append(org_type)
+
+        # If none of the types are P's, replace the last one with prevention, or append it if there is room
+        if not self._threepees.intersection(types):
+            if len(types) >= self._max_types:
+                types[-1] = OrgTypesEnum.PREVENTION
+            else:
+                types.append(OrgTypesEnum.PREVENTION)
+        return types
+
+    def classify_many(self, organizations):
+        """
+        Determines the types of several organizations from their stored keywords, without fetching their pages.
+
+        Arguments:
+            organizations ((string, string)[]): Pairs of each organization's keywords string and URL.
+
+        Returns:
+            A list with the types of each organization, in order.
+        """
+        return [self.classify(keywords, url) for keywords, url in organizations]
 
 
 class OrgUrlScraper(object):
@@ -881,8 +878,10 @@ class PublicationURLScraper(object):
 
 class UrlMetadataScraper(object):
     """A class that scrapes the metadata of a particular url."""
-    def __init__(self):
+    def __init__(self, url_frontier=None):
         self.dao = URLMetadataDAO
+        # The frontier whose filter of stored URLs is checked, if this scraper shares a process with it
+        self.url_frontier = url_frontier
 
     def parse(self, response):
         # Initialize item and set url
@@ -902,8 +901,12 @@ class UrlMetadataScraper(object):
         # default values for first time
         metadata['update_freq'] = 0
 
-        # Compare checksums and update update_freq using the existing URL
-        exist_url_dto = self.dao().find(url=response.url)
+        # Compare checksums and update update_freq using the existing URL, unless it is definitely new
+        seen_urls = self.url_frontier.seen_urls if self.url_frontier is not None else None
+        if seen_urls is None or response.url in seen_urls:
+            exist_url_dto = self.dao().find(url=response.url)
+        else:
+            exist_url_dto = None
         if exist_url_dto is not None:
             exist_url = DTOConverter.from_dto(URLMetadataDTO, exist_url_dto)
             if exist_url.checksum is not None:
@@ -931,71 +934,7 @@ class UrlMetadataScraper(object):
 class USPhoneNumberScraper(object):
     """A class that scrapes US phone numbers on a given page"""
     def parse(self, response):
-        hxs = HtmlXPathSelector(response)
-        us_format_regex = re.compile(
-            r'\b(?! )1?\s?[(-./]?\s?[2-9][0-8][0-9]\s?[)-./]?\s?[2-9][0-9]{2}\s?\W?\s?[0-9]{4}\b')
-        # body will get phone numbers that are just text in the body
-        body = hxs.select('//body').re(us_format_regex)
-
-        phone_nums = body
-
-        # Remove unicode indicators
-        for i in range(len(phone_nums)):
-            phone_nums[i] = phone_nums[i].encode('ascii', 'ignore')
+        contact_info = ParsedPage.of(response).contact_info
 
         # Makes it a set then back to a list to take out duplicates that may have been both in the body and links
-        phone_nums = list(set(phone_nums))
-
-        # Make the list an item
-        phone_nums_list = []
-        for num in phone_nums:
-            num = re.sub("\D", "", num)
-            phone_nums_list.append(num)
-
-        return phone_nums_list
-
-
-def flatten(l):
-    # Flatten one level of nesting
-    return itertools.chain.from_iterable(l)
-
-
-def format_extracted_text(list):
-    """
-    Removes the unicode encoding of the list of keywords.
-
-    Arguments:
-        list (list): List of keywords that were scraped.
-
-    Returns:
-        list (list): List of keywords without unicode.
-    """
-    for i in range(len(list)):
-        list[i] = list[i].encode('ascii', 'ignore')
-    return list
-
-
-def append_words(append_to, source):
-    """
-    Get all the words from the page by removing punctuation and digits.
-
-    Arguments:
-        append_to (list): The list of the words that have been scraped at the time.
-        source (list): The text from the page to be scraped.
-
-    Returns:
-        append_to (list): List of all words that have been scraped thus far.
-    """
-    if not source:
-        return append_to
-
-    #Split each array into sentence, and those into words
-    for line in format_extracted_text(source):
-        line = string.lower(line)
-        for c in string.punctuation:
-            line = line.replace(c, "")
-            for word in line.split():
-                if not word.isdigit():
-                    append_to.append(WordNetLemmatizer().lemmatize(word))
-
-    return append_to
+        return list(set(info.value for info in contact_info if info.kind == US_PHONE))
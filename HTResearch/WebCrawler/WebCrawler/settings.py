@@ -10,6 +10,20 @@ BOT_NAME = 'WebCrawler'
 
 CONCURRENT_ITEMS = 1
 
+# Requests OrgSpider keeps in flight, in total and per domain (0 for no per-domain cap).
+# Scrapy's own CONCURRENT_REQUESTS (16 by default) caps the total as well.
+ORG_SPIDER_MAX_REQUESTS = 16
+ORG_SPIDER_MAX_DOMAIN_REQUESTS = 2
+
+# Least number of seconds between two URLs the frontier hands out for the same domain. OrgSpider also uses it
+# as its download_delay, which is kept exact rather than randomized so it stays a lower bound.
+FRONTIER_DOMAIN_DELAY = 2.0
+RANDOMIZE_DOWNLOAD_DELAY = False
+
+# Scraped URLs are buffered and written in bulk once this many are held, or the oldest is this many seconds old
+URL_BUFFER_SIZE = 500
+URL_BUFFER_MAX_AGE = 5.0
+
 LOG_ENABLED = True
 
 SPIDER_MODULES = ['WebCrawler.spiders', "WebCrawler.utility_spiders"]
@@ -23,5 +37,10 @@ ITEM_PIPELINES = {
     'HTResearch.WebCrawler.WebCrawler.item_pipeline.item_switches.ItemSwitch': 100,
 }
 
+# Number of worker processes OrgSpider uses to scrape pages (0 scrapes them on the reactor thread)
+ANALYSIS_POOL_SIZE = 0
+# Most pages handed to the analysis workers at once (0 means twice ANALYSIS_POOL_SIZE)
+ANALYSIS_POOL_MAX_PENDING = 0
+
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
 #USER_AGENT = 'WebCrawler (+http://www.yourdomain.com)'
@@ -5,14 +5,21 @@
 
 # stdlib imports
 import os
+from collections import deque
+from analysis import AnalysisPool, PageAnalyzer
 from scrapers.document_scrapers import *
 from scrapers.site_specific import StopTraffickingDotInScraper
-from scrapy import log
+from scrapy import log, signals
+from scrapy.exceptions import DontCloseSpider
 from scrapy.spider import BaseSpider
 from scrapy.http import Request
+from scrapy.utils.project import get_project_settings
+from scrapy.xlib.pydispatch import dispatcher
 from springpython.context import ApplicationContext
+from twisted.internet.defer import succeed
 
 # project imports
+from HTResearch.URLFrontier.client import URLFrontierClient
 from HTResearch.URLFrontier.urlfrontier import URLFrontierRules
 from HTResearch.Utilities.context import URLFrontierContext
 
@@ -33,17 +40,44 @@ class OrgSpider(BaseSpider):
     def __init__(self, *args, **kwargs):
         super(OrgSpider, self).__init__(*args, **kwargs)
 
-        # Define our Scrapers
-        self.scrapers = []
-        self.org_scraper = OrganizationScraper()
-        self.meta_data_scraper = UrlMetadataScraper()
-        self.scrapers.append(ContactScraper())
-        self.scrapers.append(LinkScraper())
         self.url_frontier_rules = URLFrontierRules(blocked_domains=OrgSpider._get_blocked_domains())
         self.ctx = ApplicationContext(URLFrontierContext())
         self.url_frontier = self.ctx.get_object("URLFrontier")
+
+        # Define our Scrapers
+        self.analyzer = PageAnalyzer(self.url_frontier)
+
+        # Optionally analyze pages in worker processes, so the reactor thread is left for crawling. The workers
+        # are forked after the frontier has its DAO, since the scrapers put URLs in it.
+        settings = get_project_settings()
+        pool_size = int(kwargs.get('analysis_pool_size', settings.getint('ANALYSIS_POOL_SIZE', 0)))
+        max_pending = int(kwargs.get('analysis_pool_max_pending', settings.getint('ANALYSIS_POOL_MAX_PENDING', 0)))
+        self.analysis_pool = AnalysisPool(pool_size, max_pending) if pool_size > 0 else None
+        dispatcher.connect(self.spider_closed, signals.spider_closed)
+        dispatcher.connect(self.spider_idle, signals.spider_idle)
+
+        self.url_frontier.domain_delay = float(kwargs.get('domain_delay',
+                                                          settings.getfloat('FRONTIER_DOMAIN_DELAY', 2.0)))
+        # URLs can wait in the frontier client and in the spider after being handed out, so have Scrapy's
+        # per-domain download slots hold the delay where requests are actually sent, too
+        self.download_delay = self.url_frontier.domain_delay
         self.next_url_timeout = 10
 
+        # Keep up to max_requests requests in flight, and at most max_domain_requests per domain (0 for no cap)
+        self.max_requests = int(kwargs.get('max_requests', settings.getint('ORG_SPIDER_MAX_REQUESTS', 1)))
+        self.max_domain_requests = int(kwargs.get('max_domain_requests',
+                                                  settings.getint('ORG_SPIDER_MAX_DOMAIN_REQUESTS', 0)))
+        self.url_frontier_client = URLFrontierClient(self.url_frontier, self.url_frontier_rules,
+                                                     batch_size=max(50, 2 * self.max_requests),
+                                                     low_watermark=self.max_requests,
+                                                     fill_timeout=self.next_url_timeout)
+        self._in_flight = 0
+        self._pending_fetches = 0
+        self._domain_requests = {}
+        # URLs waiting for a request to their domain to finish. They have already been taken from the frontier,
+        # so none are dropped; once this many are held, no more are taken until some have been requested.
+        self._held_urls = deque()
+        self.max_held_urls = 10 * self.max_requests
 
     @staticmethod
     def _get_blocked_domains():
@@ -56,58 +90,152 @@ class OrgSpider(BaseSpider):
     def start_requests(self):
         """
         This method is called once by Scrapy to kick things off.
-        We will get the first url to crawl from this.
+        We will get the first urls to crawl from this.
         """
 
         logger.info('Starting requests to the Organization crawler')
 
-        # first URL to begin crawling
-        # Returns a URLMetadata model, so we have to pull the url field
-        start_url_obj = self.url_frontier.next_url(self.url_frontier_rules)
+        # first URLs to begin crawling
+        # Returns URLMetadata models, so we have to pull the url field
+        # This happens once, before anything is being downloaded, so it can wait on the frontier
+        start_urls = self.url_frontier.next_urls(self.max_requests, self.url_frontier_rules, self.next_url_timeout)
 
-        start_url = None
-        if start_url_obj is None:
-            start_url = OrgSpider.default_seed
-        else:
-            start_url = start_url_obj.url
+        requests = self._requests_for(start_urls)
 
         if __debug__:
-            log.msg('START_REQUESTS : start_url = %s' % start_url)
-            logger.debug('START_REQUESTS : start_url = %s' % start_url)
-
-        request = Request(start_url, dont_filter=True)
+            for request in requests:
+                log.msg('START_REQUESTS : start_url = %s' % request.url)
+                logger.debug('START_REQUESTS : start_url = %s' % request.url)
 
         # Scrapy is expecting a list of Item/Requests, so use yield
-        yield request
+        for request in requests:
+            yield request
+
+    def spider_closed(self, spider):
+        if spider is not self:
+            return
+        if self.analysis_pool is not None:
+            self.analysis_pool.close()
+        # The item pipeline has written its last URLs by now, so snapshot them for the next crawl
+        self.url_frontier.save_seen_urls()
+
+    def spider_idle(self, spider):
+        if spider is not self:
+            return
+        # Next requests are scheduled once the frontier answers, so Scrapy can run out of requests while waiting
+        if self._pending_fetches > 0 or self._in_flight > 0:
+            raise DontCloseSpider()
 
     def parse(self, response):
-        try:
-            ret = self.meta_data_scraper.parse(response)
-            if ret is not None:
-                yield ret
-            ret = self.org_scraper.parse(response)
-            if ret is not None:
-                yield ret
-                for scraper in self.scrapers:
-                    ret = scraper.parse(response)
-                    if isinstance(ret, type([])):
-                        for item in ret:
-                            yield item
-                    else:
-                        yield ret
-        except Exception as e:
-            logger.error(e.message)
-
-        next_url = self.url_frontier.next_url(self.url_frontier_rules)
-        timeout = 0
-        while next_url is None and timeout < self.next_url_timeout:
-            timeout += 1
-            next_url = self.url_frontier.next_url(self.url_frontier_rules)
-        if next_url is not None:
-            yield Request(next_url.url, dont_filter=True)
+        self._release(response.request)
+
+        # Scrapy waits on the Deferred for the items, so the reactor keeps crawling while workers scrape
+        # and while the frontier is asked for the next URLs
+        if self.analysis_pool is not None:
+            d = self.analysis_pool.analyze(response)
         else:
-            self.url_frontier.empty_cache(self.url_frontier_rules)
-            yield Request(self.default_seed, dont_filter=True)
+            d = succeed(self.analyzer.analyze(response))
+        d.addCallbacks(self._add_next_requests, self._analysis_failed)
+        return d
+
+    def schedule_next_requests(self, failed_request=None):
+        """
+        Tops the requests in flight back up, without blocking the reactor.
+
+        Arguments:
+            failed_request (Request): A request that failed and is no longer in flight, if any.
+
+        Returns:
+            A Deferred that fires once the requests have been scheduled.
+        """
+        if failed_request is not None:
+            self._release(failed_request)
+
+        def schedule(requests):
+            for request in requests:
+                self.crawler.engine.crawl(request, self)
+
+        d = self._next_requests()
+        d.addCallback(schedule)
+        return d
+
+    def _analysis_failed(self, failure):
+        # Lose the page's items, but keep the crawl going unless the spider is closing
+        logger.error('Failed to analyze a page: %s' % failure.getErrorMessage())
+        if self.analysis_pool is not None and self.analysis_pool.closed:
+            return []
+        return self._add_next_requests([])
+
+    def _add_next_requests(self, items):
+        d = self._next_requests()
+        d.addCallback(lambda requests: items + requests)
+        return d
+
+    def _next_requests(self):
+        # Reserve the free slots while waiting on the frontier, so other callbacks don't fill them too
+        wanted = self.max_requests - self._in_flight
+        if wanted <= 0:
+            return succeed([])
+        if len(self._held_urls) >= self.max_held_urls:
+            # Plenty of URLs are waiting on their domains already, so request what can be from those
+            return succeed(self._requests_for([]))
+        self._in_flight += wanted
+
+        self._pending_fetches += 1
+
+        def release_reserved(urls):
+            self._pending_fetches -= 1
+            self._in_flight -= wanted
+            return self._requests_for(urls)
+
+        d = self.url_frontier_client.next_urls(wanted)
+        d.addCallback(release_reserved)
+        return d
+
+    def _requests_for(self, urls):
+        """
+        Makes requests for as many URLs as there are free slots, holding back URLs whose domain is at its cap.
+
+        Arguments:
+            urls (URLMetadata[]): URLs from the frontier.
+
+        Returns:
+            A list of Requests, which are counted as in flight.
+        """
+        candidates = list(self._held_urls) + list(urls)
+        self._held_urls.clear()
+
+        requests = []
+        for url in candidates:
+            domain = url.domain or UrlUtility.get_domain(url.url)
+            if self._in_flight >= self.max_requests or \
+                    (self.max_domain_requests and self._domain_requests.get(domain, 0) >= self.max_domain_requests):
+                self._held_urls.append(url)
+            else:
+                requests.append(self._track(Request(url.url, dont_filter=True), domain))
+
+        if not requests and self._in_flight == 0:
+            # The frontier has run dry, so start over from the seed
+            self.url_frontier_client.empty_cache()
+            requests.append(self._track(Request(self.default_seed, dont_filter=True),
+                                        UrlUtility.get_domain(self.default_seed)))
+        return requests
+
+    def _track(self, request, domain):
+        self._in_flight += 1
+        self._domain_requests[domain] = self._domain_requests.get(domain, 0) + 1
+        request.meta['frontier_domain'] = domain
+        return request
+
+    def _release(self, request):
+        domain = request.meta.pop('frontier_domain', None) if request is not None else None
+        if domain is None:
+            # Not one of our requests, or already released
+            return
+        self._in_flight -= 1
+        self._domain_requests[domain] -= 1
+        if not self._domain_requests[domain]:
+            del self._domain_requests[domain]
 
 
 class StopTraffickingSpider(BaseSpider):